@@ -1,15 +1,21 @@
-from flask import Flask, request
+from flask import Flask, request, jsonify, Response
 import sys
 import pip
-from carprice.util.util import read_yaml_file, write_yaml_file, get_carlist
+from carprice.util.util import read_yaml_file, write_yaml_file
 from matplotlib.style import context
 from carprice.logger import logging
 import os, sys
+import gc
+import pandas as pd
 import json
+import time
 from carprice.config.configuration import Configuartion
 from carprice.constant import CONFIG_DIR, get_current_time_stamp
 from carprice.pipeline.pipeline import Pipeline
-from carprice.entity.carprice_predictor import CarPricePredictor, CarPriceData
+from carprice.entity.carprice_predictor import CarPricePredictor, CarPriceData, get_carprice_batch
+from carprice.entity.car_catalog import CarCatalog
+from carprice.entity.serving_metrics import ServingMetrics, STAGE_FORM_PARSING, STAGE_FRAME_CONSTRUCTION, \
+    ENDPOINT_PREDICT, ENDPOINT_API_PREDICT
 from flask import send_file, abort, render_template
 
 
@@ -27,6 +33,12 @@ from carprice.logger import get_log_dataframe
 
 CAR_DATA_KEY = "carprice_data"
 CAR_VALUE_KEY = "carprice_value"
+# costliest search candidates of the latest profiled training shown on /view_experiment_hist
+COSTLIEST_CANDIDATES_LIMIT = 10
+
+model_serving_config = Configuartion().get_model_serving_config()
+car_catalog = None
+serving_metrics = ServingMetrics(metrics_dir=model_serving_config.metrics_dir)
 
 app = Flask(__name__)
 
@@ -76,8 +88,14 @@ def index():
 @app.route('/view_experiment_hist', methods=['GET', 'POST'])
 def view_experiment_history():
     experiment_df = Pipeline.get_experiments_status()
+    candidate_costs_df = Pipeline.get_costliest_candidates(limit=COSTLIEST_CANDIDATES_LIMIT)
+    shadow_stats = get_carprice_predictor().model_registry.get_shadow_stats()
+    shadow_df = pd.DataFrame(shadow_stats.get("models", []))
     context = {
-        "experiment": experiment_df.to_html(classes='table table-striped col-12')
+        "experiment": experiment_df.to_html(classes='table table-striped col-12'),
+        "candidate_costs": candidate_costs_df.to_html(classes='table table-striped col-12', index=False),
+        "shadow_stats": shadow_stats,
+        "shadow_models": shadow_df.to_html(classes='table table-striped col-12', index=False)
     }
     return render_template('experiment_history.html', context=context)
 
@@ -98,46 +116,173 @@ def train():
     return render_template('train.html', context=context)
 
 
+def get_carprice_predictor() -> CarPricePredictor:
+    return CarPricePredictor(model_dir=MODEL_DIR,
+                             refresh_interval=model_serving_config.model_refresh_interval,
+                             prediction_cache_size=model_serving_config.prediction_cache_size,
+                             prediction_cache_ttl=model_serving_config.prediction_cache_ttl,
+                             prediction_batch_window=model_serving_config.prediction_batch_window,
+                             prediction_batch_max_size=model_serving_config.prediction_batch_max_size,
+                             serving_metrics=serving_metrics,
+                             shadow_promotion_samples=model_serving_config.shadow_promotion_samples,
+                             shadow_queue_size=model_serving_config.shadow_queue_size,
+                             shadow_stats_window=model_serving_config.shadow_stats_window)
+
+
+def get_car_catalog() -> CarCatalog:
+    global car_catalog
+    if car_catalog is None:
+        car_catalog = CarCatalog.load_latest(file_pattern=model_serving_config.car_catalog_file_pattern,
+                                             fallback_data_file_path=model_serving_config.car_catalog_fallback_file_path)
+    return car_catalog
+
+
+def start_model_watcher():
+    """
+    Starts the model watcher thread of this process, once per gunicorn worker from gunicorn.conf.py.
+    """
+    if model_serving_config.model_watcher:
+        get_carprice_predictor().model_registry.start_watcher(golden_record=model_serving_config.warm_up_record)
+
+
+@app.route('/api/cars', methods=['GET'])
+def search_cars():
+    try:
+        prefix = request.args.get("prefix", "")
+        limit = request.args.get("limit", type=int)
+        if "limit" not in request.args:
+            limit = 20
+        elif limit is None or limit < 0:
+            return jsonify({"error": "limit must be a non negative integer"}), 400
+        limit = min(limit, 100)
+        catalog = get_car_catalog()
+        cars = [{"car_name": car_name, **catalog.get_car_defaults(car_name)}
+                for car_name in catalog.search(prefix=prefix, limit=limit)]
+        return jsonify({"cars": cars})
+    except Exception as e:
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/prediction_cache', methods=['GET'])
+def prediction_cache_stats():
+    try:
+        return jsonify(get_carprice_predictor().model_registry.get_prediction_cache_stats())
+    except Exception as e:
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/shadow', methods=['GET'])
+def shadow_stats():
+    try:
+        return jsonify(get_carprice_predictor().model_registry.get_shadow_stats())
+    except Exception as e:
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    model_registry = get_carprice_predictor().model_registry
+    if not model_registry.is_ready():
+        try:
+            model_registry.warm_up(record=model_serving_config.warm_up_record)
+        except Exception as e:
+            logging.exception(e)
+            return jsonify({"ready": False, "error": str(e)}), 503
+    return jsonify({"ready": True, **model_registry.get_reload_stats()})
+
+
 @app.route('/predict', methods=['GET', 'POST'])
 def predict():
     context = {
         CAR_DATA_KEY: None,
         CAR_VALUE_KEY: None
     }
-    car_list = get_carlist()
-    
     if request.method == "POST":
-        car_name = request.form.get("car_name")
-        vehicle_age = int(request.form.get("vehicle_age"))
-        km_driven = int(request.form.get("km_driven"))
-        seller_type = request.form.get("seller_type")
-        fuel_type = request.form.get("fuel_type")
-        transmission_type = request.form.get("transmission")
-        mileage = float(request.form.get("mileage"))
-        engine = int(request.form.get("engine"))
-        max_power = float(request.form.get("max_power"))
-        seats = int(request.form.get("seats"))
-
-        carprice_data = CarPriceData(car_name= car_name, 
-                                     vehicle_age= vehicle_age, 
-                                     km_driven= km_driven, 
-                                     seller_type= seller_type, 
-                                     fuel_type= fuel_type, 
-                                     transmission_type= transmission_type, 
-                                     mileage= mileage, 
-                                     engine= engine, 
-                                     max_power= max_power, 
-                                     seats= seats
-                                     )
-        carprice_df = carprice_data.get_car_data_as_dict()
-        carprice_predictor = CarPricePredictor(model_dir=MODEL_DIR)
-        carprice_value = carprice_predictor.predict(X=carprice_df)
+        serving_metrics.count_request(ENDPOINT_PREDICT)
+        try:
+            start_time = time.perf_counter()
+            car_name = request.form.get("car_name")
+            vehicle_age = int(request.form.get("vehicle_age"))
+            km_driven = int(request.form.get("km_driven"))
+            seller_type = request.form.get("seller_type")
+            fuel_type = request.form.get("fuel_type")
+            transmission_type = request.form.get("transmission")
+            mileage = float(request.form.get("mileage"))
+            engine = int(request.form.get("engine"))
+            max_power = float(request.form.get("max_power"))
+            seats = int(request.form.get("seats"))
+            serving_metrics.observe(STAGE_FORM_PARSING, time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            carprice_data = CarPriceData(car_name= car_name, 
+                                         vehicle_age= vehicle_age, 
+                                         km_driven= km_driven, 
+                                         seller_type= seller_type, 
+                                         fuel_type= fuel_type, 
+                                         transmission_type= transmission_type, 
+                                         mileage= mileage, 
+                                         engine= engine, 
+                                         max_power= max_power, 
+                                         seats= seats
+                                         )
+            carprice_record = carprice_data.get_car_data_as_record()
+            serving_metrics.observe(STAGE_FRAME_CONSTRUCTION, time.perf_counter() - start_time)
+
+            carprice_predictor = get_carprice_predictor()
+            carprice_value = carprice_predictor.predict(X=carprice_record)
+        except Exception as e:
+            serving_metrics.count_error(ENDPOINT_PREDICT)
+            raise e
         context = {
             CAR_DATA_KEY: carprice_data.get_car_data_as_dict(),
             CAR_VALUE_KEY: round(carprice_value[0], 2),
         }
         return render_template('predict.html', context=context)
-    return render_template("predict.html", context=context, car_list= car_list)
+    return render_template("predict.html", context=context)
+
+
+@app.route('/api/predict', methods=['POST'])
+def predict_batch():
+    serving_metrics.count_request(ENDPOINT_API_PREDICT)
+    try:
+        start_time = time.perf_counter()
+        car_data = request.get_json(force=True)
+        serving_metrics.observe(STAGE_FORM_PARSING, time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        carprice_batch = get_carprice_batch(car_data=car_data, max_batch_size=model_serving_config.max_batch_size)
+        serving_metrics.observe(STAGE_FRAME_CONSTRUCTION, time.perf_counter() - start_time)
+    except Exception as e:
+        serving_metrics.count_error(ENDPOINT_API_PREDICT)
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        carprice_predictor = get_carprice_predictor()
+        unknown_categories = carprice_predictor.get_unknown_categories(carprice_batch)
+    except Exception as e:
+        serving_metrics.count_error(ENDPOINT_API_PREDICT)
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+    if len(unknown_categories) > 0:
+        serving_metrics.count_error(ENDPOINT_API_PREDICT)
+        return jsonify({"error": f"Unknown categories: {unknown_categories}"}), 400
+
+    try:
+        carprice_value = carprice_predictor.predict(X=carprice_batch)
+        return jsonify({CAR_VALUE_KEY: [round(float(value), 2) for value in carprice_value]})
+    except Exception as e:
+        serving_metrics.count_error(ENDPOINT_API_PREDICT)
+        logging.exception(e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(serving_metrics.to_prometheus_text(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route('/saved_models', defaults={'req_path': 'saved_models'})
@@ -215,5 +360,27 @@ def render_log_dir(req_path):
     return render_template('log_files.html', result=result)
 
 
+def preload_model():
+    """
+    Loads the model and the car catalog and runs the warm-up prediction at import time.
+    With gunicorn --preload the import happens once in the master, so forked workers
+    share these pages copy-on-write. gc.freeze moves the loaded objects out of the
+    collector's reach, otherwise a collection in a worker would write to (and copy) them.
+    """
+    try:
+        get_carprice_predictor().model_registry.warm_up(record=model_serving_config.warm_up_record)
+        get_car_catalog()
+        gc.freeze()
+    except Exception as e:
+        # no model pushed yet, workers load it lazily once it exists
+        logging.exception(e)
+
+
+if model_serving_config.preload_model:
+    preload_model()
+
+
 if __name__ == "__main__":
+    serving_metrics.reset()
+    start_model_watcher()
     app.run()
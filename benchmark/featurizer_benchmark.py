@@ -0,0 +1,99 @@
+"""
+Compiled featurizer against the fitted ColumnTransformer on the cardekho data.
+
+The preprocessing of the training pipeline is fitted on the dataset and compiled. Both are
+first checked to produce the same features on --rows raw rows, then the median time of
+--repeat calls is taken for a single record and for a batch of --rows records. The
+ColumnTransformer path is the DataFrame the model builds for it, the compiled path is
+transform_record, transform_records and transform_batch.
+
+    python benchmark/featurizer_benchmark.py --rows 1000 --repeat 20 --output featurizer.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_FILE_PATH = os.path.join(ROOT_DIR, "notebook", "data", "cardekho_dataset.csv")
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, "config", "schema.yaml")
+
+
+def load_preprocessor_and_records():
+    from carprice.component.data_transformation import DataTransformation
+    from carprice.entity.artifact_entity import DataValidationArtifact
+    from carprice.util.util import read_yaml_file
+
+    schema = read_yaml_file(SCHEMA_FILE_PATH)
+    dataframe = pd.read_csv(DATASET_FILE_PATH)[list(schema["columns"].keys())]
+    dataframe = dataframe.drop(columns=[schema["target_column"]])
+    data_validation_artifact = DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH, report_file_path=None,
+                                                      report_page_file_path=None, is_validated=True, message="")
+    preprocessing_object = DataTransformation(data_transformation_config=None, data_ingestion_artifact=None,
+                                              data_validation_artifact=data_validation_artifact
+                                              ).get_data_transformer_object()
+    preprocessing_object.fit(dataframe)
+    return preprocessing_object, dataframe
+
+
+def get_median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return round(float(np.median(timings)) * 1000, 4)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compare the compiled featurizer with the fitted ColumnTransformer.")
+    parser.add_argument("--rows", type=int, default=1000, help="rows of the batch measurement and the parity check")
+    parser.add_argument("--repeat", type=int, default=20, help="calls timed per measurement")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    args = parser.parse_args(args)
+
+    from benchmark.serving_benchmark import get_git_revision, get_hardware_info
+    from carprice.entity.carprice_batch import CarPriceBatch
+    from carprice.entity.compiled_featurizer import CompiledFeaturizer
+
+    preprocessing_object, dataframe = load_preprocessor_and_records()
+    compiled_featurizer = CompiledFeaturizer.compile(preprocessor=preprocessing_object)
+    sample = dataframe.sample(n=min(args.rows, len(dataframe)), random_state=42).reset_index(drop=True)
+    compiled_featurizer.check_parity(preprocessor=preprocessing_object, dataframe=sample)
+
+    records = sample.to_dict("records")
+    record = records[0]
+    columns = list(preprocessing_object.feature_names_in_)
+    measurements = {
+        "single_record": {
+            "column_transformer_ms": get_median_ms(
+                lambda: preprocessing_object.transform(pd.DataFrame({column: [record[column]] for column in columns})),
+                args.repeat),
+            "transform_record_ms": get_median_ms(lambda: compiled_featurizer.transform_record(record), args.repeat),
+        },
+        "batch": {
+            "column_transformer_ms": get_median_ms(
+                lambda: preprocessing_object.transform(pd.DataFrame.from_records(records)), args.repeat),
+            "transform_records_ms": get_median_ms(lambda: compiled_featurizer.transform_records(records),
+                                                  args.repeat),
+            "transform_batch_ms": get_median_ms(
+                lambda: compiled_featurizer.transform_batch(CarPriceBatch.from_records(records)), args.repeat),
+        },
+    }
+
+    results = {"git_revision": get_git_revision(), "hardware": get_hardware_info(),
+               "rows": len(records), "repeat": args.repeat, "parity": True, "measurements": measurements}
+    for name, timings in measurements.items():
+        print(f"{name:>14}: " + "  ".join(f"{key} {value:.4f}" for key, value in timings.items()))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
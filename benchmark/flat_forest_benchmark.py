@@ -0,0 +1,90 @@
+"""
+Flat forest against the native predict of the tree ensembles configured in model.yaml.
+
+Every configured model is fitted on the cardekho features with its model.yaml params, or
+with --n-estimators and --max-depth when given, and flattened. The flat forest is first checked
+to predict like the native model on the whole dataset, then the median time of --repeat calls
+is taken for a single row and for a batch of --rows rows. CarPriceModel serves batches of up to
+FLAT_FOREST_MAX_ROWS rows from the flat forest and larger ones from the native model.
+
+    python benchmark/flat_forest_benchmark.py --rows 10000 --repeat 20 --output flat_forest.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_CONFIG_FILE_PATH = os.path.join(ROOT_DIR, "config", "model.yaml")
+
+
+def load_configured_models() -> dict:
+    from carprice.entity.model_factory import ModelFactory
+
+    initialized_model_list = ModelFactory(model_config_path=MODEL_CONFIG_FILE_PATH).get_initialized_model_list()
+    return {type(initialized_model.model).__name__: initialized_model.model
+            for initialized_model in initialized_model_list}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compare the flat forest with the native predict of the models.")
+    parser.add_argument("--rows", type=int, default=10000, help="rows of the batch measurement")
+    parser.add_argument("--repeat", type=int, default=20, help="calls timed per measurement")
+    parser.add_argument("--n-estimators", type=int, default=None, help="override n_estimators of model.yaml")
+    parser.add_argument("--max-depth", type=int, default=None, help="override max_depth of model.yaml")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    args = parser.parse_args(args)
+
+    from sklearn.base import clone
+    from benchmark.featurizer_benchmark import get_median_ms, load_preprocessor_and_records
+    from benchmark.featurizer_benchmark import DATASET_FILE_PATH, SCHEMA_FILE_PATH
+    from benchmark.serving_benchmark import get_git_revision, get_hardware_info
+    from carprice.component.model_trainer import FLAT_FOREST_MAX_ROWS, FLAT_FOREST_PARITY_RTOL
+    from carprice.entity.flat_forest import FlatForest
+    from carprice.util.util import read_yaml_file
+    import pandas as pd
+
+    preprocessing_object, dataframe = load_preprocessor_and_records()
+    input_feature = np.asarray(preprocessing_object.transform(dataframe), dtype=np.float32)
+    output_feature = pd.read_csv(DATASET_FILE_PATH)[read_yaml_file(SCHEMA_FILE_PATH)["target_column"]].to_numpy()
+    batch_feature = input_feature[np.resize(np.arange(len(input_feature)), args.rows)]
+    row_feature = input_feature[:1]
+
+    measurements = {}
+    for model_name, model in load_configured_models().items():
+        overrides = {name: value for name, value in [("n_estimators", args.n_estimators),
+                                                     ("max_depth", args.max_depth)] if value is not None}
+        model = clone(model).set_params(**overrides).fit(input_feature, output_feature)
+        flat_forest = FlatForest.from_model(model)
+        native_prediction = model.predict(input_feature)
+        max_relative_error = float(np.max(np.abs(flat_forest.predict(input_feature) - native_prediction) /
+                                          np.maximum(np.abs(native_prediction), 1e-12)))
+        if max_relative_error > FLAT_FOREST_PARITY_RTOL:
+            raise Exception(f"Flat forest of {model_name} differs from the native predict by {max_relative_error}")
+        measurements[model_name] = {
+            "n_trees": flat_forest.n_trees, "n_nodes": flat_forest.n_nodes, "max_depth": flat_forest.max_depth,
+            "max_relative_error": max_relative_error,
+            "single_row": {"native_ms": get_median_ms(lambda: model.predict(row_feature), args.repeat),
+                           "flat_forest_ms": get_median_ms(lambda: flat_forest.predict(row_feature), args.repeat)},
+            "batch": {"native_ms": get_median_ms(lambda: model.predict(batch_feature), args.repeat),
+                      "flat_forest_ms": get_median_ms(lambda: flat_forest.predict(batch_feature), args.repeat)},
+        }
+
+    results = {"git_revision": get_git_revision(), "hardware": get_hardware_info(), "rows": args.rows,
+               "repeat": args.repeat, "flat_forest_max_rows": FLAT_FOREST_MAX_ROWS, "measurements": measurements}
+    for model_name, measurement in measurements.items():
+        print(f"{model_name:>22}: {measurement['n_trees']} trees depth {measurement['max_depth']}  "
+              f"max relative error {measurement['max_relative_error']:.2e}")
+        for name in ["single_row", "batch"]:
+            timings = measurement[name]
+            print(f"{name:>22}: " + "  ".join(f"{key} {value:.4f}" for key, value in timings.items()))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
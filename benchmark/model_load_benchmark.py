@@ -0,0 +1,66 @@
+"""
+Cold load time of the dill pickled model against the memory mapped model artifact.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in the process. The
+libraries are imported before the load call is timed, so load_ms is deserialization alone;
+process_ms is the whole child process, imports included.
+
+    python benchmark/model_load_benchmark.py saved_models/<timestamp> --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOAD_SCRIPT = """
+import sys, time
+process_start_time = float(sys.argv[2])
+from carprice.entity.model_artifact import load_carprice_model
+import carprice.component.model_trainer, xgboost
+start_time = time.time()
+load_carprice_model(model_path=sys.argv[1])
+end_time = time.time()
+print(end_time - start_time, end_time - process_start_time)
+"""
+
+
+def measure_cold_load(model_path: str, repeat: int) -> dict:
+    load_times, process_times = [], []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", LOAD_SCRIPT, model_path, repr(time.time())],
+                                         cwd=ROOT_DIR, text=True)
+        load_time, process_time = map(float, output.split()[-2:])
+        load_times.append(load_time)
+        process_times.append(process_time)
+    return {"model_path": model_path,
+            "load_ms": float(np.median(load_times) * 1000),
+            "process_ms": float(np.median(process_times) * 1000)}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compare cold load time of the model formats.")
+    parser.add_argument("model_version_dir", help="saved_models/<timestamp> folder with model.pkl and model_artifact")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(args)
+
+    from carprice.constant import MODEL_ARTIFACT_DIR_NAME
+    model_version_dir = os.path.abspath(args.model_version_dir)
+    pickle_file_names = [file_name for file_name in os.listdir(model_version_dir) if file_name.endswith(".pkl")]
+    results = {
+        "dill": measure_cold_load(os.path.join(model_version_dir, pickle_file_names[0]), repeat=args.repeat),
+        "model_artifact": measure_cold_load(os.path.join(model_version_dir, MODEL_ARTIFACT_DIR_NAME),
+                                            repeat=args.repeat),
+    }
+    results["load_speedup"] = results["dill"]["load_ms"] / results["model_artifact"]["load_ms"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
@@ -0,0 +1,251 @@
+"""
+Latency and throughput benchmark of the prediction service.
+
+Requests are drawn from notebook/data/cardekho_dataset.csv and sent to the /predict form
+path and the /api/predict batch path at several concurrency levels. The app is driven
+in-process through the Flask test client by default, or over HTTP with --url (a running
+server) or --start-server (gunicorn on localhost). Results are written as JSON together
+with the git revision and hardware info.
+
+    python benchmark/serving_benchmark.py --output benchmark/results.json
+    python benchmark/serving_benchmark.py --output new.json --compare benchmark/baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_FILE_PATH = os.path.join(ROOT_DIR, "notebook", "data", "cardekho_dataset.csv")
+INPUT_COLUMNS = ["car_name", "vehicle_age", "km_driven", "seller_type", "fuel_type", "transmission_type",
+                 "mileage", "engine", "max_power", "seats"]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_REQUESTS = 200
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_THRESHOLD = 0.10
+
+
+def load_records(sample_size: int, seed: int = 42) -> list:
+    dataframe = pd.read_csv(DATASET_FILE_PATH)
+    sample = dataframe.sample(n=sample_size, replace=True, random_state=seed)[INPUT_COLUMNS]
+    return [{column: (value.item() if hasattr(value, "item") else value) for column, value in record.items()}
+            for record in sample.to_dict("records")]
+
+
+def to_form(record: dict) -> dict:
+    form = {column: str(value) for column, value in record.items()}
+    # the html form names the transmission field differently
+    form["transmission"] = form.pop("transmission_type")
+    return form
+
+
+class TestClientTransport:
+    """Sends requests to the app in-process, one Flask test client per thread."""
+
+    def __init__(self):
+        sys.path.insert(0, ROOT_DIR)
+        os.chdir(ROOT_DIR)
+        from app import app
+        self.app = app
+
+    def post_form(self, path: str, form: dict):
+        response = self.app.test_client().post(path, data=form)
+        if response.status_code != 200:
+            raise Exception(f"{path} returned {response.status_code}")
+
+    def post_json(self, path: str, payload):
+        response = self.app.test_client().post(path, json=payload)
+        if response.status_code != 200:
+            raise Exception(f"{path} returned {response.status_code}")
+
+
+class HttpTransport:
+    """Sends requests to a running server."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    def _post(self, path: str, data: bytes, content_type: str):
+        request = urllib.request.Request(f"{self.url}{path}", data=data, headers={"Content-Type": content_type})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+
+    def post_form(self, path: str, form: dict):
+        self._post(path, urllib.parse.urlencode(form).encode(), "application/x-www-form-urlencoded")
+
+    def post_json(self, path: str, payload):
+        self._post(path, json.dumps(payload).encode(), "application/json")
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    process = subprocess.Popen(["gunicorn", "--preload", f"--workers={workers}", "--threads=4",
+                                "--bind", f"127.0.0.1:{port}", "app:app"], cwd=ROOT_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5) as response:
+                if response.status == 200:
+                    return process
+        except Exception:
+            time.sleep(0.5)
+    process.terminate()
+    raise Exception("Server did not become ready within 120 seconds")
+
+
+def run_scenario(send, payloads: list, concurrency: int) -> dict:
+    """
+    Sends every payload once with concurrency threads and returns throughput and latency percentiles.
+    """
+    def timed_send(payload):
+        start_time = time.perf_counter()
+        try:
+            send(payload)
+            return time.perf_counter() - start_time, False
+        except Exception:
+            return time.perf_counter() - start_time, True
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_send, payloads))
+    wall_time = time.perf_counter() - start_time
+
+    latencies = np.array([latency for latency, _ in results])
+    return {"requests": len(results),
+            "errors": int(sum(is_error for _, is_error in results)),
+            "throughput_rps": len(results) / wall_time,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p95_ms": float(np.percentile(latencies, 95) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000)}
+
+
+def get_git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def get_hardware_info() -> dict:
+    memory_gb = None
+    if hasattr(os, "sysconf") and "SC_PHYS_PAGES" in os.sysconf_names:
+        memory_gb = round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3, 1)
+    return {"platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "memory_gb": memory_gb,
+            "python": platform.python_version()}
+
+
+def run_benchmark(transport, n_requests: int, batch_size: int, concurrency_levels: list) -> dict:
+    records = load_records(sample_size=n_requests * batch_size)
+    form_payloads = [to_form(record) for record in records[:n_requests]]
+    batch_payloads = [records[start:start + batch_size] for start in range(0, len(records), batch_size)]
+
+    endpoints = {
+        "predict_form": (lambda form: transport.post_form("/predict", form), form_payloads),
+        f"api_predict_batch_{batch_size}": (lambda batch: transport.post_json("/api/predict", batch),
+                                            batch_payloads),
+    }
+    # one untimed pass loads the model and warms the caches the way live traffic would
+    for send, payloads in endpoints.values():
+        send(payloads[0])
+
+    results = {}
+    for endpoint, (send, payloads) in endpoints.items():
+        results[endpoint] = {}
+        for concurrency in concurrency_levels:
+            results[endpoint][str(concurrency)] = run_scenario(send, payloads, concurrency)
+            print(f"{endpoint:<28} concurrency={concurrency:<3} {results[endpoint][str(concurrency)]}")
+    return results
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    return: list of regressions where p99 latency grew or throughput dropped by more than threshold
+    """
+    regressions = []
+    for endpoint, levels in current["results"].items():
+        for concurrency, metrics in levels.items():
+            base_metrics = baseline["results"].get(endpoint, {}).get(concurrency)
+            if base_metrics is None:
+                continue
+            if metrics["p99_ms"] > base_metrics["p99_ms"] * (1 + threshold):
+                regressions.append(f"{endpoint} concurrency={concurrency} p99 "
+                                   f"{base_metrics['p99_ms']:.2f}ms -> {metrics['p99_ms']:.2f}ms")
+            if metrics["throughput_rps"] < base_metrics["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{endpoint} concurrency={concurrency} throughput "
+                                   f"{base_metrics['throughput_rps']:.1f} -> {metrics['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the car price prediction service.")
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "benchmark", "results.json"))
+    parser.add_argument("--url", default=None, help="benchmark a running server instead of the test client")
+    parser.add_argument("--start-server", action="store_true", help="start gunicorn on localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--compare", default=None, help="baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(args)
+
+    server = None
+    if args.start_server:
+        server = start_server(port=args.port, workers=args.workers)
+        transport = HttpTransport(url=f"http://127.0.0.1:{args.port}")
+        mode = "gunicorn"
+    elif args.url:
+        transport = HttpTransport(url=args.url)
+        mode = "http"
+    else:
+        transport = TestClientTransport()
+        mode = "test_client"
+
+    try:
+        results = run_benchmark(transport, n_requests=args.requests, batch_size=args.batch_size,
+                                concurrency_levels=args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+
+    report = {"git_revision": get_git_revision(),
+              "created_at": datetime.now().isoformat(timespec="seconds"),
+              "mode": mode,
+              "hardware": get_hardware_info(),
+              "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("mode") != mode or baseline.get("hardware") != report["hardware"]:
+            print(f"Warning: baseline was measured in {baseline.get('mode')} mode on {baseline.get('hardware')}")
+        regressions = compare_results(report, baseline, threshold=args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%} against {baseline.get('git_revision')}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {baseline.get('git_revision')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Model search fit throughput at several CPU thread budgets on the cardekho data.
+
+The dataset is transformed with the preprocessing of the training pipeline, then the same
+small search (two models, grid_search n_jobs -1, two search workers) runs once without a
+budget, where every level takes all cores, and once per --budgets value. fits_per_second is
+the number of estimator fits of the search divided by its wall time.
+
+    python benchmark/thread_budget_benchmark.py --budgets 1 2 4 8 --output budget.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_FILE_PATH = os.path.join(ROOT_DIR, "notebook", "data", "cardekho_dataset.csv")
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, "config", "schema.yaml")
+
+BENCHMARK_MODEL_CONFIG = {
+    "grid_search": {"class": "GridSearchCV", "module": "sklearn.model_selection",
+                    "params": {"cv": 3, "verbose": 0, "n_jobs": -1}},
+    "search_workers": 2,
+    "model_selection": {
+        "module_0": {"class": "XGBRegressor", "module": "xgboost",
+                     "params": {"n_estimators": 200, "learning_rate": 0.1, "random_state": 42},
+                     "search_param_grid": {"max_depth": [5, 8], "colsample_bytree": [0.5, 1.0]}},
+        "module_1": {"class": "RandomForestRegressor", "module": "sklearn.ensemble",
+                     "params": {"n_estimators": 100, "n_jobs": -1, "random_state": 42},
+                     "search_param_grid": {"max_depth": [10, 20], "max_features": ["sqrt", 1.0]}},
+    },
+}
+
+
+def load_training_data():
+    from carprice.component.data_transformation import DataTransformation
+    from carprice.entity.artifact_entity import DataValidationArtifact
+    from carprice.util.util import read_yaml_file
+
+    schema = read_yaml_file(SCHEMA_FILE_PATH)
+    dataframe = pd.read_csv(DATASET_FILE_PATH)[list(schema["columns"].keys())]
+    data_validation_artifact = DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH, report_file_path=None,
+                                                      report_page_file_path=None, is_validated=True, message="")
+    preprocessing_object = DataTransformation(data_transformation_config=None, data_ingestion_artifact=None,
+                                              data_validation_artifact=data_validation_artifact
+                                              ).get_data_transformer_object()
+    target_column_name = schema["target_column"]
+    input_feature = preprocessing_object.fit_transform(dataframe.drop(columns=[target_column_name]))
+    return input_feature, dataframe[target_column_name].to_numpy()
+
+
+def run_search(model_config_path: str, thread_budget, input_feature, output_feature) -> dict:
+    from carprice.entity.model_factory import ModelFactory
+
+    model_factory = ModelFactory(model_config_path=model_config_path, thread_budget=thread_budget)
+    start_time = time.perf_counter()
+    model_factory.get_best_model(X=input_feature, y=output_feature, base_accuracy=0.0)
+    wall_seconds = time.perf_counter() - start_time
+    n_fits = sum(model.n_fits for model in model_factory.grid_searched_best_model_list)
+    split = model_factory.thread_budget_split
+    return {"thread_budget": thread_budget,
+            "split": None if split is None else split._asdict(),
+            "n_fits": n_fits,
+            "wall_seconds": round(wall_seconds, 3),
+            "fits_per_second": round(n_fits / wall_seconds, 3)}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Measure model search fit throughput at several thread budgets.")
+    parser.add_argument("--budgets", type=int, nargs="+", default=None,
+                        help="thread budgets to measure, defaults to 1, 2, 4, ... up to the number of cores")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    args = parser.parse_args(args)
+
+    from benchmark.serving_benchmark import get_git_revision, get_hardware_info
+
+    cpu_count = os.cpu_count()
+    budgets = args.budgets
+    if budgets is None:
+        budgets = sorted({min(2 ** power, cpu_count) for power in range(cpu_count.bit_length() + 1)})
+
+    input_feature, output_feature = load_training_data()
+    with tempfile.TemporaryDirectory(prefix="thread_budget_") as benchmark_dir:
+        model_config_path = os.path.join(benchmark_dir, "model.yaml")
+        with open(model_config_path, "w") as model_config_file:
+            yaml.safe_dump(BENCHMARK_MODEL_CONFIG, model_config_file)
+        runs = [run_search(model_config_path, None, input_feature, output_feature)]
+        runs.extend(run_search(model_config_path, budget, input_feature, output_feature) for budget in budgets)
+
+    results = {"git_revision": get_git_revision(), "hardware": get_hardware_info(),
+               "rows": int(input_feature.shape[0]), "runs": runs}
+    for run in runs:
+        budget = "no budget" if run["thread_budget"] is None else f"budget {run['thread_budget']}"
+        print(f"{budget:>12}: {run['fits_per_second']:8.3f} fits/s  {run['wall_seconds']:8.2f} s  {run['split']}")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
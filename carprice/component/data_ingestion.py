@@ -6,8 +6,12 @@ from carprice.entity.artifact_entity import DataIngestionArtifact
 import numpy as np
 from six.moves import urllib
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from carprice.util.s3_operation import download_from_s3
+from carprice.entity.car_catalog import CarCatalog
+from carprice.entity.incremental_training import get_row_hashes
+
+# rows are assigned to the test set by their content hash, in this many buckets
+SPLIT_HASH_BUCKETS = 1000000
 
 class DataIngestion:
 
@@ -44,6 +48,20 @@ class DataIngestion:
         except Exception as e:
             raise CarException(e,sys) from e
     
+    @staticmethod
+    def get_test_row_mask(data_frame: pd.DataFrame, test_size: float) -> np.ndarray:
+        """
+        Picks test rows by a hash of their content instead of a random shuffle, so a row stays on the
+        same side of the split when listings are added to the dataset and identical rows never end up
+        on both sides. Incremental training relies on it: only the added rows are new training rows.
+        return: boolean mask of the test rows
+        """
+        try:
+            buckets = get_row_hashes(data_frame) % np.uint64(SPLIT_HASH_BUCKETS)
+            return buckets < np.uint64(int(test_size * SPLIT_HASH_BUCKETS))
+        except Exception as e:
+            raise CarException(e,sys) from e
+
     def split_data_as_train_test(self) -> DataIngestionArtifact:
         try:
             raw_data_dir = self.data_ingestion_config.raw_data_dir
@@ -60,7 +78,8 @@ class DataIngestion:
             train_set = None
             test_set = None
 
-            train_set, test_set = train_test_split(data_frame, test_size=0.2, random_state=42)
+            test_row_mask = DataIngestion.get_test_row_mask(data_frame, test_size=0.2)
+            train_set, test_set = data_frame[~test_row_mask], data_frame[test_row_mask]
 
             train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
                                             file_name)
@@ -78,8 +97,14 @@ class DataIngestion:
                 logging.info(f"Exporting test dataset to file: [{test_file_path}]")
                 test_set.to_csv(test_file_path,index=False)
             
+            car_catalog_file_path = self.data_ingestion_config.car_catalog_file_path
+            car_catalog = CarCatalog.from_dataframe(data_frame)
+            logging.info(f"Exporting car catalog of [{len(car_catalog)}] cars to file: [{car_catalog_file_path}]")
+            car_catalog.save(file_path=car_catalog_file_path)
+
             data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
                                 test_file_path=test_file_path,
+                                car_catalog_file_path=car_catalog_file_path,
                                 is_ingested=True,
                                 message=f"Data ingestion completed successfully."
                                 )
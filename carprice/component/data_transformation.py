@@ -66,20 +66,35 @@ class DataTransformation:
         except Exception as e:
             raise CarException(e, sys) from e
     
-    def _outlier_capping(self, col, df):
+    @staticmethod
+    def _outlier_capping(col, df):
         try: 
             percentile25 = df[col].quantile(0.25)
             percentile75 = df[col].quantile(0.75)
             iqr = percentile75 - percentile25
             upper_limit = percentile75 + 1.5 * iqr
             lower_limit = percentile25 - 1.5 * iqr
-            df.loc[(df[col]>upper_limit), col]= upper_limit
-            df.loc[(df[col]<lower_limit), col]= lower_limit 
+            # clip upcasts integer columns to float, assigning float limits into them is rejected by pandas
+            df[col] = df[col].clip(lower=lower_limit, upper=upper_limit)
             return df
         
         except Exception as e:
             raise CarException(e, sys) from e
 
+    @staticmethod
+    def _get_feature_array(input_feature_arr, target_feature, dtype) -> np.ndarray:
+        """
+        Stacks the transformed input features and the target as the last column into one array of dtype,
+        written in place so no float64 copy of the whole dataset is made on the way.
+        """
+        try:
+            feature_arr = np.empty((input_feature_arr.shape[0], input_feature_arr.shape[1] + 1), dtype=dtype)
+            feature_arr[:, :-1] = input_feature_arr
+            feature_arr[:, -1] = np.asarray(target_feature)
+            return feature_arr
+        except Exception as e:
+            raise CarException(e, sys) from e
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         try:
             logging.info(f"Obtaining preprocessing object.")
@@ -119,11 +134,11 @@ class DataTransformation:
             logging.info(
                 f"Splitting input and target feature from training and testing dataframe.")
             input_feature_train_df = train_df.drop(
-                columns=[target_column_name], axis=1)
+                columns=[target_column_name])
             target_feature_train_df = train_df[target_column_name]
 
             input_feature_test_df = test_df.drop(
-                columns=[target_column_name], axis=1)
+                columns=[target_column_name])
             target_feature_test_df = test_df[target_column_name]
 
             logging.info(
@@ -133,11 +148,15 @@ class DataTransformation:
             input_feature_test_arr = preprocessing_obj.transform(
                 input_feature_test_df)
 
-            train_arr = np.c_[input_feature_train_arr,
-                              np.array(target_feature_train_df)]
+            feature_dtype = self.data_transformation_config.feature_dtype
+            logging.info(f"Stacking input and target feature as {feature_dtype} arrays")
+            train_arr = self._get_feature_array(input_feature_arr=input_feature_train_arr,
+                                                target_feature=target_feature_train_df,
+                                                dtype=feature_dtype)
 
-            test_arr = np.c_[input_feature_test_arr,
-                             np.array(target_feature_test_df)]
+            test_arr = self._get_feature_array(input_feature_arr=input_feature_test_arr,
+                                               target_feature=target_feature_test_df,
+                                               dtype=feature_dtype)
 
             transformed_train_dir = self.data_transformation_config.transformed_train_dir
             transformed_test_dir = self.data_transformation_config.transformed_test_dir
@@ -155,9 +174,9 @@ class DataTransformation:
             logging.info(f"Saving transformed training and testing array.")
 
             save_numpy_array_data(
-                file_path=transformed_train_file_path, array=train_arr)
+                file_path=transformed_train_file_path, array=train_arr, dtype=feature_dtype)
             save_numpy_array_data(
-                file_path=transformed_test_file_path, array=test_arr)
+                file_path=transformed_test_file_path, array=test_arr, dtype=feature_dtype)
 
             preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
 
@@ -169,7 +188,8 @@ class DataTransformation:
                                                                       message="Data transformation successfull.",
                                                                       transformed_train_file_path=transformed_train_file_path,
                                                                       transformed_test_file_path=transformed_test_file_path,
-                                                                      preprocessed_object_file_path=preprocessing_obj_file_path
+                                                                      preprocessed_object_file_path=preprocessing_obj_file_path,
+                                                                      feature_dtype=feature_dtype
                                                                       )
             logging.info(
                 f"Data transformationa artifact: {data_transformation_artifact}")
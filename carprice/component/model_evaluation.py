@@ -122,6 +122,8 @@ class ModelEvaluation:
                 logging.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
                 return model_evaluation_artifact
 
+            # both are CarPriceModels predicting on the raw datasets, when the trained model continues the
+            # accepted one they share the preprocessing object and each dataset is transformed once for both
             model_list = [model, trained_model_object]
 
             metric_info_artifact = evaluate_regression_model(model_list=model_list,
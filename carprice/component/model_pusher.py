@@ -2,6 +2,7 @@ from carprice.logger import logging
 from carprice.exception import CarException
 from carprice.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact 
 from carprice.entity.config_entity import ModelPusherConfig
+from carprice.entity.model_artifact import get_model_artifact_dir
 import os, sys
 import shutil
 
@@ -33,6 +34,13 @@ class ModelPusher:
             logging.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir:[{export_model_file_path}]")
 
+            evaluated_model_artifact_dir = get_model_artifact_dir(model_file_path=evaluated_model_file_path)
+            if os.path.isdir(evaluated_model_artifact_dir):
+                export_model_artifact_dir = get_model_artifact_dir(model_file_path=export_model_file_path)
+                shutil.copytree(src=evaluated_model_artifact_dir, dst=export_model_artifact_dir)
+                logging.info(f"Model artifact: {evaluated_model_artifact_dir} is copied in export dir:"
+                             f"[{export_model_artifact_dir}]")
+
             model_pusher_artifact = ModelPusherArtifact(is_model_pusher=True,
                                                         export_model_file_path=export_model_file_path
                                                         )
@@ -1,23 +1,102 @@
+import os
+import shutil
 import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
 from carprice.exception import CarException
 from carprice.logger import logging
 from typing import List
+from carprice.constant import *
 from carprice.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
+from carprice.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from carprice.entity.config_entity import ModelTrainerConfig
-from carprice.util.util import load_numpy_array_data,save_object,load_object
+from carprice.util.util import load_numpy_array_data,save_object,load_object,load_data,read_yaml_file
+from carprice.component.data_transformation import DataTransformation
 from carprice.entity.model_factory import MetricInfoArtifact, ModelFactory,GridSearchedBestModel
 from carprice.entity.model_factory import evaluate_regression_model
+from carprice.entity.compiled_featurizer import CompiledFeaturizer
+from carprice.entity.flat_forest import FlatForest
+from carprice.entity.carprice_batch import CarPriceBatch
+from carprice.entity.model_artifact import save_model_artifact, get_model_artifact_dir, check_model_artifact_parity
+from carprice.entity.search_cache import SearchCache
+from carprice.entity.cost_profiler import ServingConstraint, ServingCost, get_serving_cost
+from carprice.entity.incremental_training import get_row_hashes, save_training_state, load_training_state
+from carprice.entity.incremental_training import get_new_categories, get_drifted_columns, continue_training
+from carprice.entity.incremental_training import TRAINING_STATE_ROW_HASHES_KEY
+from carprice.entity.incremental_training import TRAINING_STATE_FULL_TRAINING_SECONDS_KEY
+from carprice.entity.incremental_training import TRAINING_STATE_TEST_ROW_HASHES_KEY
+
+# above this many rows the native xgboost / sklearn predict is faster than the flat forest
+FLAT_FOREST_MAX_ROWS = 256
+FLAT_FOREST_PARITY_RTOL = 1e-4
+# raw test rows the compiled featurizer is checked against the preprocessing object on
+FEATURIZER_PARITY_ROWS = 1000
+# raw test rows the model artifact is checked against the pickled model on
+MODEL_ARTIFACT_PARITY_ROWS = 1000
 
 
 class CarPriceModel:
-    def __init__(self, preprocessing_object, trained_model_object):
+    def __init__(self, preprocessing_object, trained_model_object, compiled_featurizer: CompiledFeaturizer = None,
+                 flat_forest: FlatForest = None, feature_dtype: str = None):
         """
         TrainedModel constructor
         preprocessing_object: preprocessing_object
         trained_model_object: trained_model_object
+        compiled_featurizer: optional single row equivalent of preprocessing_object
+        flat_forest: optional array based copy of trained_model_object used for small batches
+        feature_dtype: dtype the model was trained on, features of preprocessing_object are cast to it
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.compiled_featurizer = compiled_featurizer
+        self.flat_forest = flat_forest
+        self.feature_dtype = feature_dtype
+
+    def predict_transformed(self, transformed_feature):
+        """
+        function performs prediction on already transformed features
+        """
+        # models pickled before the flat forest existed do not have the attribute
+        flat_forest = getattr(self, "flat_forest", None)
+        if flat_forest is not None and transformed_feature.shape[0] <= FLAT_FOREST_MAX_ROWS:
+            return flat_forest.predict(transformed_feature)
+        return self.trained_model_object.predict(transformed_feature)
+
+    def transform(self, X):
+        """
+        function transforms raw inputs into model features of the model feature dtype.
+        X: DataFrame, CarPriceBatch, a single record (dict or numpy record) or a list of records.
+        Records skip the pandas based preprocessing_object when a compiled featurizer is available.
+        Models loaded from a model artifact have no preprocessing_object and use the featurizer for frames too.
+        """
+        feature = self._transform(X)
+        # models pickled before feature_dtype existed keep the dtype of the preprocessing output
+        feature_dtype = getattr(self, "feature_dtype", None)
+        if feature_dtype is not None and feature.dtype != feature_dtype:
+            feature = feature.astype(feature_dtype)
+        return feature
+
+    def _transform(self, X):
+        # models pickled before the compiled featurizer existed do not have the attribute
+        compiled_featurizer = getattr(self, "compiled_featurizer", None)
+        if isinstance(X, list):
+            if compiled_featurizer is None:
+                return self.preprocessing_object.transform(pd.DataFrame.from_records(X))
+            return compiled_featurizer.transform_records(X)
+        if isinstance(X, (dict, np.void)):
+            if compiled_featurizer is None:
+                return self.preprocessing_object.transform(
+                    pd.DataFrame({column: [X[column]] for column in self.preprocessing_object.feature_names_in_}))
+            return compiled_featurizer.transform_record(X)
+        if isinstance(X, CarPriceBatch):
+            if compiled_featurizer is None:
+                return self.preprocessing_object.transform(X.to_data_frame())
+            return compiled_featurizer.transform_batch(X)
+        if self.preprocessing_object is None:
+            return compiled_featurizer.transform_frame(X)
+        return self.preprocessing_object.transform(X)
 
     def predict(self, X):
         """
@@ -25,8 +104,20 @@ class CarPriceModel:
         which gurantees that the inputs are in the same format as the training data
         At last it perform prediction on transformed features
         """
-        transformed_feature = self.preprocessing_object.transform(X)
-        return self.trained_model_object.predict(transformed_feature)
+        return self.predict_transformed(self.transform(X))
+
+    def predict_record(self, record):
+        """
+        function accepts a single raw input as a dict or numpy record.
+        """
+        return self.predict_transformed(self.transform(record))
+
+    def predict_records(self, records: list):
+        """
+        function accepts a list of raw inputs (dicts or numpy records) and scores them
+        with a single prediction call.
+        """
+        return self.predict_transformed(self.transform(list(records)))
 
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
@@ -37,16 +128,372 @@ class CarPriceModel:
 
 class ModelTrainer:
 
-    def __init__(self, model_trainer_config:ModelTrainerConfig, data_transformation_artifact: DataTransformationArtifact):
+    def __init__(self, model_trainer_config:ModelTrainerConfig, data_transformation_artifact: DataTransformationArtifact,
+                 data_ingestion_artifact: DataIngestionArtifact = None,
+                 data_validation_artifact: DataValidationArtifact = None):
+        """
+        data_ingestion_artifact, data_validation_artifact: raw training data,
+        incremental training is only possible when they are given
+        """
         try:
             logging.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_validation_artifact = data_validation_artifact
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_training_state_file_path(model_file_path: str) -> str:
+        return os.path.join(os.path.dirname(model_file_path), MODEL_TRAINER_TRAINING_STATE_FILE_NAME)
+
+    def get_previous_best_model_file_path(self):
+        """
+        return: path of the best model in the model evaluation report, None if no model was accepted yet
+        """
+        try:
+            model_evaluation_file_path = self.model_trainer_config.model_evaluation_file_path
+            if not os.path.exists(model_evaluation_file_path):
+                return None
+            model_eval_content = read_yaml_file(file_path=model_evaluation_file_path) or dict()
+            if BEST_MODEL_KEY not in model_eval_content:
+                return None
+            return model_eval_content[BEST_MODEL_KEY][MODEL_PATH_KEY]
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_train_and_test_df(self):
+        schema_file_path = self.data_validation_artifact.schema_file_path
+        train_df = load_data(file_path=self.data_ingestion_artifact.train_file_path, schema_file_path=schema_file_path)
+        test_df = load_data(file_path=self.data_ingestion_artifact.test_file_path, schema_file_path=schema_file_path)
+        return train_df, test_df
+
+    def save_training_state(self, full_training_seconds: float, row_hashes: np.ndarray = None,
+                            test_row_hashes: np.ndarray = None):
+        """
+        Saves the raw training and test row hashes next to the trained model for the next incremental run.
+        """
+        try:
+            if row_hashes is None or test_row_hashes is None:
+                if self.data_ingestion_artifact is None or self.data_validation_artifact is None:
+                    return
+                train_df, test_df = self.get_train_and_test_df()
+                row_hashes = get_row_hashes(train_df)
+                test_row_hashes = get_row_hashes(test_df)
+            training_state_file_path = ModelTrainer.get_training_state_file_path(
+                self.model_trainer_config.trained_model_file_path)
+            save_training_state(file_path=training_state_file_path, row_hashes=row_hashes,
+                                full_training_seconds=full_training_seconds, test_row_hashes=test_row_hashes)
+            logging.info(f"Saved training state at path: {training_state_file_path}")
+        except Exception as e:
+            logging.info(f"Next training will not be able to run incrementally: {e}")
+
+    def get_serving_constraint(self) -> ServingConstraint:
+        """
+        return: serving limits of the model trainer config, None when no limit is set
+        """
+        serving_constraint = ServingConstraint(
+            max_p99_latency_ms=self.model_trainer_config.serving_max_p99_latency_ms or None,
+            min_throughput_rows_per_second=self.model_trainer_config.serving_min_throughput_rows_per_second or None,
+            max_artifact_size_mb=self.model_trainer_config.serving_max_artifact_size_mb or None,
+            latency_sample_rows=self.model_trainer_config.serving_latency_sample_rows or 200)
+        if serving_constraint[:3] == (None, None, None):
+            return None
+        return serving_constraint
+
+    @staticmethod
+    def get_serving_cost_fields(metric_info: MetricInfoArtifact) -> dict:
+        """
+        return: ModelTrainerArtifact fields of the serving cost measured for the selected model
+        """
+        if metric_info.serving_cost is None:
+            return {}
+        return metric_info.serving_cost._asdict()
+
+    def save_candidate_costs(self, candidate_costs: list):
+        """
+        Saves the training cost of every search candidate next to the trained model.
+        return: candidate costs file path, None when the search did not profile its candidates
+        """
+        try:
+            if len(candidate_costs) == 0:
+                return None
+            candidate_costs_file_path = os.path.join(os.path.dirname(self.model_trainer_config.trained_model_file_path),
+                                                     MODEL_TRAINER_CANDIDATE_COSTS_FILE_NAME)
+            os.makedirs(os.path.dirname(candidate_costs_file_path), exist_ok=True)
+            pd.DataFrame(candidate_costs).to_csv(candidate_costs_file_path, index=False)
+            logging.info(f"Saved costs of [{len(candidate_costs)}] search candidates at path: {candidate_costs_file_path}")
+            return candidate_costs_file_path
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_compiled_featurizer(self, preprocessing_obj, feature_dtype: str,
+                                compiled_featurizer: CompiledFeaturizer = None) -> CompiledFeaturizer:
+        """
+        Compiles preprocessing_obj, or casts compiled_featurizer to feature_dtype, and checks that it
+        transforms raw test rows exactly like preprocessing_obj, raises when it does not.
+        return: compiled featurizer, None when the preprocessing object can not be compiled and is served as is
+        """
+        try:
+            if compiled_featurizer is not None and np.dtype(compiled_featurizer.feature_dtype) != np.dtype(feature_dtype):
+                compiled_featurizer = CompiledFeaturizer(steps=compiled_featurizer.steps,
+                                                         n_features=compiled_featurizer.n_features,
+                                                         feature_dtype=feature_dtype)
+            if compiled_featurizer is None:
+                try:
+                    compiled_featurizer = CompiledFeaturizer.compile(preprocessor=preprocessing_obj,
+                                                                     feature_dtype=feature_dtype)
+                    logging.info(f"Compiled preprocessing object into {compiled_featurizer.n_features} feature featurizer")
+                except Exception as e:
+                    logging.info(f"Preprocessing object can not be compiled, single row prediction will use it as is: {e}")
+            if compiled_featurizer is not None:
+                compiled_featurizer.check_parity(preprocessor=preprocessing_obj,
+                                                 dataframe=self.get_test_input_df(n_rows=FEATURIZER_PARITY_ROWS))
+            return compiled_featurizer
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_carprice_model(preprocessing_obj, model_object, x_test,
+                           compiled_featurizer: CompiledFeaturizer = None) -> CarPriceModel:
+        """
+        return: CarPriceModel serving model_object, with a flat forest when it predicts like the trained model
+        """
+        flat_forest = None
+        try:
+            flat_forest = FlatForest.from_model(model_object)
+            if not np.allclose(flat_forest.predict(x_test), model_object.predict(x_test),
+                               rtol=FLAT_FOREST_PARITY_RTOL):
+                raise Exception("Flat forest predictions differ from the trained model on the test dataset")
+            logging.info(f"Flattened trained model into {flat_forest.n_trees} trees "
+                         f"and {flat_forest.n_nodes} nodes of depth {flat_forest.max_depth}")
+        except Exception as e:
+            flat_forest = None
+            logging.info(f"Trained model will be served without a flat forest: {e}")
+
+        return CarPriceModel(preprocessing_object=preprocessing_obj,trained_model_object=model_object,
+                             compiled_featurizer=compiled_featurizer, flat_forest=flat_forest,
+                             feature_dtype=str(x_test.dtype))
+
+    def get_test_input_df(self, n_rows: int) -> pd.DataFrame:
+        """
+        return: up to n_rows raw test rows without the target column, the input a served model receives
+        """
+        try:
+            schema = read_yaml_file(file_path=self.data_validation_artifact.schema_file_path)
+            _, test_df = self.get_train_and_test_df()
+            return test_df.drop(columns=[schema[TARGET_COLUMN_KEY]]).head(int(n_rows)).reset_index(drop=True)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_serving_records(self, n_rows: int) -> list:
+        """
+        return: up to n_rows raw test records without the target column
+        """
+        return self.get_test_input_df(n_rows=n_rows).to_dict("records")
+
+    @staticmethod
+    def get_serving_cost(model_object, preprocessing_obj, x_test, records: list,
+                         compiled_featurizer: CompiledFeaturizer = None) -> ServingCost:
+        """
+        Serving cost of model_object as it would be served: the CarPriceModel saved for it is timed
+        on raw records and the size is the one of its model artifact on disk.
+        """
+        try:
+            carprice_model = ModelTrainer.get_carprice_model(preprocessing_obj=preprocessing_obj,
+                                                             model_object=model_object, x_test=x_test,
+                                                             compiled_featurizer=compiled_featurizer)
+            with tempfile.TemporaryDirectory(prefix="serving_cost_") as serving_cost_dir:
+                model_artifact_dir = os.path.join(serving_cost_dir, MODEL_ARTIFACT_DIR_NAME)
+                try:
+                    save_model_artifact(dir_path=model_artifact_dir, carprice_model=carprice_model)
+                except Exception as e:
+                    # served from the pickled model file, its size is measured instead
+                    model_artifact_dir = None
+                serving_cost = get_serving_cost(serving_model=carprice_model, records=records,
+                                                artifact_dir=model_artifact_dir)
+            logging.info(f"Serving cost of [{type(model_object).__name__}]: {serving_cost}")
+            return serving_cost
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def save_carprice_model(self, preprocessing_obj, model_object, x_test,
+                            compiled_featurizer: CompiledFeaturizer = None) -> str:
+        """
+        Saves the trained model with its preprocessing object as a CarPriceModel and a model artifact.
+        compiled_featurizer: compiled preprocessing_obj, compiled here when not given
+        return: trained model file path
+        """
+        try:
+            trained_model_file_path=self.model_trainer_config.trained_model_file_path
+            compiled_featurizer = self.get_compiled_featurizer(preprocessing_obj=preprocessing_obj,
+                                                               feature_dtype=str(x_test.dtype),
+                                                               compiled_featurizer=compiled_featurizer)
+            carprice_model = ModelTrainer.get_carprice_model(preprocessing_obj=preprocessing_obj,
+                                                             model_object=model_object, x_test=x_test,
+                                                             compiled_featurizer=compiled_featurizer)
+            logging.info(f"Saving model at path: {trained_model_file_path}")
+            save_object(file_path=trained_model_file_path,obj=carprice_model)
+
+            model_artifact_dir = get_model_artifact_dir(model_file_path=trained_model_file_path)
+            try:
+                save_model_artifact(dir_path=model_artifact_dir, carprice_model=carprice_model)
+                check_model_artifact_parity(dir_path=model_artifact_dir, carprice_model=carprice_model,
+                                            dataframe=self.get_test_input_df(n_rows=MODEL_ARTIFACT_PARITY_ROWS))
+                logging.info(f"Saved memory mappable model artifact at path: {model_artifact_dir}")
+            except Exception as e:
+                # the registry prefers the artifact, one that does not predict like the pickled model is removed
+                shutil.rmtree(model_artifact_dir, ignore_errors=True)
+                logging.info(f"Model will be served from the pickled model file only: {e}")
+            return trained_model_file_path
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def initiate_incremental_model_trainer(self, start_time: float):
+        """
+        Continues training the best model of the model evaluation report on the training rows
+        it has not seen, transformed with its own preprocessing object.
+        return: ModelTrainerArtifact, None when a full training is needed
+        """
+        try:
+            if self.data_ingestion_artifact is None or self.data_validation_artifact is None:
+                logging.info("Raw training data is not available, incremental training skipped")
+                return None
+            previous_model_file_path = self.get_previous_best_model_file_path()
+            if previous_model_file_path is None:
+                logging.info("No accepted model to continue training from")
+                return None
+            training_state_file_path = ModelTrainer.get_training_state_file_path(previous_model_file_path)
+            if not os.path.exists(training_state_file_path):
+                logging.info(f"Accepted model has no training state: {training_state_file_path}")
+                return None
+            training_state = load_training_state(file_path=training_state_file_path)
+
+            schema = read_yaml_file(file_path=self.data_validation_artifact.schema_file_path)
+            target_column_name = schema[TARGET_COLUMN_KEY]
+            numerical_columns = schema[NUMERICAL_COLUMN_KEY]
+            train_df, test_df = self.get_train_and_test_df()
+
+            row_hashes = get_row_hashes(train_df)
+            test_row_hashes = get_row_hashes(test_df)
+            new_row_mask = ~np.isin(row_hashes, training_state[TRAINING_STATE_ROW_HASHES_KEY])
+            n_new_rows = int(new_row_mask.sum())
+            if n_new_rows == 0:
+                logging.info("No new training rows since the accepted model")
+                return None
+            # rows the accepted model was evaluated on must not train it, the test set would no longer be held out
+            previous_test_row_hashes = training_state[TRAINING_STATE_TEST_ROW_HASHES_KEY]
+            if previous_test_row_hashes is None:
+                logging.info("Accepted model has no test rows in its training state")
+                return None
+            n_previous_test_rows = int(np.isin(row_hashes[new_row_mask], previous_test_row_hashes).sum())
+            if n_previous_test_rows > 0:
+                logging.info(f"[{n_previous_test_rows}] new training rows were test rows of the accepted model")
+                return None
+            max_new_rows = self.model_trainer_config.incremental_max_new_rows_fraction * len(train_df)
+            if n_new_rows > max_new_rows:
+                logging.info(f"[{n_new_rows}] new training rows are more than [{int(max_new_rows)}]")
+                return None
+
+            known_df, new_df = train_df[~new_row_mask], train_df[new_row_mask]
+            new_categories = get_new_categories(known_dataframe=known_df, new_dataframe=new_df,
+                                                categorical_columns=schema[CATEGORICAL_COLUMN_KEY])
+            if len(new_categories) > 0:
+                logging.info(f"New rows have categories the accepted model was not trained on: {new_categories}")
+                return None
+            drifted_columns = get_drifted_columns(known_dataframe=known_df, new_dataframe=new_df,
+                                                  columns=numerical_columns + [target_column_name],
+                                                  p_value_threshold=self.model_trainer_config.incremental_drift_p_value)
+            if len(drifted_columns) > 0:
+                logging.info(f"Drift found between known and new rows, p values: {drifted_columns}")
+                return None
+
+            previous_model = load_object(file_path=previous_model_file_path)
+            preprocessing_obj = previous_model.preprocessing_object
+
+            # same outlier capping as the data transformation, the accepted model was trained on capped data
+            continuous_columns = [feature for feature in numerical_columns if len(train_df[feature].unique()) >= 25]
+            for col in continuous_columns:
+                DataTransformation._outlier_capping(col=col, df=train_df)
+                DataTransformation._outlier_capping(col=col, df=test_df)
+
+            feature_dtype = self.data_transformation_artifact.feature_dtype
+            x_train = np.asarray(preprocessing_obj.transform(train_df.drop(columns=[target_column_name])),
+                                 dtype=feature_dtype)
+            y_train = train_df[target_column_name].to_numpy(dtype=np.float64)
+            x_test = np.asarray(preprocessing_obj.transform(test_df.drop(columns=[target_column_name])),
+                                dtype=feature_dtype)
+            y_test = test_df[target_column_name].to_numpy(dtype=np.float64)
+
+            logging.info(f"Continuing training of the accepted model on [{n_new_rows}] new rows")
+            model_object = continue_training(model=previous_model.trained_model_object,
+                                             input_feature=x_train[new_row_mask],
+                                             output_feature=y_train[new_row_mask],
+                                             n_estimators=self.model_trainer_config.incremental_n_estimators,
+                                             learning_rate_scale=self.model_trainer_config.incremental_learning_rate_scale)
+            serving_constraint = self.get_serving_constraint()
+            serving_costs = None
+            if serving_constraint is not None:
+                compiled_featurizer = self.get_compiled_featurizer(
+                    preprocessing_obj=preprocessing_obj, feature_dtype=feature_dtype,
+                    compiled_featurizer=getattr(previous_model, "compiled_featurizer", None))
+                serving_costs = [ModelTrainer.get_serving_cost(
+                    model_object=model_object, preprocessing_obj=preprocessing_obj, x_test=x_test,
+                    records=self.get_serving_records(n_rows=serving_constraint.latency_sample_rows),
+                    compiled_featurizer=compiled_featurizer)]
+            metric_info:MetricInfoArtifact = evaluate_regression_model(model_list=[model_object],X_train=x_train,y_train=y_train,X_test=x_test,y_test=y_test,
+                                                                       base_accuracy=self.model_trainer_config.base_accuracy,
+                                                                       serving_constraint=serving_constraint,
+                                                                       serving_costs=serving_costs)
+            # the continued model may not lose more than incremental_max_accuracy_drop to the accepted one on the current data
+            previous_metric_info = evaluate_regression_model(model_list=[previous_model.trained_model_object],
+                                                             X_train=x_train,y_train=y_train,X_test=x_test,y_test=y_test,
+                                                             base_accuracy=-np.inf)
+            accuracy_drop = previous_metric_info.model_accuracy - metric_info.model_accuracy
+            if accuracy_drop > self.model_trainer_config.incremental_max_accuracy_drop:
+                logging.info(f"Continued model is [{accuracy_drop}] less accurate than the accepted model")
+                return None
+
+            trained_model_file_path = self.save_carprice_model(
+                preprocessing_obj=preprocessing_obj, model_object=model_object, x_test=x_test,
+                compiled_featurizer=getattr(previous_model, "compiled_featurizer", None))
+            # the full training time is carried over, it is what the next incremental run saves against
+            full_training_seconds = training_state[TRAINING_STATE_FULL_TRAINING_SECONDS_KEY]
+            self.save_training_state(full_training_seconds=full_training_seconds, row_hashes=row_hashes,
+                                     test_row_hashes=test_row_hashes)
+            training_seconds = time.perf_counter() - start_time
+            saved_seconds = full_training_seconds - training_seconds
+            message = (f"Model trained incrementally on {n_new_rows} new rows in {training_seconds:.1f} seconds, "
+                       f"{saved_seconds:.1f} seconds less than the last full training")
+            logging.info(message)
+            return ModelTrainerArtifact(is_trained=True,message=message,
+                                        trained_model_file_path=trained_model_file_path,
+                                        train_rmse=metric_info.train_rmse,
+                                        test_rmse=metric_info.test_rmse,
+                                        train_accuracy=metric_info.train_accuracy,
+                                        test_accuracy=metric_info.test_accuracy,
+                                        model_accuracy=metric_info.model_accuracy,
+                                        is_incremental=True,
+                                        training_seconds=training_seconds,
+                                        saved_seconds=saved_seconds,
+                                        **ModelTrainer.get_serving_cost_fields(metric_info))
         except Exception as e:
             raise CarException(e, sys) from e
 
     def initiate_model_trainer(self)->ModelTrainerArtifact:
         try:
+            start_time = time.perf_counter()
+            if self.model_trainer_config.incremental_training:
+                try:
+                    model_trainer_artifact = self.initiate_incremental_model_trainer(start_time=start_time)
+                    if model_trainer_artifact is not None:
+                        logging.info(f"Model Trainer Artifact: {model_trainer_artifact}")
+                        return model_trainer_artifact
+                except Exception as e:
+                    logging.info(f"Incremental training failed: {e}")
+                logging.info("Training on the full dataset")
+
             logging.info(f"Loading transformed training dataset")
             transformed_train_file_path = self.data_transformation_artifact.transformed_train_file_path
             train_array = load_numpy_array_data(file_path=transformed_train_file_path)
@@ -56,21 +503,47 @@ class ModelTrainer:
             test_array = load_numpy_array_data(file_path=transformed_test_file_path)
 
             logging.info(f"Splitting training and testing input and target feature")
-            x_train,y_train,x_test,y_test = train_array[:,:-1],train_array[:,-1],test_array[:,:-1],test_array[:,-1]
+            # input features stay views of the feature dtype arrays, the target is scored in float64
+            x_train,x_test = train_array[:,:-1],test_array[:,:-1]
+            y_train,y_test = train_array[:,-1].astype(np.float64),test_array[:,-1].astype(np.float64)
             
 
             logging.info(f"Extracting model config file path")
             model_config_file_path = self.model_trainer_config.model_config_file_path
 
             logging.info(f"Initializing model factory class using above model config file: {model_config_file_path}")
-            model_factory = ModelFactory(model_config_path=model_config_file_path)
+            search_cache = None
+            if self.model_trainer_config.search_cache_dir:
+                logging.info(f"Using search cache: {self.model_trainer_config.search_cache_dir}")
+                search_cache = SearchCache(cache_dir=self.model_trainer_config.search_cache_dir,
+                                           max_entries=self.model_trainer_config.search_cache_max_entries,
+                                           max_size_mb=self.model_trainer_config.search_cache_max_size_mb,
+                                           cache_best_model=self.model_trainer_config.search_cache_best_model)
+            thread_budget = self.model_trainer_config.cpu_thread_budget or os.cpu_count()
+            model_factory = ModelFactory(model_config_path=model_config_file_path, search_cache=search_cache,
+                                         thread_budget=thread_budget)
             
             
             base_accuracy = self.model_trainer_config.base_accuracy
             logging.info(f"Expected accuracy: {base_accuracy}")
 
+            preprocessing_obj=  load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
+            serving_constraint = self.get_serving_constraint()
+            logging.info(f"Serving constraint: {serving_constraint}")
+            model_serving_cost = None
+            if serving_constraint is not None:
+                # every searched model is measured as the CarPriceModel it would be served as, on raw test records
+                compiled_featurizer = self.get_compiled_featurizer(preprocessing_obj=preprocessing_obj,
+                                                                   feature_dtype=str(x_test.dtype))
+                serving_records = self.get_serving_records(n_rows=serving_constraint.latency_sample_rows)
+                model_serving_cost = lambda model_object: ModelTrainer.get_serving_cost(
+                    model_object=model_object, preprocessing_obj=preprocessing_obj, x_test=x_test,
+                    records=serving_records, compiled_featurizer=compiled_featurizer)
+
             logging.info(f"Initiating operation model selecttion")
-            best_model = model_factory.get_best_model(X=x_train,y=y_train,base_accuracy=base_accuracy)
+            best_model = model_factory.get_best_model(X=x_train,y=y_train,base_accuracy=base_accuracy,
+                                                      serving_constraint=serving_constraint,
+                                                      get_serving_cost=model_serving_cost)
             
             logging.info(f"Best model found on training dataset: {best_model}")
             
@@ -79,19 +552,21 @@ class ModelTrainer:
             
             model_list = [model.best_model for model in grid_searched_best_model_list ]
             logging.info(f"Evaluation all trained model on training and testing dataset both")
-            metric_info:MetricInfoArtifact = evaluate_regression_model(model_list=model_list,X_train=x_train,y_train=y_train,X_test=x_test,y_test=y_test,base_accuracy=base_accuracy)
+            # serving costs were measured by the model factory
+            metric_info:MetricInfoArtifact = evaluate_regression_model(model_list=model_list,X_train=x_train,y_train=y_train,X_test=x_test,y_test=y_test,base_accuracy=base_accuracy,
+                                                                       n_jobs=model_factory.evaluation_workers,
+                                                                       serving_constraint=serving_constraint,
+                                                                       serving_costs=[model.serving_cost for model in grid_searched_best_model_list])
 
             logging.info(f"Best found model on both training and testing dataset.")
             
-            preprocessing_obj=  load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
             model_object = metric_info.model_object
 
-
-            trained_model_file_path=self.model_trainer_config.trained_model_file_path
-            carprice_model = CarPriceModel(preprocessing_object=preprocessing_obj,trained_model_object=model_object)
-            logging.info(f"Saving model at path: {trained_model_file_path}")
-            save_object(file_path=trained_model_file_path,obj=carprice_model)
-
+            trained_model_file_path = self.save_carprice_model(preprocessing_obj=preprocessing_obj,
+                                                               model_object=model_object, x_test=x_test)
+            candidate_costs_file_path = self.save_candidate_costs(candidate_costs=model_factory.get_candidate_costs())
+            training_seconds = time.perf_counter() - start_time
+            self.save_training_state(full_training_seconds=training_seconds)
 
             model_trainer_artifact=  ModelTrainerArtifact(is_trained=True,message="Model Trained successfully",
             trained_model_file_path=trained_model_file_path,
@@ -99,8 +574,11 @@ class ModelTrainer:
             test_rmse=metric_info.test_rmse,
             train_accuracy=metric_info.train_accuracy,
             test_accuracy=metric_info.test_accuracy,
-            model_accuracy=metric_info.model_accuracy
-            
+            model_accuracy=metric_info.model_accuracy,
+            is_incremental=False,
+            training_seconds=training_seconds,
+            candidate_costs_file_path=candidate_costs_file_path,
+            **ModelTrainer.get_serving_cost_fields(metric_info)
             )
 
             logging.info(f"Model Trainer Artifact: {model_trainer_artifact}")
@@ -1,8 +1,9 @@
 from carprice.entity.config_entity import DataIngestionConfig, DataTransformationConfig,DataValidationConfig,   \
-ModelTrainerConfig,ModelEvaluationConfig,ModelPusherConfig,TrainingPipelineConfig
+ModelTrainerConfig,ModelEvaluationConfig,ModelPusherConfig,ModelServingConfig,TrainingPipelineConfig
 from carprice.util.util import read_yaml_file
 from carprice.logger import logging
 import sys,os
+import numpy as np
 from carprice.constant import *
 from carprice.exception import CarException
 
@@ -54,13 +55,20 @@ class Configuartion:
                 data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY]
             )
 
+            car_catalog_file_path = os.path.join(
+                data_ingestion_artifact_dir,
+                data_ingestion_info[DATA_INGESTION_CAR_CATALOG_DIR_KEY],
+                data_ingestion_info[DATA_INGESTION_CAR_CATALOG_FILE_NAME_KEY]
+            )
+
             data_ingestion_config=DataIngestionConfig(
                 bucket_name=bucket_name,
                 object_name=object_name,
                 local_file_name=local_file_name,
                 raw_data_dir=raw_data_dir, 
                 ingested_train_dir=ingested_train_dir, 
-                ingested_test_dir=ingested_test_dir
+                ingested_test_dir=ingested_test_dir,
+                car_catalog_file_path=car_catalog_file_path
             )
             logging.info(f"Data Ingestion config: {data_ingestion_config}")
             return data_ingestion_config
@@ -135,12 +143,16 @@ class Configuartion:
             data_transformation_config_info[DATA_TRANSFORMATION_TEST_DIR_NAME_KEY]
 
             )
-            
+
+            feature_dtype = data_transformation_config_info.get(DATA_TRANSFORMATION_FEATURE_DTYPE_KEY, "float64")
+            # fails here on a dtype numpy does not know, not after the data is transformed
+            np.dtype(feature_dtype)
 
             data_transformation_config=DataTransformationConfig(
                 preprocessed_object_file_path=preprocessed_object_file_path,
                 transformed_train_dir=transformed_train_dir,
-                transformed_test_dir=transformed_test_dir
+                transformed_test_dir=transformed_test_dir,
+                feature_dtype=feature_dtype
             )
 
             logging.info(f"Data transformation config: {data_transformation_config}")
@@ -169,10 +181,46 @@ class Configuartion:
 
             base_accuracy = model_trainer_config_info[MODEL_TRAINER_BASE_ACCURACY_KEY]
 
+            # not under the time stamped directory, the cache outlives a single training run
+            search_cache_dir = model_trainer_config_info.get(MODEL_TRAINER_SEARCH_CACHE_DIR_KEY)
+            if search_cache_dir:
+                search_cache_dir = os.path.join(artifact_dir, MODEL_TRAINER_ARTIFACT_DIR, search_cache_dir)
+
+            # the best model of the evaluation report is the one incremental training continues from
+            model_evaluation_file_path = os.path.join(artifact_dir, MODEL_EVALUATION_ARTIFACT_DIR,
+                                                      self.config_info[MODEL_EVALUATION_CONFIG_KEY][
+                                                          MODEL_EVALUATION_FILE_NAME_KEY])
+
             model_trainer_config = ModelTrainerConfig(
                 trained_model_file_path=trained_model_file_path,
                 base_accuracy=base_accuracy,
-                model_config_file_path=model_config_file_path
+                model_config_file_path=model_config_file_path,
+                search_cache_dir=search_cache_dir,
+                search_cache_max_entries=model_trainer_config_info.get(MODEL_TRAINER_SEARCH_CACHE_MAX_ENTRIES_KEY,
+                                                                       20000),
+                search_cache_max_size_mb=model_trainer_config_info.get(MODEL_TRAINER_SEARCH_CACHE_MAX_SIZE_MB_KEY),
+                search_cache_best_model=model_trainer_config_info.get(MODEL_TRAINER_SEARCH_CACHE_BEST_MODEL_KEY,
+                                                                      True),
+                model_evaluation_file_path=model_evaluation_file_path,
+                incremental_training=model_trainer_config_info.get(MODEL_TRAINER_INCREMENTAL_TRAINING_KEY, False),
+                incremental_max_new_rows_fraction=model_trainer_config_info.get(
+                    MODEL_TRAINER_INCREMENTAL_MAX_NEW_ROWS_FRACTION_KEY, 0.2),
+                incremental_n_estimators=model_trainer_config_info.get(MODEL_TRAINER_INCREMENTAL_N_ESTIMATORS_KEY, 10),
+                incremental_learning_rate_scale=model_trainer_config_info.get(
+                    MODEL_TRAINER_INCREMENTAL_LEARNING_RATE_SCALE_KEY, 0.1),
+                incremental_drift_p_value=model_trainer_config_info.get(MODEL_TRAINER_INCREMENTAL_DRIFT_P_VALUE_KEY,
+                                                                        0.01),
+                incremental_max_accuracy_drop=model_trainer_config_info.get(
+                    MODEL_TRAINER_INCREMENTAL_MAX_ACCURACY_DROP_KEY, 0.005),
+                cpu_thread_budget=model_trainer_config_info.get(MODEL_TRAINER_CPU_THREAD_BUDGET_KEY, 0),
+                serving_max_p99_latency_ms=model_trainer_config_info.get(
+                    MODEL_TRAINER_SERVING_MAX_P99_LATENCY_MS_KEY),
+                serving_min_throughput_rows_per_second=model_trainer_config_info.get(
+                    MODEL_TRAINER_SERVING_MIN_THROUGHPUT_KEY),
+                serving_max_artifact_size_mb=model_trainer_config_info.get(
+                    MODEL_TRAINER_SERVING_MAX_ARTIFACT_SIZE_MB_KEY),
+                serving_latency_sample_rows=model_trainer_config_info.get(
+                    MODEL_TRAINER_SERVING_LATENCY_SAMPLE_ROWS_KEY, 200)
             )
             logging.info(f"Model trainer config: {model_trainer_config}")
             return model_trainer_config
@@ -210,6 +258,48 @@ class Configuartion:
         except Exception as e:
             raise CarException(e,sys) from e
 
+    def get_model_serving_config(self) -> ModelServingConfig:
+        try:
+            model_pusher_config_info = self.config_info[MODEL_PUSHER_CONFIG_KEY]
+            data_ingestion_info = self.config_info[DATA_INGESTION_CONFIG_KEY]
+            model_serving_config_info = self.config_info[MODEL_SERVING_CONFIG_KEY]
+            model_dir = os.path.join(ROOT_DIR, model_pusher_config_info[MODEL_PUSHER_MODEL_EXPORT_DIR_KEY])
+
+            # data ingestion artifact folders are time stamped, the catalog of every run matches this pattern
+            car_catalog_file_pattern = os.path.join(
+                self.training_pipeline_config.artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR,
+                "*",
+                data_ingestion_info[DATA_INGESTION_CAR_CATALOG_DIR_KEY],
+                data_ingestion_info[DATA_INGESTION_CAR_CATALOG_FILE_NAME_KEY]
+            )
+            car_catalog_fallback_file_path = os.path.join(ROOT_DIR,
+                model_serving_config_info[MODEL_SERVING_CAR_CATALOG_FALLBACK_FILE_KEY])
+
+            model_serving_config = ModelServingConfig(
+                model_dir=model_dir,
+                model_refresh_interval=model_serving_config_info[MODEL_SERVING_MODEL_REFRESH_INTERVAL_KEY],
+                max_batch_size=model_serving_config_info[MODEL_SERVING_MAX_BATCH_SIZE_KEY],
+                car_catalog_file_pattern=car_catalog_file_pattern,
+                car_catalog_fallback_file_path=car_catalog_fallback_file_path,
+                prediction_cache_size=model_serving_config_info.get(MODEL_SERVING_PREDICTION_CACHE_SIZE_KEY, 0),
+                prediction_cache_ttl=model_serving_config_info.get(MODEL_SERVING_PREDICTION_CACHE_TTL_KEY),
+                preload_model=model_serving_config_info.get(MODEL_SERVING_PRELOAD_MODEL_KEY, False),
+                warm_up_record=model_serving_config_info[MODEL_SERVING_WARM_UP_RECORD_KEY],
+                prediction_batch_window=model_serving_config_info.get(MODEL_SERVING_PREDICTION_BATCH_WINDOW_MS_KEY, 0) / 1000,
+                prediction_batch_max_size=model_serving_config_info.get(MODEL_SERVING_PREDICTION_BATCH_MAX_SIZE_KEY, 64),
+                metrics_dir=os.path.join(ROOT_DIR, model_serving_config_info[MODEL_SERVING_METRICS_DIR_KEY]),
+                model_watcher=model_serving_config_info.get(MODEL_SERVING_MODEL_WATCHER_KEY, False),
+                shadow_promotion_samples=model_serving_config_info.get(MODEL_SERVING_SHADOW_PROMOTION_SAMPLES_KEY, 0),
+                shadow_queue_size=model_serving_config_info.get(MODEL_SERVING_SHADOW_QUEUE_SIZE_KEY, 1000),
+                shadow_stats_window=model_serving_config_info.get(MODEL_SERVING_SHADOW_STATS_WINDOW_KEY, 1000)
+            )
+            logging.info(f"Model serving config {model_serving_config}")
+            return model_serving_config
+
+        except Exception as e:
+            raise CarException(e,sys) from e
+
     def get_training_pipeline_config(self) ->TrainingPipelineConfig:
         try:
             training_pipeline_config = self.config_info[TRAINING_PIPELINE_CONFIG_KEY]
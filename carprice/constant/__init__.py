@@ -36,6 +36,8 @@ DATA_INGESTION_RAW_DATA_DIR_KEY = "raw_data_dir"
 DATA_INGESTION_INGESTED_DIR_NAME_KEY = "ingested_dir"
 DATA_INGESTION_TRAIN_DIR_KEY = "ingested_train_dir"
 DATA_INGESTION_TEST_DIR_KEY = "ingested_test_dir"
+DATA_INGESTION_CAR_CATALOG_DIR_KEY = "car_catalog_dir"
+DATA_INGESTION_CAR_CATALOG_FILE_NAME_KEY = "car_catalog_file_name"
 
 # Data Validation related variable
 
@@ -57,6 +59,7 @@ DATA_TRANSFORMATION_TRAIN_DIR_NAME_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_TEST_DIR_NAME_KEY = "transformed_test_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY = "preprocessed_object_file_name"
+DATA_TRANSFORMATION_FEATURE_DTYPE_KEY = "feature_dtype"
 
 
 DATASET_SCHEMA_COLUMNS_KEY=  "columns"
@@ -79,6 +82,25 @@ MODEL_TRAINER_TRAINED_MODEL_FILE_NAME_KEY = "model_file_name"
 MODEL_TRAINER_BASE_ACCURACY_KEY = "base_accuracy"
 MODEL_TRAINER_MODEL_CONFIG_DIR_KEY = "model_config_dir"
 MODEL_TRAINER_MODEL_CONFIG_FILE_NAME_KEY = "model_config_file_name"
+MODEL_TRAINER_SEARCH_CACHE_DIR_KEY = "search_cache_dir"
+MODEL_TRAINER_SEARCH_CACHE_MAX_ENTRIES_KEY = "search_cache_max_entries"
+MODEL_TRAINER_SEARCH_CACHE_MAX_SIZE_MB_KEY = "search_cache_max_size_mb"
+MODEL_TRAINER_SEARCH_CACHE_BEST_MODEL_KEY = "search_cache_best_model"
+MODEL_TRAINER_INCREMENTAL_TRAINING_KEY = "incremental_training"
+MODEL_TRAINER_INCREMENTAL_MAX_NEW_ROWS_FRACTION_KEY = "incremental_max_new_rows_fraction"
+MODEL_TRAINER_INCREMENTAL_N_ESTIMATORS_KEY = "incremental_n_estimators"
+MODEL_TRAINER_INCREMENTAL_LEARNING_RATE_SCALE_KEY = "incremental_learning_rate_scale"
+MODEL_TRAINER_INCREMENTAL_DRIFT_P_VALUE_KEY = "incremental_drift_p_value"
+MODEL_TRAINER_INCREMENTAL_MAX_ACCURACY_DROP_KEY = "incremental_max_accuracy_drop"
+MODEL_TRAINER_TRAINING_STATE_FILE_NAME = "training_state.npz"
+MODEL_TRAINER_CANDIDATE_COSTS_FILE_NAME = "candidate_costs.csv"
+MODEL_TRAINER_CPU_THREAD_BUDGET_KEY = "cpu_thread_budget"
+MODEL_TRAINER_SERVING_MAX_P99_LATENCY_MS_KEY = "serving_max_p99_latency_ms"
+MODEL_TRAINER_SERVING_MIN_THROUGHPUT_KEY = "serving_min_throughput_rows_per_second"
+MODEL_TRAINER_SERVING_MAX_ARTIFACT_SIZE_MB_KEY = "serving_max_artifact_size_mb"
+MODEL_TRAINER_SERVING_LATENCY_SAMPLE_ROWS_KEY = "serving_latency_sample_rows"
+# memory mappable copy of the model written next to the pickled model file
+MODEL_ARTIFACT_DIR_NAME = "model_artifact"
 
 
 MODEL_EVALUATION_CONFIG_KEY = "model_evaluation_config"
@@ -88,9 +110,27 @@ MODEL_EVALUATION_ARTIFACT_DIR = "model_evaluation"
 MODEL_PUSHER_CONFIG_KEY = "model_pusher_config"
 MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
 
+# Model serving config key
+MODEL_SERVING_CONFIG_KEY = "model_serving_config"
+MODEL_SERVING_MODEL_REFRESH_INTERVAL_KEY = "model_refresh_interval"
+MODEL_SERVING_MODEL_WATCHER_KEY = "model_watcher"
+MODEL_SERVING_SHADOW_PROMOTION_SAMPLES_KEY = "shadow_promotion_samples"
+MODEL_SERVING_SHADOW_QUEUE_SIZE_KEY = "shadow_queue_size"
+MODEL_SERVING_SHADOW_STATS_WINDOW_KEY = "shadow_stats_window"
+MODEL_SERVING_MAX_BATCH_SIZE_KEY = "max_batch_size"
+MODEL_SERVING_CAR_CATALOG_FALLBACK_FILE_KEY = "car_catalog_fallback_file"
+MODEL_SERVING_PREDICTION_CACHE_SIZE_KEY = "prediction_cache_size"
+MODEL_SERVING_PREDICTION_CACHE_TTL_KEY = "prediction_cache_ttl"
+MODEL_SERVING_PRELOAD_MODEL_KEY = "preload_model"
+MODEL_SERVING_PREDICTION_BATCH_WINDOW_MS_KEY = "prediction_batch_window_ms"
+MODEL_SERVING_PREDICTION_BATCH_MAX_SIZE_KEY = "prediction_batch_max_size"
+MODEL_SERVING_METRICS_DIR_KEY = "metrics_dir"
+MODEL_SERVING_WARM_UP_RECORD_KEY = "warm_up_record"
+
 BEST_MODEL_KEY = "best_model"
 HISTORY_KEY = "history"
 MODEL_PATH_KEY = "model_path"
 
 EXPERIMENT_DIR_NAME="experiment"
-EXPERIMENT_FILE_NAME="experiment.csv"
\ No newline at end of file
+EXPERIMENT_FILE_NAME="experiment.csv"
+EXPERIMENT_CANDIDATE_COSTS_FILE_NAME="candidate_costs.csv"
\ No newline at end of file
@@ -3,7 +3,7 @@ from collections import namedtuple
 
 
 DataIngestionArtifact = namedtuple("DataIngestionArtifact",
-[ "train_file_path", "test_file_path", "is_ingested", "message"])
+[ "train_file_path", "test_file_path", "car_catalog_file_path", "is_ingested", "message"])
 
 
 DataValidationArtifact = namedtuple("DataValidationArtifact",
@@ -12,11 +12,15 @@ DataValidationArtifact = namedtuple("DataValidationArtifact",
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact",
  ["is_transformed", "message", "transformed_train_file_path","transformed_test_file_path",
-     "preprocessed_object_file_path"])
+     "preprocessed_object_file_path", "feature_dtype"], defaults=["float64"])
 
 ModelTrainerArtifact = namedtuple("ModelTrainerArtifact", ["is_trained", "message", "trained_model_file_path",
                                                            "train_rmse", "test_rmse", "train_accuracy", "test_accuracy",
-                                                           "model_accuracy"])
+                                                           "model_accuracy", "is_incremental", "training_seconds",
+                                                           "saved_seconds", "candidate_costs_file_path",
+                                                           "p99_latency_ms", "throughput_rows_per_second",
+                                                           "artifact_size_mb"],
+                                  defaults=[False, None, None, None, None, None, None])
 
 ModelEvaluationArtifact = namedtuple("ModelEvaluationArtifact", ["is_model_accepted", "evaluated_model_path"])
 
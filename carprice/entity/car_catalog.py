@@ -0,0 +1,110 @@
+import glob
+import json
+import os
+import sys
+from bisect import bisect_left
+
+import pandas as pd
+
+from carprice.exception import CarException
+from carprice.logger import logging
+
+CAR_NAME_COLUMN = "car_name"
+CAR_CATALOG_MEDIAN_COLUMNS = ["mileage", "engine", "max_power"]
+CAR_CATALOG_MODE_COLUMNS = ["seats", "fuel_type", "transmission_type"]
+
+
+class CarCatalog:
+    """
+    Compact in-memory index of known car names and their typical specification.
+    car_defaults: {car_name: {"mileage": .., "engine": .., "max_power": .., "seats": .., ...}}
+    Names are kept sorted (case insensitive) so prefix lookups are a bisect plus a short scan.
+    """
+
+    def __init__(self, car_defaults: dict):
+        try:
+            self.car_defaults = car_defaults
+            self._sorted_keys = sorted((car_name.lower(), car_name) for car_name in car_defaults)
+            self._lower_car_names = [lower_car_name for lower_car_name, _ in self._sorted_keys]
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame):
+        """
+        Builds the catalog from a car dataframe: median of the numeric specification
+        and most frequent value of seats, fuel and transmission for every car_name.
+        """
+        try:
+            grouped = dataframe.groupby(CAR_NAME_COLUMN)
+            medians = grouped[CAR_CATALOG_MEDIAN_COLUMNS].median().round(1)
+            modes = grouped[CAR_CATALOG_MODE_COLUMNS].agg(lambda column: column.mode().iloc[0])
+            catalog_df = medians.join(modes)
+            car_defaults = {str(car_name): {column: (value.item() if hasattr(value, "item") else value)
+                                            for column, value in row.items()}
+                            for car_name, row in catalog_df.iterrows()}
+            return cls(car_defaults=car_defaults)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def load(cls, file_path: str):
+        try:
+            with open(file_path, "r") as catalog_file:
+                return cls(car_defaults=json.load(catalog_file))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def load_latest(cls, file_pattern: str, fallback_data_file_path: str):
+        """
+        Loads the most recent catalog matching file_pattern (artifact folders are
+        time stamped so the last one in sorted order is the latest). When no pipeline
+        has run yet fallback_data_file_path is loaded, a catalog json or a car csv.
+        """
+        try:
+            catalog_file_paths = sorted(glob.glob(file_pattern))
+            if len(catalog_file_paths) > 0:
+                logging.info(f"Loading car catalog: [{catalog_file_paths[-1]}]")
+                return cls.load(file_path=catalog_file_paths[-1])
+            logging.info(f"No car catalog artifact found, loading it from: [{fallback_data_file_path}]")
+            if fallback_data_file_path.endswith(".json"):
+                return cls.load(file_path=fallback_data_file_path)
+            return cls.from_dataframe(pd.read_csv(fallback_data_file_path))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def save(self, file_path: str):
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as catalog_file:
+                json.dump(self.car_defaults, catalog_file, separators=(",", ":"))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_car_names(self) -> list:
+        return [car_name for _, car_name in self._sorted_keys]
+
+    def get_car_defaults(self, car_name: str) -> dict:
+        return self.car_defaults.get(car_name)
+
+    def search(self, prefix: str = "", limit: int = 20) -> list:
+        """
+        Returns up to limit car names starting with prefix (case insensitive) in sorted order.
+        """
+        try:
+            prefix = prefix.lower()
+            car_names = []
+            index = bisect_left(self._lower_car_names, prefix)
+            while index < len(self._sorted_keys) and len(car_names) < limit:
+                lower_car_name, car_name = self._sorted_keys[index]
+                if not lower_car_name.startswith(prefix):
+                    break
+                car_names.append(car_name)
+                index += 1
+            return car_names
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def __len__(self):
+        return len(self.car_defaults)
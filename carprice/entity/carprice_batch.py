@@ -0,0 +1,198 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from carprice.exception import CarException
+
+CARPRICE_INPUT_COLUMNS = ["car_name", "vehicle_age", "km_driven", "seller_type", "fuel_type",
+                          "transmission_type", "mileage", "engine", "max_power", "seats"]
+CARPRICE_NUMERICAL_INPUT_COLUMNS = ["vehicle_age", "km_driven", "mileage", "engine", "max_power", "seats"]
+CARPRICE_CATEGORICAL_INPUT_COLUMNS = ["car_name", "seller_type", "fuel_type", "transmission_type"]
+
+CATEGORY_CODE_DTYPE = np.int32
+# missing categorical values get this code
+MISSING_CATEGORY_CODE = -1
+DEFAULT_BATCH_CAPACITY = 64
+
+
+class CarPriceBatch:
+    """
+    Column oriented batch of cars.
+    Numerical columns are float64 arrays, the dtype the preprocessor scales in.
+    Categorical columns are int32 codes into per column category lists, so a batch
+    of thousands of cars holds each car name once. Rows are bulk appended into
+    preallocated arrays that grow by doubling, or whole column arrays are copied in
+    with one vectorized assignment per column.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BATCH_CAPACITY, categories: dict = None):
+        """
+        capacity: number of rows to preallocate
+        categories: optional {column: [category, ...]} to start the code tables with,
+                    for example the categories the model was trained on
+        """
+        try:
+            self.size = 0
+            self.capacity = max(int(capacity), 1)
+            self.categories = {column: [] for column in CARPRICE_CATEGORICAL_INPUT_COLUMNS}
+            self._category_codes = {column: {} for column in CARPRICE_CATEGORICAL_INPUT_COLUMNS}
+            for column, column_categories in (categories or {}).items():
+                for category in column_categories:
+                    self._get_category_code(column, category)
+            self._columns = {column: np.empty(self.capacity, dtype=np.float64)
+                             for column in CARPRICE_NUMERICAL_INPUT_COLUMNS}
+            self._columns.update({column: np.empty(self.capacity, dtype=CATEGORY_CODE_DTYPE)
+                                  for column in CARPRICE_CATEGORICAL_INPUT_COLUMNS})
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _get_category_code(self, column: str, category) -> int:
+        category_codes = self._category_codes[column]
+        code = category_codes.get(category)
+        if code is None:
+            code = len(self.categories[column])
+            category_codes[category] = code
+            self.categories[column].append(category)
+        return code
+
+    def _encode(self, column: str, values) -> np.ndarray:
+        # factorize hashes the values once in C, only the distinct values go through the code table
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+        if len(uniques) == 0:
+            return np.full(len(codes), MISSING_CATEGORY_CODE, dtype=CATEGORY_CODE_DTYPE)
+        code_map = np.array([self._get_category_code(column, category) for category in uniques] +
+                            [MISSING_CATEGORY_CODE], dtype=CATEGORY_CODE_DTYPE)
+        return code_map[codes]
+
+    def _reserve(self, n_rows: int):
+        required = self.size + n_rows
+        if required <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        for column, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self._columns[column] = grown
+        self.capacity = capacity
+
+    def extend_columns(self, columns: dict):
+        """
+        Appends rows given column wise: {column: array like of values}.
+        """
+        try:
+            missing_columns = [column for column in CARPRICE_INPUT_COLUMNS if column not in columns]
+            if len(missing_columns) > 0:
+                raise Exception(f"Columns: {missing_columns} are missing in the batch")
+            n_rows = len(columns[CARPRICE_INPUT_COLUMNS[0]])
+            if any(len(columns[column]) != n_rows for column in CARPRICE_INPUT_COLUMNS):
+                raise Exception("All columns of the batch must have the same length")
+            encoded = {column: self._encode(column, columns[column]) for column in CARPRICE_CATEGORICAL_INPUT_COLUMNS}
+            for column in CARPRICE_NUMERICAL_INPUT_COLUMNS:
+                try:
+                    encoded[column] = np.asarray(columns[column], dtype=np.float64)
+                except (TypeError, ValueError):
+                    # to_numeric reports which value could not be parsed
+                    encoded[column] = pd.to_numeric(pd.Series(columns[column], dtype=object)).to_numpy()
+            self._reserve(n_rows)
+            for column, values in encoded.items():
+                self._columns[column][self.size:self.size + n_rows] = values
+            self.size += n_rows
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def extend(self, rows):
+        """
+        Appends rows given as tuples of values in CARPRICE_INPUT_COLUMNS order.
+        """
+        try:
+            rows = list(rows)
+            if len(rows) == 0:
+                return
+            if any(len(row) != len(CARPRICE_INPUT_COLUMNS) for row in rows):
+                raise Exception(f"Every row must have {len(CARPRICE_INPUT_COLUMNS)} values")
+            self.extend_columns(dict(zip(CARPRICE_INPUT_COLUMNS, zip(*rows))))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def append(self, row: tuple):
+        self.extend([row])
+
+    @classmethod
+    def from_columns(cls, columns: dict, categories: dict = None):
+        """
+        Wraps column arrays, float64 numerical arrays are copied once into the batch without conversion.
+        """
+        try:
+            batch = cls(capacity=max((len(values) for values in columns.values()), default=1), categories=categories)
+            batch.extend_columns(columns)
+            return batch
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_data_frame(cls, dataframe: pd.DataFrame, categories: dict = None):
+        try:
+            return cls.from_columns({column: dataframe[column].to_numpy() for column in CARPRICE_INPUT_COLUMNS
+                                     if column in dataframe.columns}, categories=categories)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_records(cls, records: list, categories: dict = None):
+        """
+        records: list of dicts with the CARPRICE_INPUT_COLUMNS keys
+        """
+        try:
+            if not all(isinstance(record, dict) for record in records):
+                raise Exception("Every record in the batch must be a JSON object")
+            missing_columns = sorted({column for record in records for column in CARPRICE_INPUT_COLUMNS
+                                      if column not in record})
+            if len(missing_columns) > 0:
+                raise Exception(f"Columns: {missing_columns} are missing in the batch")
+            batch = cls(capacity=len(records), categories=categories)
+            batch.extend([tuple(record[column] for column in CARPRICE_INPUT_COLUMNS) for record in records])
+            return batch
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_car_data(cls, car_data_list: list, categories: dict = None):
+        """
+        car_data_list: list of CarPriceData
+        """
+        try:
+            batch = cls(capacity=len(car_data_list), categories=categories)
+            batch.extend([car_data.get_car_data_as_row() for car_data in car_data_list])
+            return batch
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_column(self, column: str) -> np.ndarray:
+        """
+        return: float64 values of a numerical column or int32 codes of a categorical column
+        """
+        return self._columns[column][:self.size]
+
+    def get_category_values(self, column: str) -> np.ndarray:
+        """
+        return: decoded values of a categorical column, missing values as nan
+        """
+        lookup = np.array(self.categories[column] + [np.nan], dtype=object)
+        return lookup[self.get_column(column)]
+
+    def to_data_frame(self) -> pd.DataFrame:
+        """
+        return: DataFrame with CARPRICE_INPUT_COLUMNS, for the pandas based preprocessing object
+        """
+        try:
+            return pd.DataFrame({column: (self.get_category_values(column)
+                                          if column in self._category_codes else self.get_column(column))
+                                 for column in CARPRICE_INPUT_COLUMNS})
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def __len__(self):
+        return self.size
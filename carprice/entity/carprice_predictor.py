@@ -1,12 +1,30 @@
 import os
 import sys
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import Future
 
 from carprice.exception import CarException
-from carprice.util.util import load_object
+from carprice.logger import logging
+from carprice.entity.serving_metrics import ServingMetrics, STAGE_MODEL_LOOKUP, STAGE_CACHE_LOOKUP, \
+    STAGE_PREPROCESSING, STAGE_MODEL_PREDICT, STAGE_COALESCED_PREDICT, STAGE_MODEL_LOAD, \
+    MODEL_RELOAD_SUCCESS, MODEL_RELOAD_FAILURE
+from carprice.entity.model_artifact import load_carprice_model
+from carprice.entity.shadow_scorer import ShadowScorer
+from carprice.entity.carprice_batch import CarPriceBatch, CARPRICE_INPUT_COLUMNS, CARPRICE_NUMERICAL_INPUT_COLUMNS
+from carprice.constant import MODEL_ARTIFACT_DIR_NAME
+import numpy as np
 import pandas as pd
 
 
+DEFAULT_MODEL_REFRESH_INTERVAL = 30
+
+LoadedCarPriceModel = namedtuple("LoadedCarPriceModel", ["model_version", "model_path", "model"])
+
+
 class CarPriceData:
+    __slots__ = CARPRICE_INPUT_COLUMNS + ["selling_price"]
 
     def __init__(self,
                 car_name: str,
@@ -39,11 +57,41 @@ class CarPriceData:
     def get_carprice_input_data_frame(self):
 
         try:
-            carprice_input_dict = self.get_car_data_as_dict()
+            carprice_input_dict = self.get_car_data_as_columns()
             return pd.DataFrame(carprice_input_dict)
         except Exception as e:
             raise CarException(e, sys) from e
 
+    def get_car_data_as_record(self) -> dict:
+        try:
+            return {column: getattr(self, column) for column in CARPRICE_INPUT_COLUMNS}
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_car_data_as_row(self) -> tuple:
+        """
+        return: values in CARPRICE_INPUT_COLUMNS order, the row format CarPriceBatch appends
+        """
+        return (self.car_name, self.vehicle_age, self.km_driven, self.seller_type, self.fuel_type,
+                self.transmission_type, self.mileage, self.engine, self.max_power, self.seats)
+
+    def get_car_data_as_batch(self) -> CarPriceBatch:
+        try:
+            batch = CarPriceBatch(capacity=1)
+            batch.append(self.get_car_data_as_row())
+            return batch
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_car_data_as_columns(self) -> dict:
+        """
+        return: column oriented dict of one element lists, the format get_carprice_batch accepts
+        """
+        try:
+            return {column: [getattr(self, column)] for column in CARPRICE_INPUT_COLUMNS}
+        except Exception as e:
+            raise CarException(e, sys) from e
+
     def get_car_data_as_dict(self):
         try:
             input_data = {
@@ -64,29 +112,576 @@ class CarPriceData:
             raise CarException(e, sys)
 
 
+def get_carprice_batch(car_data, max_batch_size: int = None) -> CarPriceBatch:
+    """
+    Builds a single CarPriceBatch for a batch of cars.
+    car_data: list of records [{"car_name": ..., "vehicle_age": ...}, ...]
+              or a column oriented dict {"car_name": [...], "vehicle_age": [...], ...}
+    max_batch_size: maximum number of cars accepted in one batch
+    return: CarPriceBatch in input order
+    """
+    try:
+        if isinstance(car_data, list):
+            batch_size = len(car_data)
+        elif isinstance(car_data, dict):
+            batch_size = max((len(values) for values in car_data.values() if isinstance(values, list)), default=0)
+        else:
+            raise Exception("Batch must be a list of records or a column oriented object")
+
+        if batch_size == 0:
+            raise Exception("Batch is empty")
+        if max_batch_size is not None and batch_size > max_batch_size:
+            raise Exception(f"Batch size [{batch_size}] exceeds max batch size [{max_batch_size}]")
+
+        if isinstance(car_data, list):
+            return CarPriceBatch.from_records(car_data)
+        return CarPriceBatch.from_columns(car_data)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def get_prediction_cache_key(record: dict, model_version: int) -> tuple:
+    """
+    Normalized cache key of a single car: strings are stripped and numbers are
+    compared as float, which is what the preprocessor sees, so 5 and 5.0 share an entry.
+    """
+    try:
+        return (model_version,) + tuple(float(record[column]) if column in CARPRICE_NUMERICAL_INPUT_COLUMNS
+                                        else str(record[column]).strip()
+                                        for column in CARPRICE_INPUT_COLUMNS)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+class PredictionCache:
+    """
+    Thread safe bounded LRU cache of single car predictions with an optional ttl in seconds.
+    hits, misses, evictions (capacity) and expirations (ttl) are counted to size the cache.
+    """
+
+    def __init__(self, capacity: int, ttl: float = None):
+        try:
+            self.capacity = capacity
+            self.ttl = ttl
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expire_time, value = entry
+            if expire_time is not None and time.monotonic() > expire_time:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            expire_time = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[key] = (expire_time, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"capacity": self.capacity,
+                    "size": len(self._entries),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "expirations": self.expirations}
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single car predictions into one vectorized predict call.
+    The first waiting request becomes the leader: it collects pending requests for
+    up to window seconds or max_batch_size rows, scores them together and hands every
+    caller its own prediction. Requests are scored by the model version they were queued
+    with, a batch spanning a model reload is split into one predict call per version.
+    There is no background thread, so it is safe to create before gunicorn forks.
+    It only helps when a worker serves requests on several threads.
+    """
+
+    def __init__(self, window: float, max_batch_size: int):
+        try:
+            self.window = window
+            self.max_batch_size = max_batch_size
+            self._condition = threading.Condition()
+            self._pending = []
+            self._leader_active = False
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _collect_batch(self) -> list:
+        # called by the leader while holding self._condition
+        deadline = time.monotonic() + self.window
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        return batch
+
+    def _score_batch(self, batch: list):
+        version_batches = OrderedDict()
+        for predict_batch, model_version, record, future in batch:
+            version_batches.setdefault(model_version, (predict_batch, []))[1].append((record, future))
+        try:
+            for predict_batch, version_batch in version_batches.values():
+                try:
+                    predictions = predict_batch([record for record, _ in version_batch])
+                    for index, (_, future) in enumerate(version_batch):
+                        future.set_result(predictions[index:index + 1])
+                except Exception as e:
+                    for _, future in version_batch:
+                        future.set_exception(e)
+        finally:
+            with self._condition:
+                self._leader_active = False
+                self._condition.notify_all()
+
+    def predict(self, predict_batch, record: dict, model_version=None):
+        """
+        predict_batch: function scoring a list of records, e.g. CarPriceModel.predict_records
+        record: single car record
+        model_version: version of the model predict_batch belongs to, records of a version are scored together
+        return: prediction array of shape (1,)
+        """
+        try:
+            future = Future()
+            with self._condition:
+                self._pending.append((predict_batch, model_version, record, future))
+                if len(self._pending) >= self.max_batch_size:
+                    self._condition.notify_all()
+            while True:
+                with self._condition:
+                    while not future.done() and self._leader_active:
+                        self._condition.wait()
+                    if future.done():
+                        break
+                    self._leader_active = True
+                    batch = self._collect_batch()
+                self._score_batch(batch)
+            return future.result()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+
+class CarPriceModelRegistry:
+    """
+    Process wide holder of the latest model found in model_dir.
+    The model is loaded once and kept in memory. At most every refresh_interval seconds
+    the mtime of model_dir is checked and, if a newer <timestamp> folder was pushed,
+    the new model is loaded and swapped in as a single LoadedCarPriceModel reference.
+    With start_watcher the check runs on a background thread instead of the request path,
+    and a new model is only swapped in after a smoke prediction on the golden record.
+    Requests that already hold the old reference finish on the old model.
+    With shadow_promotion_samples > 0 the watcher first shadow scores the new model on that
+    many live requests and promotes it afterwards.
+    """
+    _registry_map = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, model_dir: str, refresh_interval: float = DEFAULT_MODEL_REFRESH_INTERVAL,
+                 prediction_cache_size: int = 0, prediction_cache_ttl: float = None,
+                 prediction_batch_window: float = 0, prediction_batch_max_size: int = 64,
+                 serving_metrics: ServingMetrics = None, shadow_promotion_samples: int = 0,
+                 shadow_queue_size: int = 1000, shadow_stats_window: int = 1000):
+        try:
+            self.model_dir = model_dir
+            self.serving_metrics = serving_metrics
+            self.refresh_interval = refresh_interval
+            self.loaded_model = None
+            self.warmed_up_model_version = None
+            self.prediction_cache = None
+            if prediction_cache_size > 0:
+                self.prediction_cache = PredictionCache(capacity=prediction_cache_size, ttl=prediction_cache_ttl)
+            self.prediction_batcher = None
+            if prediction_batch_window > 0:
+                self.prediction_batcher = PredictionBatcher(window=prediction_batch_window,
+                                                            max_batch_size=prediction_batch_max_size)
+            self.shadow_promotion_samples = shadow_promotion_samples
+            self.shadow_scorer = None
+            if shadow_promotion_samples > 0:
+                self.shadow_scorer = ShadowScorer(queue_size=shadow_queue_size, window=shadow_stats_window)
+            self.golden_record = None
+            self.reload_count = 0
+            self.reload_failure_count = 0
+            self._load_lock = threading.Lock()
+            self._model_dir_mtime = None
+            self._next_check_time = 0.0
+            self._watcher_pid = None
+            self._watcher_stop = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def get_registry(cls, model_dir: str, refresh_interval: float = DEFAULT_MODEL_REFRESH_INTERVAL,
+                     prediction_cache_size: int = 0, prediction_cache_ttl: float = None,
+                     prediction_batch_window: float = 0, prediction_batch_max_size: int = 64,
+                     serving_metrics: ServingMetrics = None, shadow_promotion_samples: int = 0,
+                     shadow_queue_size: int = 1000, shadow_stats_window: int = 1000):
+        try:
+            model_dir = os.path.abspath(model_dir)
+            with cls._registry_lock:
+                registry = cls._registry_map.get(model_dir)
+                if registry is None:
+                    registry = cls(model_dir=model_dir, refresh_interval=refresh_interval,
+                                   prediction_cache_size=prediction_cache_size,
+                                   prediction_cache_ttl=prediction_cache_ttl,
+                                   prediction_batch_window=prediction_batch_window,
+                                   prediction_batch_max_size=prediction_batch_max_size,
+                                   serving_metrics=serving_metrics,
+                                   shadow_promotion_samples=shadow_promotion_samples,
+                                   shadow_queue_size=shadow_queue_size,
+                                   shadow_stats_window=shadow_stats_window)
+                    cls._registry_map[model_dir] = registry
+                return registry
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_latest_model_version(self) -> int:
+        try:
+            return max(map(int, os.listdir(self.model_dir)))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_model_path(self, model_version: int) -> str:
+        try:
+            model_version_dir = os.path.join(self.model_dir, f"{model_version}")
+            file_names = os.listdir(model_version_dir)
+            # the memory mapped artifact loads faster than the pickled model file next to it
+            if MODEL_ARTIFACT_DIR_NAME in file_names:
+                return os.path.join(model_version_dir, MODEL_ARTIFACT_DIR_NAME)
+            file_name = [file_name for file_name in file_names
+                         if os.path.isfile(os.path.join(model_version_dir, file_name))][0]
+            return os.path.join(model_version_dir, file_name)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _load_model(self, model_version: int) -> LoadedCarPriceModel:
+        """
+        Loads model_version and, when a golden record is set, checks that it predicts a finite price for it.
+        """
+        start_time = time.perf_counter()
+        model_path = self.get_model_path(model_version=model_version)
+        try:
+            model = load_carprice_model(model_path=model_path)
+            if self.golden_record is not None:
+                prediction = np.asarray(model.predict(dict(self.golden_record)), dtype=np.float64)
+                if prediction.shape != (1,) or not np.isfinite(prediction).all():
+                    raise Exception(f"Smoke prediction on the golden record returned [{prediction}]")
+        except Exception as e:
+            self.reload_failure_count += 1
+            if self.serving_metrics is not None:
+                self.serving_metrics.count_model_reload(MODEL_RELOAD_FAILURE)
+            raise e
+        load_time = time.perf_counter() - start_time
+        self.reload_count += 1
+        if self.serving_metrics is not None:
+            self.serving_metrics.count_model_reload(MODEL_RELOAD_SUCCESS)
+            self.serving_metrics.observe(STAGE_MODEL_LOAD, load_time)
+        logging.info(f"Loaded model: [{model_path}] in [{load_time:.3f}] seconds")
+        return LoadedCarPriceModel(model_version=model_version, model_path=model_path, model=model)
+
+    def _refresh(self) -> LoadedCarPriceModel:
+        loaded_model = self.loaded_model
+        model_dir_mtime = os.stat(self.model_dir).st_mtime_ns
+        if loaded_model is not None and model_dir_mtime == self._model_dir_mtime:
+            return loaded_model
+
+        model_version = self.get_latest_model_version()
+        shadow_scorer = self.shadow_scorer
+        if loaded_model is not None and loaded_model.model_version != model_version and \
+                shadow_scorer is not None and self._watcher_pid == os.getpid():
+            candidate_model = shadow_scorer.candidate_model
+            if candidate_model is None or candidate_model.model_version != model_version:
+                shadow_scorer.set_candidate(self._load_model(model_version=model_version))
+        elif loaded_model is None or loaded_model.model_version != model_version:
+            loaded_model = self._load_model(model_version=model_version)
+            if self.golden_record is not None:
+                # the smoke prediction already ran the model once
+                self.warmed_up_model_version = model_version
+            self.loaded_model = loaded_model
+            if self.prediction_cache is not None:
+                self.prediction_cache.clear()
+        self._model_dir_mtime = model_dir_mtime
+        return loaded_model
+
+    def get_model(self) -> LoadedCarPriceModel:
+        """
+        Returns the in-memory model. Without a watcher, model_dir is checked for a newer
+        version on the request path when the refresh interval has elapsed.
+        """
+        try:
+            loaded_model = self.loaded_model
+            if loaded_model is not None and (self._watcher_pid == os.getpid() or
+                                             time.monotonic() < self._next_check_time):
+                return loaded_model
+
+            with self._load_lock:
+                loaded_model = self.loaded_model
+                now = time.monotonic()
+                if loaded_model is not None and now < self._next_check_time:
+                    return loaded_model
+                self._next_check_time = now + self.refresh_interval
+                try:
+                    return self._refresh()
+                except Exception as e:
+                    if loaded_model is None:
+                        raise e
+                    logging.exception(f"Model refresh failed, serving model version: [{loaded_model.model_version}]")
+                    return loaded_model
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _promote_candidate(self):
+        shadow_scorer = self.shadow_scorer
+        candidate_model = shadow_scorer.candidate_model
+        if candidate_model is None or shadow_scorer.get_candidate_samples() < self.shadow_promotion_samples:
+            return
+        self.warmed_up_model_version = candidate_model.model_version
+        self.loaded_model = candidate_model
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
+        shadow_scorer.promote_candidate()
+        logging.info(f"Promoted model version: [{candidate_model.model_version}] after "
+                     f"[{self.shadow_promotion_samples}] shadow predictions")
+
+    def _watch(self, stop_event: threading.Event):
+        while not stop_event.wait(self.refresh_interval):
+            with self._load_lock:
+                loaded_model = self.loaded_model
+                try:
+                    self._refresh()
+                    if self.shadow_scorer is not None:
+                        self._promote_candidate()
+                except Exception:
+                    # the mtime is not recorded on failure, so the next poll tries again
+                    model_version = None if loaded_model is None else loaded_model.model_version
+                    logging.exception(f"Model reload failed, serving model version: [{model_version}]")
+
+    def start_watcher(self, golden_record: dict = None):
+        """
+        Starts the background thread that polls model_dir every refresh_interval seconds.
+        Threads do not survive fork, so every gunicorn worker starts its own from gunicorn.conf.py;
+        calling this again in the same process does nothing.
+        golden_record: input every new model must predict a finite price for before it is swapped in
+        """
+        try:
+            if self._watcher_pid == os.getpid():
+                return
+            with self._load_lock:
+                if self._watcher_pid == os.getpid():
+                    return
+                self.golden_record = golden_record
+                if self.shadow_scorer is not None:
+                    self.shadow_scorer.start()
+                self._watcher_stop = threading.Event()
+                watcher = threading.Thread(target=self._watch, args=(self._watcher_stop,),
+                                           name="carprice-model-watcher", daemon=True)
+                watcher.start()
+                self._watcher_pid = os.getpid()
+            logging.info(f"Started model watcher on [{self.model_dir}] every [{self.refresh_interval}] seconds")
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def stop_watcher(self):
+        try:
+            if self._watcher_stop is not None:
+                self._watcher_stop.set()
+            self._watcher_pid = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_shadow_stats(self) -> dict:
+        try:
+            if self.shadow_scorer is None:
+                return {"shadow_promotion_samples": 0}
+            return {"shadow_promotion_samples": self.shadow_promotion_samples, **self.shadow_scorer.get_stats()}
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_reload_stats(self) -> dict:
+        loaded_model = self.loaded_model
+        return {"model_version": None if loaded_model is None else loaded_model.model_version,
+                "reload_count": self.reload_count,
+                "reload_failure_count": self.reload_failure_count,
+                "watcher": self._watcher_pid == os.getpid()}
+
+    def warm_up(self, record: dict) -> LoadedCarPriceModel:
+        """
+        Loads the model if needed and runs one prediction on record so the first
+        real request does not pay for lazy initialisation inside the model.
+        """
+        try:
+            loaded_model = self.get_model()
+            if self.warmed_up_model_version != loaded_model.model_version:
+                start_time = time.perf_counter()
+                loaded_model.model.predict(dict(record))
+                self.warmed_up_model_version = loaded_model.model_version
+                logging.info(f"Warmed up model version: [{loaded_model.model_version}] "
+                             f"in [{time.perf_counter() - start_time:.3f}] seconds")
+            return loaded_model
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def is_ready(self) -> bool:
+        loaded_model = self.loaded_model
+        return loaded_model is not None and self.warmed_up_model_version == loaded_model.model_version
+
+    def get_prediction_cache_stats(self) -> dict:
+        try:
+            if self.prediction_cache is None:
+                return {"capacity": 0}
+            return self.prediction_cache.get_stats()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def invalidate(self):
+        """
+        Forces the next get_model call to check model_dir for a newer version.
+        """
+        try:
+            self._next_check_time = 0.0
+            self._model_dir_mtime = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+
 class CarPricePredictor:
 
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, refresh_interval: float = DEFAULT_MODEL_REFRESH_INTERVAL,
+                 prediction_cache_size: int = 0, prediction_cache_ttl: float = None,
+                 prediction_batch_window: float = 0, prediction_batch_max_size: int = 64,
+                 serving_metrics: ServingMetrics = None, shadow_promotion_samples: int = 0,
+                 shadow_queue_size: int = 1000, shadow_stats_window: int = 1000):
+        """
+        model_dir: folder with one <timestamp> folder per pushed model
+        refresh_interval: seconds between checks for a newer model
+        prediction_cache_size: number of single car predictions to memoize, 0 disables the cache
+        prediction_cache_ttl: optional lifetime of a memoized prediction in seconds
+        prediction_batch_window: seconds to coalesce concurrent single car predictions, 0 disables batching
+        prediction_batch_max_size: maximum number of cars scored in one coalesced batch
+        serving_metrics: optional stage latency recorder
+        shadow_promotion_samples: live requests a new model is shadow scored on before the watcher
+                                  promotes it, 0 swaps new models in directly
+        shadow_queue_size: requests waiting for shadow scoring before new ones are dropped
+        shadow_stats_window: number of latest shadow scored requests the rolling stats cover
+        """
         try:
             self.model_dir = model_dir
+            self.serving_metrics = serving_metrics
+            self.model_registry = CarPriceModelRegistry.get_registry(model_dir=model_dir,
+                                                                     refresh_interval=refresh_interval,
+                                                                     prediction_cache_size=prediction_cache_size,
+                                                                     prediction_cache_ttl=prediction_cache_ttl,
+                                                                     prediction_batch_window=prediction_batch_window,
+                                                                     prediction_batch_max_size=prediction_batch_max_size,
+                                                                     serving_metrics=serving_metrics,
+                                                                     shadow_promotion_samples=shadow_promotion_samples,
+                                                                     shadow_queue_size=shadow_queue_size,
+                                                                     shadow_stats_window=shadow_stats_window)
         except Exception as e:
             raise CarException(e, sys) from e
 
     def get_latest_model_path(self):
         try:
-            folder_name = list(map(int, os.listdir(self.model_dir)))
-            latest_model_dir = os.path.join(self.model_dir, f"{max(folder_name)}")
-            file_name = os.listdir(latest_model_dir)[0]
-            latest_model_path = os.path.join(latest_model_dir, file_name)
-            return latest_model_path
+            return self.model_registry.get_model().model_path
         except Exception as e:
             raise CarException(e, sys) from e
 
+    def get_unknown_categories(self, carprice_batch: CarPriceBatch) -> dict:
+        """
+        return: {column: [category, ...]} of the batch categories the serving model was not trained on
+                and can not encode, empty when the model has no compiled featurizer to check against
+        """
+        try:
+            compiled_featurizer = getattr(self.model_registry.get_model().model, "compiled_featurizer", None)
+            if compiled_featurizer is None:
+                return {}
+            return compiled_featurizer.get_unknown_categories(carprice_batch)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _submit_shadow(self, record: dict, loaded_model: LoadedCarPriceModel, selling_price_pred,
+                       serving_latency: float):
+        shadow_scorer = self.model_registry.shadow_scorer
+        if shadow_scorer is not None:
+            shadow_scorer.submit(record=record, serving_model_version=loaded_model.model_version,
+                                 serving_prediction=float(selling_price_pred[0]), serving_latency=serving_latency)
+
     def predict(self, X):
+        """
+        X: DataFrame or CarPriceBatch of cars, or a single car record dict.
+        Single records are served from the prediction cache when it is enabled,
+        and queued for shadow scoring while a candidate model is being evaluated.
+        """
         try:
-            model_path = self.get_latest_model_path()
-            model = load_object(file_path=model_path)
-            selling_price_pred = model.predict(X)
+            serving_metrics = self.serving_metrics
+            start_time = time.perf_counter()
+            loaded_model = self.model_registry.get_model()
+            if serving_metrics is not None:
+                serving_metrics.observe(STAGE_MODEL_LOOKUP, time.perf_counter() - start_time)
+                serving_metrics.set_model_version(loaded_model.model_version)
+
+            prediction_cache = self.model_registry.prediction_cache
+            cache_key = None
+            if prediction_cache is not None and isinstance(X, dict):
+                start_time = time.perf_counter()
+                cache_key = get_prediction_cache_key(record=X, model_version=loaded_model.model_version)
+                selling_price_pred = prediction_cache.get(cache_key)
+                if serving_metrics is not None:
+                    serving_metrics.observe(STAGE_CACHE_LOOKUP, time.perf_counter() - start_time)
+                if selling_price_pred is not None:
+                    self._submit_shadow(X, loaded_model, selling_price_pred, serving_latency=None)
+                    return selling_price_pred
+
+            prediction_batcher = self.model_registry.prediction_batcher
+            if prediction_batcher is not None and isinstance(X, dict):
+                start_time = time.perf_counter()
+                selling_price_pred = prediction_batcher.predict(predict_batch=loaded_model.model.predict_records,
+                                                                record=X, model_version=loaded_model.model_version)
+                serving_latency = time.perf_counter() - start_time
+                if serving_metrics is not None:
+                    serving_metrics.observe(STAGE_COALESCED_PREDICT, serving_latency)
+            else:
+                start_time = time.perf_counter()
+                transformed_feature = loaded_model.model.transform(X)
+                preprocessed_time = time.perf_counter()
+                selling_price_pred = loaded_model.model.predict_transformed(transformed_feature)
+                predicted_time = time.perf_counter()
+                serving_latency = predicted_time - start_time
+                if serving_metrics is not None:
+                    serving_metrics.observe(STAGE_PREPROCESSING, preprocessed_time - start_time)
+                    serving_metrics.observe(STAGE_MODEL_PREDICT, predicted_time - preprocessed_time)
+
+            if cache_key is not None:
+                prediction_cache.put(cache_key, selling_price_pred)
+            if isinstance(X, dict):
+                self._submit_shadow(X, loaded_model, selling_price_pred, serving_latency=serving_latency)
             return selling_price_pred
         except Exception as e:
-            raise CarException(e, sys) from e
\ No newline at end of file
+            raise CarException(e, sys) from e
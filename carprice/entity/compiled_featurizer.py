@@ -0,0 +1,258 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from category_encoders.binary import BinaryEncoder
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from carprice.entity.carprice_batch import CarPriceBatch
+from carprice.exception import CarException
+
+UNKNOWN_CATEGORY = "__carprice_unknown_category__"
+
+
+class CompiledFeaturizer:
+    """
+    Single row replacement for a fitted ColumnTransformer made of OneHotEncoder,
+    BinaryEncoder and StandardScaler steps.
+    Categorical steps become {category: code vector} lookup tables and the scaler
+    becomes mean/scale vectors, so a plain dict or numpy record maps to the feature
+    vector without building a DataFrame. Output is identical to preprocessor.transform
+    cast to feature_dtype.
+    """
+    # featurizers pickled before feature_dtype existed built float64 features
+    feature_dtype = "float64"
+
+    def __init__(self, steps: list, n_features: int, feature_dtype: str = "float64"):
+        """
+        steps: list of (kind, columns, start, stop, params) in ColumnTransformer output order
+        n_features: width of the transformed feature vector
+        feature_dtype: dtype of the feature matrices, values are computed in float64 and stored as it
+        """
+        self.steps = steps
+        self.n_features = n_features
+        self.feature_dtype = feature_dtype
+
+    @staticmethod
+    def _compile_one_hot_encoder(transformer: OneHotEncoder, columns: list):
+        if transformer.drop is not None or getattr(transformer, "_infrequent_enabled", False):
+            raise Exception("OneHotEncoder with drop or infrequent categories can not be compiled")
+        tables = []
+        for column, categories in zip(columns, transformer.categories_):
+            codes = np.eye(len(categories), dtype=np.float64)
+            tables.append((column, {category: codes[index] for index, category in enumerate(categories)},
+                           np.zeros(len(categories), dtype=np.float64)))
+        return tables
+
+    @staticmethod
+    def _compile_binary_encoder(transformer: BinaryEncoder, columns: list):
+        if len(columns) != 1:
+            raise Exception("Only single column BinaryEncoder can be compiled")
+        column = columns[0]
+        categories = [category for category in transformer.ordinal_encoder.mapping[0]["mapping"].index
+                      if not pd.isna(category)]
+        # codes are produced by the fitted encoder itself, unknown and missing values included
+        lookup_values = categories + [UNKNOWN_CATEGORY, np.nan]
+        codes = np.asarray(transformer.transform(pd.DataFrame({column: lookup_values})), dtype=np.float64)
+        table = {category: codes[index] for index, category in enumerate(categories)}
+        return column, table, codes[-2], codes[-1]
+
+    @classmethod
+    def compile(cls, preprocessor: ColumnTransformer, feature_dtype: str = "float64"):
+        """
+        Builds the lookup tables from a fitted ColumnTransformer.
+        Raises CarException if the preprocessor has a step that can not be compiled.
+        """
+        try:
+            if getattr(preprocessor, "sparse_output_", False):
+                raise Exception("Sparse ColumnTransformer output can not be compiled")
+            steps = []
+            start = 0
+            for name, transformer, columns in preprocessor.transformers_:
+                if name == "remainder" and transformer == "drop":
+                    continue
+                columns = list(columns)
+                if isinstance(transformer, OneHotEncoder):
+                    for column, table, unknown_code in cls._compile_one_hot_encoder(transformer, columns):
+                        stop = start + len(unknown_code)
+                        steps.append(("onehot", column, start, stop, (table, transformer.handle_unknown)))
+                        start = stop
+                elif isinstance(transformer, BinaryEncoder):
+                    column, table, unknown_code, missing_code = cls._compile_binary_encoder(transformer, columns)
+                    stop = start + len(unknown_code)
+                    steps.append(("binary", column, start, stop, (table, unknown_code, missing_code)))
+                    start = stop
+                elif isinstance(transformer, StandardScaler):
+                    stop = start + len(columns)
+                    mean = transformer.mean_ if transformer.with_mean else None
+                    scale = transformer.scale_ if transformer.with_std else None
+                    steps.append(("scaler", columns, start, stop, (mean, scale)))
+                    start = stop
+                else:
+                    raise Exception(f"Transformer [{type(transformer).__name__}] can not be compiled")
+            return cls(steps=steps, n_features=start, feature_dtype=feature_dtype)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _fill_row(self, record, feature_row: np.ndarray):
+        for kind, columns, start, stop, params in self.steps:
+            if kind == "scaler":
+                mean, scale = params
+                values = np.array([record[column] for column in columns], dtype=np.float64)
+                if mean is not None:
+                    values -= mean
+                if scale is not None:
+                    values /= scale
+                feature_row[start:stop] = values
+            elif kind == "binary":
+                table, unknown_code, missing_code = params
+                value = record[columns]
+                code = table.get(value)
+                if code is None:
+                    code = missing_code if pd.isna(value) else unknown_code
+                feature_row[start:stop] = code
+            else:
+                table, handle_unknown = params
+                code = table.get(record[columns])
+                if code is None:
+                    if handle_unknown == "error":
+                        raise ValueError(f"Found unknown category [{record[columns]}] in column [{columns}]")
+                    code = 0.0
+                feature_row[start:stop] = code
+
+    def transform_record(self, record) -> np.ndarray:
+        """
+        record: dict or numpy record with the raw input columns
+        return: feature matrix of shape (1, n_features)
+        """
+        try:
+            feature = np.empty((1, self.n_features), dtype=self.feature_dtype)
+            self._fill_row(record, feature[0])
+            return feature
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def transform_frame(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """
+        dataframe: raw input columns, used when the preprocessing object itself is not loaded
+        return: feature matrix of shape (len(dataframe), n_features)
+        """
+        try:
+            feature = np.empty((len(dataframe), self.n_features), dtype=self.feature_dtype)
+            for kind, columns, start, stop, params in self.steps:
+                if kind == "scaler":
+                    mean, scale = params
+                    values = dataframe[columns].to_numpy(dtype=np.float64, copy=True)
+                    if mean is not None:
+                        values -= mean
+                    if scale is not None:
+                        values /= scale
+                    feature[:, start:stop] = values
+                    continue
+                table = params[0]
+                values = dataframe[columns]
+                # unknown categories get code -1, which indexes the extra last row
+                codes = pd.Categorical(values, categories=list(table.keys())).codes
+                if kind == "binary":
+                    _, unknown_code, missing_code = params
+                    lookup = np.vstack(list(table.values()) + [unknown_code])
+                    feature[:, start:stop] = lookup[codes]
+                    feature[values.isna().to_numpy(), start:stop] = missing_code
+                else:
+                    handle_unknown = params[1]
+                    if handle_unknown == "error" and (codes == -1).any():
+                        raise ValueError(f"Found unknown categories in column [{columns}]")
+                    lookup = np.vstack(list(table.values()) + [np.zeros(stop - start, dtype=np.float64)])
+                    feature[:, start:stop] = lookup[codes]
+            return feature
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def transform_batch(self, batch) -> np.ndarray:
+        """
+        batch: CarPriceBatch, each distinct category of the batch is looked up once
+        return: feature matrix of shape (len(batch), n_features)
+        """
+        try:
+            feature = np.empty((len(batch), self.n_features), dtype=self.feature_dtype)
+            for kind, columns, start, stop, params in self.steps:
+                if kind == "scaler":
+                    mean, scale = params
+                    values = np.column_stack([batch.get_column(column) for column in columns])
+                    if mean is not None:
+                        values -= mean
+                    if scale is not None:
+                        values /= scale
+                    feature[:, start:stop] = values
+                    continue
+                table = params[0]
+                codes = batch.get_column(columns)
+                # the extra last row is picked by the missing category code -1
+                if kind == "binary":
+                    _, unknown_code, missing_code = params
+                    lookup = np.vstack([table.get(category, unknown_code) for category in batch.categories[columns]] +
+                                       [missing_code])
+                else:
+                    handle_unknown = params[1]
+                    zeros = np.zeros(stop - start, dtype=np.float64)
+                    rows = [table.get(category) for category in batch.categories[columns]] + [None]
+                    if handle_unknown == "error":
+                        unknown = np.array([row is None for row in rows])
+                        if unknown[codes].any():
+                            raise ValueError(f"Found unknown categories in column [{columns}]")
+                    lookup = np.vstack([zeros if row is None else row for row in rows])
+                feature[:, start:stop] = lookup[codes]
+            return feature
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def check_parity(self, preprocessor: ColumnTransformer, dataframe: pd.DataFrame):
+        """
+        Raises CarException when transform_records, transform_frame or transform_batch of the raw
+        dataframe are not exactly equal to preprocessor.transform cast to feature_dtype.
+        """
+        try:
+            expected = np.asarray(preprocessor.transform(dataframe), dtype=np.float64).astype(self.feature_dtype)
+            outputs = {"transform_records": self.transform_records(dataframe.to_dict("records")),
+                       "transform_frame": self.transform_frame(dataframe),
+                       "transform_batch": self.transform_batch(CarPriceBatch.from_data_frame(dataframe))}
+            for name, feature in outputs.items():
+                if feature.dtype != expected.dtype or not np.array_equal(feature, expected):
+                    raise Exception(f"{name} output differs from the preprocessing object transform")
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_unknown_categories(self, batch) -> dict:
+        """
+        batch: CarPriceBatch
+        return: {column: [category, ...]} of the batch categories a OneHotEncoder with
+                handle_unknown="error" would reject, empty when the batch can be transformed
+        """
+        try:
+            unknown_categories = {}
+            for kind, columns, start, stop, params in self.steps:
+                if kind != "onehot" or params[1] != "error":
+                    continue
+                table = params[0]
+                used_codes = np.unique(batch.get_column(columns))
+                categories = [batch.categories[columns][code] for code in used_codes if code >= 0]
+                unknown = [category for category in categories if category not in table]
+                if len(unknown) > 0:
+                    unknown_categories[columns] = unknown
+            return unknown_categories
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def transform_records(self, records: list) -> np.ndarray:
+        """
+        records: list of dicts or numpy records
+        return: feature matrix of shape (len(records), n_features)
+        """
+        try:
+            feature = np.empty((len(records), self.n_features), dtype=self.feature_dtype)
+            for index, record in enumerate(records):
+                self._fill_row(record, feature[index])
+            return feature
+        except Exception as e:
+            raise CarException(e, sys) from e
@@ -2,21 +2,40 @@ from collections import namedtuple
 
 
 DataIngestionConfig=namedtuple("DataIngestionConfig",
-["bucket_name","object_name","local_file_name","raw_data_dir","ingested_train_dir","ingested_test_dir"])
+["bucket_name","object_name","local_file_name","raw_data_dir","ingested_train_dir","ingested_test_dir",
+ "car_catalog_file_path"])
 
 
 DataValidationConfig = namedtuple("DataValidationConfig", ["schema_file_path","report_file_path","report_page_file_path"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig", ["transformed_train_dir",
                                                                    "transformed_test_dir",
-                                                                   "preprocessed_object_file_path"])
+                                                                   "preprocessed_object_file_path",
+                                                                   "feature_dtype"])
 
 
-ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy","model_config_file_path"])
+ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy","model_config_file_path",
+                                                       "search_cache_dir","search_cache_max_entries",
+                                                       "search_cache_max_size_mb","search_cache_best_model",
+                                                       "model_evaluation_file_path","incremental_training",
+                                                       "incremental_max_new_rows_fraction","incremental_n_estimators",
+                                                       "incremental_learning_rate_scale",
+                                                       "incremental_drift_p_value","incremental_max_accuracy_drop",
+                                                       "cpu_thread_budget","serving_max_p99_latency_ms",
+                                                       "serving_min_throughput_rows_per_second",
+                                                       "serving_max_artifact_size_mb","serving_latency_sample_rows"])
 
 ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_file_path","time_stamp"])
 
 
 ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
 
+ModelServingConfig = namedtuple("ModelServingConfig", ["model_dir", "model_refresh_interval", "max_batch_size",
+                                                       "car_catalog_file_pattern", "car_catalog_fallback_file_path",
+                                                       "prediction_cache_size", "prediction_cache_ttl",
+                                                       "preload_model", "warm_up_record",
+                                                       "prediction_batch_window", "prediction_batch_max_size",
+                                                       "metrics_dir", "model_watcher", "shadow_promotion_samples",
+                                                       "shadow_queue_size", "shadow_stats_window"])
+
 TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir"])
\ No newline at end of file
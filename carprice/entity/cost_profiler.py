@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+from collections import namedtuple
+
+import dill
+import numpy as np
+
+from carprice.exception import CarException
+
+CandidateCost = namedtuple("CandidateCost", ["wall_seconds", "cpu_seconds", "peak_memory_mb"])
+
+ServingCost = namedtuple("ServingCost", ["p99_latency_ms", "throughput_rows_per_second", "artifact_size_mb"])
+
+# a None limit is not checked
+ServingConstraint = namedtuple("ServingConstraint", ["max_p99_latency_ms", "min_throughput_rows_per_second",
+                                                     "max_artifact_size_mb", "latency_sample_rows"],
+                               defaults=[None, None, None, 200])
+
+PROC_STATUS_FILE_PATH = "/proc/self/status"
+PROC_CLEAR_REFS_FILE_PATH = "/proc/self/clear_refs"
+# writing 5 to clear_refs resets the peak resident set size of the process to its current size
+RESET_PEAK_RSS = "5"
+LATENCY_SAMPLE_ROWS = 1000
+LATENCY_REPEATS = 5
+
+
+def _read_status_mb(field: str):
+    """
+    return: size of a /proc/self/status field such as VmRSS in MB, None where it is not available
+    """
+    try:
+        with open(PROC_STATUS_FILE_PATH) as status_file:
+            for line in status_file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """
+    return: True when the peak resident set size of the process was reset
+    """
+    try:
+        with open(PROC_CLEAR_REFS_FILE_PATH, "w") as clear_refs_file:
+            clear_refs_file.write(RESET_PEAK_RSS)
+        return True
+    except OSError:
+        return False
+
+
+class CostProfiler:
+    """
+    Measures the wall time, the CPU time of all threads of the process and the peak memory of a block:
+        with CostProfiler() as profiler:
+            ...
+        profiler.cost
+    Peak memory is the highest resident set size during the block above the one at its start, it is None
+    where the peak can not be reset per block (anything but Linux).
+    CPU time and memory of other processes, such as loky workers, are not part of the cost.
+    """
+
+    def __init__(self):
+        self.cost = None
+        self._start_rss_mb = None
+        self._start_wall_time = None
+        self._start_cpu_time = None
+
+    def __enter__(self):
+        self._start_rss_mb = _read_status_mb("VmRSS") if reset_peak_rss() else None
+        self._start_wall_time = time.perf_counter()
+        self._start_cpu_time = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_seconds = time.perf_counter() - self._start_wall_time
+        cpu_seconds = time.process_time() - self._start_cpu_time
+        peak_memory_mb = None
+        if self._start_rss_mb is not None:
+            peak_rss_mb = _read_status_mb("VmHWM")
+            if peak_rss_mb is not None:
+                peak_memory_mb = max(peak_rss_mb - self._start_rss_mb, 0.0)
+        self.cost = CandidateCost(wall_seconds=wall_seconds, cpu_seconds=cpu_seconds, peak_memory_mb=peak_memory_mb)
+        return False
+
+
+def combine_costs(costs: list) -> CandidateCost:
+    """
+    Cost of work measured in several blocks: the times add up and the peak memory is the highest one.
+    """
+    peak_memory_mb = [cost.peak_memory_mb for cost in costs if cost.peak_memory_mb is not None]
+    return CandidateCost(wall_seconds=sum(cost.wall_seconds for cost in costs),
+                         cpu_seconds=sum(cost.cpu_seconds for cost in costs),
+                         peak_memory_mb=max(peak_memory_mb) if len(peak_memory_mb) > 0 else None)
+
+
+def get_inference_latency(model, input_feature) -> dict:
+    """
+    Median predict latency of a fitted model over LATENCY_REPEATS calls, on a single row
+    and on up to LATENCY_SAMPLE_ROWS rows of input_feature.
+    return: {"single_row_latency_ms": ..., "batch_latency_per_row_ms": ...}
+    """
+    try:
+        sample = np.asarray(input_feature[:LATENCY_SAMPLE_ROWS])
+        single_row = sample[:1]
+        # the first call may build caches, such as the xgboost predictor, it is not timed
+        model.predict(single_row)
+        latencies = {}
+        for name, rows in [("single_row_latency_ms", single_row), ("batch_latency_per_row_ms", sample)]:
+            timings = []
+            for _ in range(LATENCY_REPEATS):
+                start_time = time.perf_counter()
+                model.predict(rows)
+                timings.append(time.perf_counter() - start_time)
+            latencies[name] = float(np.median(timings)) * 1000 / len(rows)
+        return latencies
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def _get_directory_size_mb(dir_path: str) -> float:
+    size = 0
+    for parent_dir, _, file_names in os.walk(dir_path):
+        size += sum(os.path.getsize(os.path.join(parent_dir, file_name)) for file_name in file_names)
+    return size / (1024 * 1024)
+
+
+def get_serving_cost(serving_model, records: list, artifact_dir: str = None) -> ServingCost:
+    """
+    Serving cost of a model as it is served, a CarPriceModel with its compiled featurizer and flat forest,
+    on raw records it was not trained on: p99 latency of predict_record over the records one at a time,
+    rows per second of one predict_records call over all of them (median of LATENCY_REPEATS calls) and
+    the size of artifact_dir on disk, or of the pickled model when it is served without a model artifact.
+    Single records are timed with the estimator on one thread, as n_jobs=-1 would time joblib dispatch.
+    """
+    try:
+        estimator = getattr(serving_model, "trained_model_object", serving_model)
+        n_jobs = estimator.get_params().get("n_jobs") if hasattr(estimator, "get_params") else None
+        # the first call may build caches, such as the xgboost predictor, it is not timed
+        serving_model.predict_record(records[0])
+        latencies = []
+        try:
+            if n_jobs is not None:
+                estimator.set_params(n_jobs=1)
+            for record in records:
+                start_time = time.perf_counter()
+                serving_model.predict_record(record)
+                latencies.append(time.perf_counter() - start_time)
+        finally:
+            if n_jobs is not None:
+                estimator.set_params(n_jobs=n_jobs)
+        batch_timings = []
+        for _ in range(LATENCY_REPEATS):
+            start_time = time.perf_counter()
+            serving_model.predict_records(records)
+            batch_timings.append(time.perf_counter() - start_time)
+        if artifact_dir is not None:
+            artifact_size_mb = _get_directory_size_mb(artifact_dir)
+        else:
+            artifact_size_mb = len(dill.dumps(serving_model)) / (1024 * 1024)
+        return ServingCost(p99_latency_ms=float(np.percentile(latencies, 99)) * 1000,
+                           throughput_rows_per_second=len(records) / float(np.median(batch_timings)),
+                           artifact_size_mb=artifact_size_mb)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def get_serving_constraint_violations(serving_cost: ServingCost, serving_constraint: ServingConstraint) -> list:
+    """
+    return: a message for every limit of serving_constraint the serving cost is outside of, empty when it meets all
+    """
+    violations = []
+    if serving_constraint.max_p99_latency_ms is not None and \
+            serving_cost.p99_latency_ms > serving_constraint.max_p99_latency_ms:
+        violations.append(f"p99 latency {serving_cost.p99_latency_ms:.2f} ms > "
+                          f"{serving_constraint.max_p99_latency_ms} ms")
+    if serving_constraint.min_throughput_rows_per_second is not None and \
+            serving_cost.throughput_rows_per_second < serving_constraint.min_throughput_rows_per_second:
+        violations.append(f"throughput {serving_cost.throughput_rows_per_second:.0f} rows/s < "
+                          f"{serving_constraint.min_throughput_rows_per_second} rows/s")
+    if serving_constraint.max_artifact_size_mb is not None and \
+            serving_cost.artifact_size_mb > serving_constraint.max_artifact_size_mb:
+        violations.append(f"artifact size {serving_cost.artifact_size_mb:.1f} MB > "
+                          f"{serving_constraint.max_artifact_size_mb} MB")
+    return violations
@@ -0,0 +1,203 @@
+import json
+import sys
+
+import numpy as np
+
+from carprice.exception import CarException
+
+FOREST_AGGREGATION_SUM = "sum"
+FOREST_AGGREGATION_MEAN = "mean"
+DEFAULT_ROW_BLOCK_SIZE = 4096
+
+
+class FlatForest:
+    """
+    Tree ensemble flattened into structure-of-arrays form for serving.
+    Every node of every tree is one slot of feature, threshold, left, right,
+    missing_left and value. A row goes left when x[feature] <= threshold.
+    Leaves point to themselves with an infinite threshold, so all trees can be
+    walked together level by level for a whole batch with plain numpy indexing.
+    Inputs are compared as float32, the precision both xgboost and sklearn trees use.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 missing_left: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 aggregation: str, base_score: float = 0.0, children: np.ndarray = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.aggregation = aggregation
+        self.base_score = base_score
+        if children is None:
+            children = np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self._children = children
+
+    @staticmethod
+    def _get_depth(left: np.ndarray, right: np.ndarray, roots: np.ndarray) -> int:
+        depth = 0
+        level = roots
+        while True:
+            is_split = left[level] != level
+            if not is_split.any():
+                return depth
+            level = np.concatenate([left[level[is_split]], right[level[is_split]]])
+            depth += 1
+
+    @classmethod
+    def from_random_forest(cls, model):
+        """
+        model: fitted sklearn RandomForestRegressor (or any forest exposing estimators_ with tree_)
+        """
+        try:
+            features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+            offset = 0
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                n_nodes = tree.node_count
+                node_index = np.arange(n_nodes)
+                is_leaf = tree.children_left == -1
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+                lefts.append(np.where(is_leaf, node_index, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, node_index, tree.children_right) + offset)
+                missing_go_to_left = getattr(tree, "missing_go_to_left", np.zeros(n_nodes, dtype=np.uint8))
+                missing_lefts.append(np.where(is_leaf, True, missing_go_to_left.astype(bool)))
+                values.append(tree.value[:, 0, 0])
+                roots.append(offset)
+                offset += n_nodes
+            left = np.concatenate(lefts).astype(np.int32)
+            right = np.concatenate(rights).astype(np.int32)
+            roots = np.array(roots, dtype=np.int32)
+            return cls(feature=np.concatenate(features).astype(np.int32),
+                       threshold=np.concatenate(thresholds).astype(np.float64),
+                       left=left, right=right,
+                       missing_left=np.concatenate(missing_lefts),
+                       value=np.concatenate(values).astype(np.float64),
+                       roots=roots,
+                       max_depth=cls._get_depth(left, right, roots),
+                       aggregation=FOREST_AGGREGATION_MEAN)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_xgboost(cls, model):
+        """
+        model: fitted xgboost XGBRegressor with a tree booster and an identity link objective
+        """
+        try:
+            booster = model.get_booster()
+            config = json.loads(booster.save_config())
+            objective = config["learner"]["objective"]["name"]
+            if objective not in ("reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"):
+                raise Exception(f"Objective [{objective}] is not supported by FlatForest")
+            base_score = float(str(config["learner"]["learner_model_param"]["base_score"]).strip("[]"))
+
+            trees_df = booster.trees_to_dataframe()
+            # models fitted with early stopping predict with the trees up to best_iteration only
+            best_iteration = getattr(model, "best_iteration", None)
+            if best_iteration is not None:
+                num_parallel_tree = max(int(getattr(model, "num_parallel_tree", None) or 1), 1)
+                trees_df = trees_df[trees_df["Tree"] < (best_iteration + 1) * num_parallel_tree]
+
+            tree_sizes = trees_df.groupby("Tree")["Node"].max().sort_index() + 1
+            tree_offsets = dict(zip(tree_sizes.index, np.cumsum(tree_sizes.values) - tree_sizes.values))
+            feature_names = booster.feature_names
+
+            def to_global(node_ids):
+                tree_node = node_ids.str.split("-", expand=True).astype(int)
+                return (tree_node[0].map(tree_offsets) + tree_node[1]).to_numpy()
+
+            n_nodes = int(tree_sizes.sum())
+            node_index = (trees_df["Tree"].map(tree_offsets) + trees_df["Node"]).to_numpy()
+            is_leaf = (trees_df["Feature"] == "Leaf").to_numpy()
+
+            feature = np.zeros(n_nodes, dtype=np.int32)
+            threshold = np.full(n_nodes, np.inf, dtype=np.float64)
+            left = np.arange(n_nodes, dtype=np.int32)
+            right = np.arange(n_nodes, dtype=np.int32)
+            missing_left = np.ones(n_nodes, dtype=bool)
+            value = np.zeros(n_nodes, dtype=np.float64)
+
+            splits_df = trees_df[~is_leaf]
+            split_index = node_index[~is_leaf]
+            if feature_names is not None:
+                feature_position = {name: position for position, name in enumerate(feature_names)}
+                feature[split_index] = splits_df["Feature"].map(feature_position).to_numpy()
+            else:
+                feature[split_index] = splits_df["Feature"].str.lstrip("f").astype(int).to_numpy()
+            # xgboost goes left when x < split, for float32 x that is x <= the float32 just below split
+            split = splits_df["Split"].to_numpy(dtype=np.float32)
+            threshold[split_index] = np.nextafter(split, np.float32(-np.inf)).astype(np.float64)
+            left[split_index] = to_global(splits_df["Yes"])
+            right[split_index] = to_global(splits_df["No"])
+            missing_left[split_index] = (splits_df["Missing"] == splits_df["Yes"]).to_numpy()
+            value[node_index[is_leaf]] = trees_df.loc[is_leaf, "Gain"].to_numpy(dtype=np.float64)
+
+            roots = np.array([tree_offsets[tree] for tree in tree_sizes.index], dtype=np.int32)
+            return cls(feature=feature, threshold=threshold, left=left, right=right,
+                       missing_left=missing_left, value=value, roots=roots,
+                       max_depth=cls._get_depth(left, right, roots),
+                       aggregation=FOREST_AGGREGATION_SUM, base_score=base_score)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Exports any of the tree ensembles configured in model.yaml.
+        Raises CarException for models that can not be flattened.
+        """
+        try:
+            if hasattr(model, "get_booster"):
+                return cls.from_xgboost(model)
+            if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+                return cls.from_random_forest(model)
+            raise Exception(f"Model [{type(model).__name__}] can not be flattened")
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        # children holds (left, right) pairs so the next node is a single gather at 2 * node + go_right
+        children = self._children
+        has_missing = bool(np.isnan(flat_X).any())
+        node = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.max_depth):
+            feature_value = np.take(flat_X, row_offset + np.take(self.feature, node))
+            go_right = feature_value > np.take(self.threshold, node)
+            if has_missing:
+                go_right = np.where(np.isnan(feature_value), ~np.take(self.missing_left, node), go_right)
+            node = np.take(children, 2 * node + go_right)
+        leaf_value = np.take(self.value, node)
+        if self.aggregation == FOREST_AGGREGATION_MEAN:
+            return leaf_value.mean(axis=1)
+        return leaf_value.sum(axis=1) + self.base_score
+
+    def predict(self, X, row_block_size: int = DEFAULT_ROW_BLOCK_SIZE) -> np.ndarray:
+        """
+        X: transformed feature matrix
+        return: predictions as float64 array, computed in blocks of row_block_size rows
+        """
+        try:
+            X = np.asarray(X, dtype=np.float32)
+            if X.shape[0] <= row_block_size:
+                return self._predict_block(X)
+            return np.concatenate([self._predict_block(X[start:start + row_block_size])
+                                   for start in range(0, X.shape[0], row_block_size)])
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
@@ -0,0 +1,115 @@
+import copy
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+
+from carprice.exception import CarException
+from carprice.logger import logging
+
+TRAINING_STATE_ROW_HASHES_KEY = "row_hashes"
+TRAINING_STATE_FULL_TRAINING_SECONDS_KEY = "full_training_seconds"
+TRAINING_STATE_TEST_ROW_HASHES_KEY = "test_row_hashes"
+
+
+def get_row_hashes(dataframe: pd.DataFrame) -> np.ndarray:
+    """
+    return: uint64 content hash of every row, the index is not part of it
+    """
+    try:
+        return pd.util.hash_pandas_object(dataframe, index=False).to_numpy()
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def save_training_state(file_path: str, row_hashes: np.ndarray, full_training_seconds: float,
+                        test_row_hashes: np.ndarray = None):
+    """
+    Saves what the next incremental run needs next to a trained model:
+    hashes of the raw training and test rows and the time the last full training took.
+    """
+    try:
+        if test_row_hashes is None:
+            test_row_hashes = np.empty(0, dtype=np.uint64)
+        with open(file_path, "wb") as state_file:
+            np.savez(state_file, **{TRAINING_STATE_ROW_HASHES_KEY: row_hashes,
+                                    TRAINING_STATE_TEST_ROW_HASHES_KEY: test_row_hashes,
+                                    TRAINING_STATE_FULL_TRAINING_SECONDS_KEY: np.float64(full_training_seconds)})
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def load_training_state(file_path: str) -> dict:
+    try:
+        with np.load(file_path) as state:
+            # states saved before test rows were recorded have none
+            test_row_hashes = state[TRAINING_STATE_TEST_ROW_HASHES_KEY] \
+                if TRAINING_STATE_TEST_ROW_HASHES_KEY in state.files else None
+            return {TRAINING_STATE_ROW_HASHES_KEY: state[TRAINING_STATE_ROW_HASHES_KEY],
+                    TRAINING_STATE_TEST_ROW_HASHES_KEY: test_row_hashes,
+                    TRAINING_STATE_FULL_TRAINING_SECONDS_KEY: float(state[TRAINING_STATE_FULL_TRAINING_SECONDS_KEY])}
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def get_new_categories(known_dataframe: pd.DataFrame, new_dataframe: pd.DataFrame, categorical_columns: list) -> dict:
+    """
+    return: {column: [category, ...]} of the new rows categories the known rows do not have
+    """
+    try:
+        new_categories = {}
+        for column in categorical_columns:
+            unknown = set(new_dataframe[column].dropna().unique()) - set(known_dataframe[column].dropna().unique())
+            if len(unknown) > 0:
+                new_categories[column] = sorted(map(str, unknown))
+        return new_categories
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def get_drifted_columns(known_dataframe: pd.DataFrame, new_dataframe: pd.DataFrame, columns: list,
+                        p_value_threshold: float) -> dict:
+    """
+    Two sample Kolmogorov-Smirnov test of every column between the known and the new rows.
+    return: {column: p value} of the columns whose distribution changed
+    """
+    try:
+        drifted_columns = {}
+        for column in columns:
+            p_value = ks_2samp(known_dataframe[column].dropna(), new_dataframe[column].dropna()).pvalue
+            if p_value < p_value_threshold:
+                drifted_columns[column] = float(p_value)
+        return drifted_columns
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def continue_training(model, input_feature, output_feature, n_estimators: int, learning_rate_scale: float = 1.0):
+    """
+    Adds n_estimators trees fitted on the given rows to a copy of a trained model.
+    XGBoost keeps boosting from the trained booster through xgb_model, with the learning rate
+    scaled by learning_rate_scale so a few hundred rows do not undo what the trained trees learned.
+    Random forests grow new trees next to the trained ones with warm_start.
+    """
+    try:
+        model_params = model.get_params()
+        if hasattr(model, "get_booster"):
+            # xgboost uses 0.3 when learning_rate is not set
+            learning_rate = (model_params.get("learning_rate") or 0.3) * learning_rate_scale
+            model_params.update({"n_estimators": n_estimators, "early_stopping_rounds": None,
+                                 "learning_rate": learning_rate})
+            continued_model = type(model)(**model_params)
+            continued_model.fit(input_feature, output_feature, xgb_model=model.get_booster())
+        elif "warm_start" in model_params and hasattr(model, "estimators_"):
+            continued_model = copy.deepcopy(model)
+            continued_model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_estimators)
+            continued_model.fit(input_feature, output_feature)
+            continued_model.set_params(warm_start=False)
+        else:
+            raise Exception(f"{type(model).__name__} can not continue training")
+        logging.info(f"Continued training {type(model).__name__} with {n_estimators} trees "
+                     f"on {len(output_feature)} rows")
+        return continued_model
+    except Exception as e:
+        raise CarException(e, sys) from e
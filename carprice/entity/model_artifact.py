@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import sys
+
+import joblib
+import numpy as np
+
+from carprice.constant import MODEL_ARTIFACT_DIR_NAME
+from carprice.entity.compiled_featurizer import CompiledFeaturizer
+from carprice.entity.flat_forest import FlatForest
+from carprice.exception import CarException
+from carprice.util.util import load_object
+
+MODEL_ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+XGBOOST_MODEL_FILE_NAME = "model.ubj"
+SKLEARN_MODEL_FILE_NAME = "model.joblib"
+MODEL_KIND_XGBOOST = "xgboost"
+MODEL_KIND_SKLEARN = "sklearn"
+# artifacts of format version 1 before the sklearn kind served the flat forest for every batch size
+MODEL_KIND_FLAT_FOREST = "flat_forest"
+FLAT_FOREST_ARRAYS = ["feature", "threshold", "left", "right", "missing_left", "value", "roots", "_children"]
+
+
+def get_model_artifact_dir(model_file_path: str) -> str:
+    """
+    return: artifact directory written next to the pickled model
+    """
+    return os.path.join(os.path.dirname(model_file_path), MODEL_ARTIFACT_DIR_NAME)
+
+
+def is_model_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE_NAME))
+
+
+def _save_array(dir_path: str, name: str, array: np.ndarray) -> str:
+    file_name = f"{name}.npy"
+    np.save(os.path.join(dir_path, file_name), np.ascontiguousarray(array), allow_pickle=False)
+    return file_name
+
+
+def _load_array(dir_path: str, file_name: str) -> np.ndarray:
+    array = np.load(os.path.join(dir_path, file_name), mmap_mode="r", allow_pickle=False)
+    # a plain ndarray view of the mapping avoids the memmap subclass overhead on every prediction
+    return array.view(np.ndarray)
+
+
+def _save_featurizer(dir_path: str, featurizer: CompiledFeaturizer) -> dict:
+    steps = []
+    for index, (kind, columns, start, stop, params) in enumerate(featurizer.steps):
+        step = {"kind": kind, "columns": columns, "start": start, "stop": stop}
+        if kind == "scaler":
+            mean, scale = params
+            step["mean"] = None if mean is None else _save_array(dir_path, f"featurizer_{index}_mean", mean)
+            step["scale"] = None if scale is None else _save_array(dir_path, f"featurizer_{index}_scale", scale)
+        else:
+            table = params[0]
+            categories = list(table.keys())
+            if not all(isinstance(category, str) for category in categories):
+                raise Exception(f"Categories of column [{columns}] are not all strings")
+            step["categories"] = _save_array(dir_path, f"featurizer_{index}_categories",
+                                             np.array(categories, dtype=str))
+            if kind == "binary":
+                _, unknown_code, missing_code = params
+                # rows: one code per category, then the unknown and the missing code
+                codes = np.vstack(list(table.values()) + [unknown_code, missing_code])
+                step["codes"] = _save_array(dir_path, f"featurizer_{index}_codes", codes)
+            else:
+                step["handle_unknown"] = params[1]
+        steps.append(step)
+    return {"n_features": featurizer.n_features, "feature_dtype": str(np.dtype(featurizer.feature_dtype)),
+            "steps": steps}
+
+
+def _load_featurizer(dir_path: str, manifest: dict) -> CompiledFeaturizer:
+    steps = []
+    for step in manifest["steps"]:
+        kind, columns, start, stop = step["kind"], step["columns"], step["start"], step["stop"]
+        if kind == "scaler":
+            mean = None if step["mean"] is None else _load_array(dir_path, step["mean"])
+            scale = None if step["scale"] is None else _load_array(dir_path, step["scale"])
+            steps.append((kind, columns, start, stop, (mean, scale)))
+            continue
+        categories = _load_array(dir_path, step["categories"]).tolist()
+        if kind == "binary":
+            codes = _load_array(dir_path, step["codes"])
+            table = {category: codes[index] for index, category in enumerate(categories)}
+            steps.append((kind, columns, start, stop, (table, codes[-2], codes[-1])))
+        else:
+            codes = np.eye(len(categories), dtype=np.float64)
+            table = {category: codes[index] for index, category in enumerate(categories)}
+            steps.append((kind, columns, start, stop, (table, step["handle_unknown"])))
+    return CompiledFeaturizer(steps=steps, n_features=manifest["n_features"],
+                              feature_dtype=manifest.get("feature_dtype", "float64"))
+
+
+def _save_flat_forest(dir_path: str, flat_forest: FlatForest, prefix: str) -> dict:
+    manifest = {"max_depth": int(flat_forest.max_depth), "aggregation": flat_forest.aggregation,
+                "base_score": float(flat_forest.base_score), "arrays": {}}
+    for name in FLAT_FOREST_ARRAYS:
+        manifest["arrays"][name] = _save_array(dir_path, f"{prefix}{name.strip('_')}", getattr(flat_forest, name))
+    return manifest
+
+
+def _load_flat_forest(dir_path: str, manifest: dict) -> FlatForest:
+    arrays = {name.strip("_"): _load_array(dir_path, file_name) for name, file_name in manifest["arrays"].items()}
+    return FlatForest(max_depth=manifest["max_depth"], aggregation=manifest["aggregation"],
+                      base_score=manifest["base_score"], **arrays)
+
+
+def save_model_artifact(dir_path: str, carprice_model):
+    """
+    Writes carprice_model as a directory of plain files: manifest.json, the compiled featurizer
+    tables and flat forest as .npy arrays and, for xgboost, the booster in its native ubj format.
+    Scikit-learn forests have no native format, the estimator is stored with joblib next to its
+    flat forest and serves the batches larger than FLAT_FOREST_MAX_ROWS, as in CarPriceModel.
+    Raises CarException if the model has no compiled featurizer or can not be stored this way.
+    """
+    try:
+        compiled_featurizer = getattr(carprice_model, "compiled_featurizer", None)
+        flat_forest = getattr(carprice_model, "flat_forest", None)
+        trained_model_object = carprice_model.trained_model_object
+        if compiled_featurizer is None:
+            raise Exception("Model artifact requires a compiled featurizer")
+
+        # write into a temporary directory first so a reader never sees a half written artifact
+        tmp_dir_path = f"{dir_path}.tmp"
+        shutil.rmtree(tmp_dir_path, ignore_errors=True)
+        os.makedirs(tmp_dir_path)
+        manifest = {"format_version": MODEL_ARTIFACT_FORMAT_VERSION,
+                    "model_class": type(trained_model_object).__name__,
+                    "featurizer": _save_featurizer(tmp_dir_path, compiled_featurizer)}
+        if hasattr(trained_model_object, "get_booster"):
+            trained_model_object.save_model(os.path.join(tmp_dir_path, XGBOOST_MODEL_FILE_NAME))
+            manifest["model"] = {"kind": MODEL_KIND_XGBOOST, "file": XGBOOST_MODEL_FILE_NAME}
+        elif flat_forest is not None:
+            joblib.dump(trained_model_object, os.path.join(tmp_dir_path, SKLEARN_MODEL_FILE_NAME))
+            manifest["model"] = {"kind": MODEL_KIND_SKLEARN, "file": SKLEARN_MODEL_FILE_NAME}
+        else:
+            raise Exception(f"Model [{type(trained_model_object).__name__}] can not be stored as an artifact")
+        if flat_forest is not None:
+            manifest["flat_forest"] = _save_flat_forest(tmp_dir_path, flat_forest, prefix="flat_forest_")
+
+        with open(os.path.join(tmp_dir_path, MANIFEST_FILE_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        shutil.rmtree(dir_path, ignore_errors=True)
+        os.replace(tmp_dir_path, dir_path)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def load_model_artifact(dir_path: str):
+    """
+    Loads a model written by save_model_artifact. Arrays are memory mapped read only,
+    so processes serving the same artifact share its pages.
+    return: CarPriceModel without a preprocessing object
+    """
+    try:
+        from carprice.component.model_trainer import CarPriceModel
+
+        with open(os.path.join(dir_path, MANIFEST_FILE_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest["format_version"] != MODEL_ARTIFACT_FORMAT_VERSION:
+            raise Exception(f"Unsupported model artifact format version [{manifest['format_version']}]")
+
+        compiled_featurizer = _load_featurizer(dir_path, manifest["featurizer"])
+        flat_forest = None
+        if "flat_forest" in manifest:
+            flat_forest = _load_flat_forest(dir_path, manifest["flat_forest"])
+
+        model_kind = manifest["model"]["kind"]
+        if model_kind == MODEL_KIND_XGBOOST:
+            from xgboost import XGBRegressor
+            trained_model_object = XGBRegressor()
+            trained_model_object.load_model(os.path.join(dir_path, manifest["model"]["file"]))
+        elif model_kind == MODEL_KIND_SKLEARN:
+            trained_model_object = joblib.load(os.path.join(dir_path, manifest["model"]["file"]))
+        elif model_kind == MODEL_KIND_FLAT_FOREST:
+            trained_model_object = flat_forest
+        else:
+            raise Exception(f"Unsupported model kind [{model_kind}]")
+        return CarPriceModel(preprocessing_object=None, trained_model_object=trained_model_object,
+                             compiled_featurizer=compiled_featurizer, flat_forest=flat_forest)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def check_model_artifact_parity(dir_path: str, carprice_model, dataframe):
+    """
+    Loads the artifact in dir_path and compares its predictions with carprice_model on the raw rows
+    of dataframe, one row at a time, as a small batch and as a whole batch.
+    Raises CarException when a prediction is not exactly equal.
+    """
+    try:
+        artifact_model = load_model_artifact(dir_path=dir_path)
+        records = dataframe.to_dict("records")
+        checks = {"record": (artifact_model.predict_records(records[:1]), carprice_model.predict_records(records[:1])),
+                  "records": (artifact_model.predict_records(records[:16]), carprice_model.predict_records(records[:16])),
+                  "frame": (artifact_model.predict(dataframe), carprice_model.predict(dataframe))}
+        for name, (artifact_prediction, model_prediction) in checks.items():
+            if not np.array_equal(artifact_prediction, model_prediction):
+                raise Exception(f"Model artifact {name} predictions differ from the pickled model by up to "
+                                f"{np.max(np.abs(artifact_prediction - model_prediction))}")
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def load_carprice_model(model_path: str):
+    """
+    model_path: model artifact directory or dill pickled model file
+    """
+    try:
+        if is_model_artifact(model_path):
+            return load_model_artifact(dir_path=model_path)
+        return load_object(file_path=model_path)
+    except Exception as e:
+        raise CarException(e, sys) from e
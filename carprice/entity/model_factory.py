@@ -1,32 +1,90 @@
 from cmath import log
+import hashlib
 import importlib
+import json
 from pyexpat import model
+import dill
 import numpy as np
 import yaml
 from carprice.exception import CarException
 import os
 import sys
+import tempfile
+import time
 
 from collections import namedtuple
+from contextlib import ExitStack
+from joblib import Parallel, delayed, parallel_config
+from threadpoolctl import threadpool_limits
 from typing import List
 from carprice.logger import logging
+from carprice.entity.search_cache import SearchCache
+from carprice.entity.cost_profiler import CostProfiler, combine_costs, get_inference_latency
+from carprice.entity.cost_profiler import ServingConstraint, get_serving_constraint_violations
+from sklearn.base import clone
 from sklearn.metrics import r2_score,mean_squared_error
+from sklearn.model_selection import ParameterGrid, ParameterSampler, check_cv, cross_val_score, train_test_split
 GRID_SEARCH_KEY = 'grid_search'
 MODULE_KEY = 'module'
 CLASS_KEY = 'class'
 PARAM_KEY = 'params'
 MODEL_SELECTION_KEY = 'model_selection'
 SEARCH_PARAM_GRID_KEY = "search_param_grid"
+SEARCH_WORKERS_KEY = "search_workers"
+EVALUATION_WORKERS_KEY = "evaluation_workers"
+PROFILE_CANDIDATES_KEY = "profile_candidates"
+
+SEARCH_STRATEGY_KEY = "search_strategy"
+SEARCH_STRATEGY_NAME_KEY = "name"
+SEARCH_STRATEGY_RANDOM_STATE_KEY = "random_state"
+SEARCH_STRATEGY_N_ITER_KEY = "n_iter"
+SEARCH_STRATEGY_N_CANDIDATES_KEY = "n_candidates"
+SEARCH_STRATEGY_RESOURCE_KEY = "resource"
+SEARCH_STRATEGY_FACTOR_KEY = "factor"
+SEARCH_STRATEGY_MAX_RESOURCES_KEY = "max_resources"
+SEARCH_STRATEGY_MAX_FITS_KEY = "max_fits"
+SEARCH_STRATEGY_MAX_TIME_KEY = "max_time"
+
+SEARCH_STRATEGY_GRID = "grid"
+SEARCH_STRATEGY_RANDOM = "random"
+SEARCH_STRATEGY_HALVING = "halving"
+SEARCH_STRATEGY_HALVING_RANDOM = "halving_random"
+SEARCH_STRATEGY_BUDGET = "budget"
+SEARCH_STRATEGIES = [SEARCH_STRATEGY_GRID, SEARCH_STRATEGY_RANDOM, SEARCH_STRATEGY_HALVING,
+                     SEARCH_STRATEGY_HALVING_RANDOM, SEARCH_STRATEGY_BUDGET]
+HALVING_RESOURCE_N_SAMPLES = "n_samples"
+
+EARLY_STOPPING_KEY = "early_stopping"
+EARLY_STOPPING_MAX_N_ESTIMATORS_KEY = "max_n_estimators"
+EARLY_STOPPING_ROUNDS_KEY = "rounds"
+EARLY_STOPPING_VALIDATION_FRACTION_KEY = "validation_fraction"
+EARLY_STOPPING_RANDOM_STATE_KEY = "random_state"
+N_ESTIMATORS_PARAM = "n_estimators"
+
+QUANTIZED_TREE_METHOD = "hist"
+# estimator params that change how features are binned, candidates differing in them can not share a binning
+QUANTIZATION_PARAMS = ["tree_method", "max_bin", "device", "missing", "feature_types", "enable_categorical"]
 
 InitializedModelDetail = namedtuple("InitializedModelDetail",
-                                    ["model_serial_number", "model", "param_grid_search", "model_name"])
+                                    ["model_serial_number", "model", "param_grid_search", "model_name",
+                                     "early_stopping"], defaults=[None])
+
+ThreadBudgetSplit = namedtuple("ThreadBudgetSplit", ["thread_budget", "search_workers", "search_jobs",
+                                                     "estimator_threads"])
 
 GridSearchedBestModel = namedtuple("GridSearchedBestModel", ["model_serial_number",
                                                              "model",
                                                              "best_model",
                                                              "best_parameters",
                                                              "best_score",
-                                                             ])
+                                                             "evaluated_candidates",
+                                                             "n_fits",
+                                                             "search_time",
+                                                             "candidate_costs",
+                                                             "inference_latency",
+                                                             "serving_cost",
+                                                             "ranked_candidates",
+                                                             ], defaults=[None, None, None, None, None, None, None])
 
 BestModel = namedtuple("BestModel", ["model_serial_number",
                                      "model",
@@ -36,7 +94,8 @@ BestModel = namedtuple("BestModel", ["model_serial_number",
 
 MetricInfoArtifact = namedtuple("MetricInfoArtifact",
                                 ["model_name", "model_object", "train_rmse", "test_rmse", "train_accuracy",
-                                 "test_accuracy", "model_accuracy", "index_number"])
+                                 "test_accuracy", "model_accuracy", "index_number", "serving_cost"],
+                                defaults=[None])
 
 
 
@@ -44,7 +103,73 @@ def evaluate_classification_model(model_list: list, X_train:np.ndarray, y_train:
     pass
 
 
-def evaluate_regression_model(model_list: list, X_train:np.ndarray, y_train:np.ndarray, X_test:np.ndarray, y_test:np.ndarray, base_accuracy:float=0.6) -> MetricInfoArtifact:
+def get_feature_key(model):
+    """
+    return: key of the features a model predicts on, models with an equal preprocessing object share it
+    """
+    if not (hasattr(model, "transform") and hasattr(model, "predict_transformed")):
+        return None
+    # CarPriceModel, equal preprocessing objects pickle to the same bytes
+    preprocessing_object = getattr(model, "preprocessing_object", None)
+    if preprocessing_object is None:
+        preprocessing_object = getattr(model, "compiled_featurizer", None)
+    return hashlib.sha256(dill.dumps(preprocessing_object)).hexdigest()
+
+
+def get_prediction_matrix(model_list: list, X, n_jobs: int = 1, feature_keys: list = None) -> np.ndarray:
+    """
+    Predicts X with every model of model_list.
+    Models that transform raw inputs themselves (CarPriceModel) transform X once per distinct
+    preprocessing object and predict on the shared features. Estimators are predicted on X as is.
+    n_jobs: number of models predicted at the same time on threads, predict releases the GIL
+    feature_keys: get_feature_key of every model, computed here when None
+    return: (number of models, number of rows) prediction matrix
+    """
+    try:
+        if feature_keys is None:
+            feature_keys = [get_feature_key(model) for model in model_list]
+        features = {}
+        for model, feature_key in zip(model_list, feature_keys):
+            if feature_key is not None and feature_key not in features:
+                features[feature_key] = model.transform(X)
+
+        def predict(model, feature_key):
+            if feature_key is None:
+                return np.asarray(model.predict(X), dtype=np.float64).ravel()
+            return np.asarray(model.predict_transformed(features[feature_key]), dtype=np.float64).ravel()
+
+        if n_jobs is not None and n_jobs != 1 and len(model_list) > 1:
+            predictions = Parallel(n_jobs=n_jobs, prefer="threads")(
+                delayed(predict)(model, feature_key) for model, feature_key in zip(model_list, feature_keys))
+        else:
+            predictions = [predict(model, feature_key) for model, feature_key in zip(model_list, feature_keys)]
+        return np.vstack(predictions)
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def get_regression_metrics(y_true: np.ndarray, prediction_matrix: np.ndarray):
+    """
+    r2 score and root mean squared error of every row of prediction_matrix, computed in one pass.
+    return: (r2 score array, rmse array) with one value per model
+    """
+    try:
+        y_true = np.asarray(y_true, dtype=np.float64)
+        squared_errors = np.square(prediction_matrix - y_true).sum(axis=1)
+        total_sum_of_squares = np.square(y_true - y_true.mean()).sum()
+        if total_sum_of_squares == 0:
+            # same as r2_score on a constant target
+            r2 = np.where(squared_errors == 0, 1.0, 0.0)
+        else:
+            r2 = 1 - squared_errors / total_sum_of_squares
+        rmse = np.sqrt(squared_errors / len(y_true))
+        return r2, rmse
+    except Exception as e:
+        raise CarException(e, sys) from e
+
+
+def evaluate_regression_model(model_list: list, X_train:np.ndarray, y_train:np.ndarray, X_test:np.ndarray, y_test:np.ndarray, base_accuracy:float=0.6, n_jobs:int=1,
+                              serving_constraint:ServingConstraint=None, serving_costs:list=None) -> MetricInfoArtifact:
     """
     Description:
     This function compare multiple regression model return best model
@@ -55,42 +180,54 @@ def evaluate_regression_model(model_list: list, X_train:np.ndarray, y_train:np.n
     y_train: Training dataset target feature
     X_test: Testing dataset input feature
     y_test: Testing dataset input feature
+    n_jobs: number of models predicted at the same time
+    serving_constraint: serving limits the selected model has to meet, not checked when None
+    serving_costs: ServingCost of every model as it is served, required with serving_constraint
 
     return
     It retured a named tuple
     
     MetricInfoArtifact = namedtuple("MetricInfo",
                                 ["model_name", "model_object", "train_rmse", "test_rmse", "train_accuracy",
-                                 "test_accuracy", "model_accuracy", "index_number"])
+                                 "test_accuracy", "model_accuracy", "index_number", "serving_cost"])
 
     """
     try:
         
-    
+        #Getting prediction of all models for training and testing dataset. CarPriceModels with an equal
+        #preprocessing object, such as a continued model and the accepted one, transform each dataset once
+        #and share the features; estimators given already transformed datasets predict on them as is
+        logging.info(f"{'>>'*30}Started evaluating models: {[type(model).__name__ for model in model_list]} {'<<'*30}")
+        feature_keys = [get_feature_key(model) for model in model_list]
+        y_train_pred = get_prediction_matrix(model_list=model_list, X=X_train, n_jobs=n_jobs, feature_keys=feature_keys)
+        y_test_pred = get_prediction_matrix(model_list=model_list, X=X_test, n_jobs=n_jobs, feature_keys=feature_keys)
+
+        #Calculating r squared score and root mean squared error of all models on training and testing dataset
+        train_accuracies, train_rmses = get_regression_metrics(y_train, y_train_pred)
+        test_accuracies, test_rmses = get_regression_metrics(y_test, y_test_pred)
+
+        # Calculating harmonic mean of train_accuracy and test_accuracy
+        model_accuracies = (2 * (train_accuracies * test_accuracies)) / (train_accuracies + test_accuracies)
+
+        if serving_constraint is not None and serving_costs is None:
+            raise Exception("Serving costs of the models are required to check the serving constraint")
+        if serving_costs is None:
+            serving_costs = [None] * len(model_list)
+
         index_number = 0
         metric_info_artifact = None
+        serving_rejected = False
         for model in model_list:
             model_name = str(model)  #getting model name based on model object
-            logging.info(f"{'>>'*30}Started evaluating model: [{type(model).__name__}] {'<<'*30}")
-            
-            #Getting prediction for training and testing dataset
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
-
-            #Calculating r squared score on training and testing dataset
-            train_acc = r2_score(y_train, y_train_pred)
-            test_acc = r2_score(y_test, y_test_pred)
-            
-            #Calculating mean squared error on training and testing dataset
-            train_rmse = np.sqrt(mean_squared_error(y_train, y_train_pred))
-            test_rmse = np.sqrt(mean_squared_error(y_test, y_test_pred))
-
-            # Calculating harmonic mean of train_accuracy and test_accuracy
-            model_accuracy = (2 * (train_acc * test_acc)) / (train_acc + test_acc)
+            train_acc = float(train_accuracies[index_number])
+            test_acc = float(test_accuracies[index_number])
+            train_rmse = float(train_rmses[index_number])
+            test_rmse = float(test_rmses[index_number])
+            model_accuracy = float(model_accuracies[index_number])
             diff_test_train_acc = abs(test_acc - train_acc)
             
             #logging all important metric
-            logging.info(f"{'>>'*30} Score {'<<'*30}")
+            logging.info(f"{'>>'*30} Score of [{type(model).__name__}] {'<<'*30}")
             logging.info(f"Train Score\t\t Test Score\t\t Average Score")
             logging.info(f"{train_acc}\t\t {test_acc}\t\t{model_accuracy}")
 
@@ -99,10 +236,19 @@ def evaluate_regression_model(model_list: list, X_train:np.ndarray, y_train:np.n
             logging.info(f"Train root mean squared error: [{train_rmse}].")
             logging.info(f"Test root mean squared error: [{test_rmse}].")
 
+            serving_cost = serving_costs[index_number]
+            if serving_cost is not None:
+                logging.info(f"Serving cost: [{serving_cost}].")
+            violations = []
+            if serving_constraint is not None and model_accuracy >= base_accuracy:
+                violations = get_serving_constraint_violations(serving_cost, serving_constraint)
+                if len(violations) > 0:
+                    serving_rejected = True
+                    logging.info(f"[{type(model).__name__}] is outside the serving constraint: {violations}")
 
             #if model accuracy is greater than base accuracy and train and test score is within certain thershold
-            #we will accept that model as accepted model
-            if model_accuracy >= base_accuracy:
+            #and it meets the serving constraint we will accept that model as accepted model
+            if model_accuracy >= base_accuracy and len(violations) == 0:
                 base_accuracy = model_accuracy
                 metric_info_artifact = MetricInfoArtifact(model_name=model_name,
                                                         model_object=model,
@@ -111,10 +257,15 @@ def evaluate_regression_model(model_list: list, X_train:np.ndarray, y_train:np.n
                                                         train_accuracy=train_acc,
                                                         test_accuracy=test_acc,
                                                         model_accuracy=model_accuracy,
-                                                        index_number=index_number)
+                                                        index_number=index_number,
+                                                        serving_cost=serving_cost)
 
                 logging.info(f"Acceptable model found {metric_info_artifact}. ")
             index_number += 1
+        if metric_info_artifact is None and serving_rejected:
+            logging.info(f"No model found within the serving constraint")
+            raise TypeError(f"Model higher than base accuracy within the serving constraint {serving_constraint} "
+                            f"is not found !!")
         if metric_info_artifact is None:
             logging.info(f"No model found with higher accuracy than base accuracy")
             raise TypeError("Model higher than base accuracy is not found !! or Check Train and test difference Threshold !!")
@@ -135,6 +286,17 @@ def get_sample_model_config_yaml_file(export_dir: str):
                 }
 
             },
+            SEARCH_WORKERS_KEY: 1,
+            EVALUATION_WORKERS_KEY: 1,
+            SEARCH_STRATEGY_KEY: {
+                SEARCH_STRATEGY_NAME_KEY: SEARCH_STRATEGY_GRID,
+                SEARCH_STRATEGY_RANDOM_STATE_KEY: 42,
+                SEARCH_STRATEGY_N_ITER_KEY: 10,
+                SEARCH_STRATEGY_RESOURCE_KEY: HALVING_RESOURCE_N_SAMPLES,
+                SEARCH_STRATEGY_FACTOR_KEY: 3,
+                SEARCH_STRATEGY_MAX_FITS_KEY: 50,
+                SEARCH_STRATEGY_MAX_TIME_KEY: 600
+            },
             MODEL_SELECTION_KEY: {
                 "module_0": {
                     MODULE_KEY: "module_of_model",
@@ -145,6 +307,11 @@ def get_sample_model_config_yaml_file(export_dir: str):
                          },
                     SEARCH_PARAM_GRID_KEY: {
                         "param_name": ['param_value_1', 'param_value_2']
+                    },
+                    EARLY_STOPPING_KEY: {
+                        EARLY_STOPPING_MAX_N_ESTIMATORS_KEY: 1000,
+                        EARLY_STOPPING_ROUNDS_KEY: 20,
+                        EARLY_STOPPING_VALIDATION_FRACTION_KEY: 0.1
                     }
 
                 },
@@ -159,15 +326,73 @@ def get_sample_model_config_yaml_file(export_dir: str):
         raise CarException(e, sys)
 
 
+def _execute_grid_search_on_memmap(model_config: dict, search_cache: SearchCache,
+                                   thread_budget_split: ThreadBudgetSplit, initialized_model: InitializedModelDetail,
+                                   input_feature_file_path: str, output_feature_file_path: str):
+    """
+    Runs in a search worker process on a ModelFactory built from model_config, with the thread budget
+    split of the parent. The training arrays are memory mapped from the files the parent wrote, so every
+    worker reads the same pages instead of receiving a pickled copy.
+    """
+    model_factory = ModelFactory(model_config=model_config, search_cache=search_cache)
+    model_factory.thread_budget_split = thread_budget_split
+    input_feature = np.load(input_feature_file_path, mmap_mode="r")
+    output_feature = np.load(output_feature_file_path, mmap_mode="r")
+    return model_factory.execute_grid_search_operation(initialized_model=initialized_model,
+                                                       input_feature=input_feature,
+                                                       output_feature=output_feature)
+
+
+def get_candidate_cost_row(parameters: dict, score, cost, cached: bool = False, is_best: bool = False) -> dict:
+    """
+    cost: CandidateCost, cost dict of the search cache or None when it was not measured
+    return: one candidate row of the candidate cost report
+    """
+    if cost is not None and not isinstance(cost, dict):
+        cost = cost._asdict()
+    cost = cost or {}
+    return {"parameters": json.dumps(parameters, sort_keys=True, default=str),
+            "mean_score": None if score is None else float(score),
+            "cached": cached,
+            "is_best": is_best,
+            "wall_seconds": cost.get("wall_seconds"),
+            "cpu_seconds": cost.get("cpu_seconds"),
+            "peak_memory_mb": cost.get("peak_memory_mb")}
+
+
 class ModelFactory:
-    def __init__(self, model_config_path: str = None,):
+    def __init__(self, model_config_path: str = None, search_cache: SearchCache = None, thread_budget: int = None,
+                 model_config: dict = None):
+        """
+        model_config: content of a model config file, used instead of reading model_config_path
+        search_cache: optional cache of cross validation scores kept across training runs,
+                      used by the grid, random and budget strategies
+        thread_budget: optional number of CPU threads the whole search may use, it is divided between
+                       search workers, cross validation jobs and estimator threads
+        """
         try:
-            self.config: dict = ModelFactory.read_params(model_config_path)
+            self.search_cache = search_cache
+            self.thread_budget = thread_budget
+            self.thread_budget_split = None
+            self.config: dict = model_config if model_config is not None else \
+                ModelFactory.read_params(model_config_path)
+            # number of model_selection entries searched at the same time, each in its own process
+            self.search_workers: int = int(self.config.get(SEARCH_WORKERS_KEY, 1))
+            # number of searched best models predicted at the same time while they are evaluated
+            self.evaluation_workers: int = int(self.config.get(EVALUATION_WORKERS_KEY, 1))
+            # record the training cost of every candidate and the inference latency of the best models
+            self.profile_candidates: bool = bool(self.config.get(PROFILE_CANDIDATES_KEY, False))
 
             self.grid_search_cv_module: str = self.config[GRID_SEARCH_KEY][MODULE_KEY]
             self.grid_search_class_name: str = self.config[GRID_SEARCH_KEY][CLASS_KEY]
             self.grid_search_property_data: dict = dict(self.config[GRID_SEARCH_KEY][PARAM_KEY])
 
+            # grid search keeps the class configured in grid_search, the other strategies use its params
+            self.search_strategy_config: dict = dict(self.config.get(SEARCH_STRATEGY_KEY) or {})
+            self.search_strategy: str = self.search_strategy_config.get(SEARCH_STRATEGY_NAME_KEY, SEARCH_STRATEGY_GRID)
+            if self.search_strategy not in SEARCH_STRATEGIES:
+                raise Exception(f"Search strategy: [{self.search_strategy}] is not one of {SEARCH_STRATEGIES}")
+
             self.models_initialization_config: dict = dict(self.config[MODEL_SELECTION_KEY])
 
             self.initialized_model_list = None
@@ -210,11 +435,564 @@ class ModelFactory:
         except Exception as e:
             raise CarException(e, sys) from e
 
+    def get_search_cv(self, initialized_model: InitializedModelDetail):
+        """
+        Builds the search object of the configured strategy, every strategy but budget
+        is a scikit-learn search class that takes the grid_search params.
+        """
+        try:
+            strategy_config = self.search_strategy_config
+            random_state = strategy_config.get(SEARCH_STRATEGY_RANDOM_STATE_KEY)
+            param_grid = dict(initialized_model.param_grid_search)
+            if self.search_strategy == SEARCH_STRATEGY_GRID:
+                grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
+                                                                 class_name=self.grid_search_class_name)
+                search_cv = grid_search_cv_ref(estimator=initialized_model.model, param_grid=param_grid)
+            elif self.search_strategy == SEARCH_STRATEGY_RANDOM:
+                search_cv_ref = ModelFactory.class_for_name(module_name="sklearn.model_selection",
+                                                            class_name="RandomizedSearchCV")
+                search_cv = search_cv_ref(estimator=initialized_model.model, param_distributions=param_grid,
+                                          n_iter=int(strategy_config.get(SEARCH_STRATEGY_N_ITER_KEY, 10)),
+                                          random_state=random_state)
+            else:
+                # halving search classes are still experimental in scikit-learn
+                importlib.import_module("sklearn.experimental.enable_halving_search_cv")
+                resource = strategy_config.get(SEARCH_STRATEGY_RESOURCE_KEY, HALVING_RESOURCE_N_SAMPLES)
+                # exhaust makes the last iteration use max_resources, so best_score is comparable between models
+                halving_params = {"resource": resource,
+                                  "factor": strategy_config.get(SEARCH_STRATEGY_FACTOR_KEY, 3),
+                                  "min_resources": "exhaust",
+                                  "random_state": random_state}
+                if resource != HALVING_RESOURCE_N_SAMPLES:
+                    # an estimator parameter such as n_estimators is the budget itself, not a searched parameter
+                    resource_values = param_grid.pop(resource, None) or \
+                        [initialized_model.model.get_params()[resource]]
+                    halving_params["max_resources"] = int(strategy_config.get(SEARCH_STRATEGY_MAX_RESOURCES_KEY,
+                                                                              max(resource_values)))
+                elif SEARCH_STRATEGY_MAX_RESOURCES_KEY in strategy_config:
+                    halving_params["max_resources"] = int(strategy_config[SEARCH_STRATEGY_MAX_RESOURCES_KEY])
+                if self.search_strategy == SEARCH_STRATEGY_HALVING:
+                    search_cv_ref = ModelFactory.class_for_name(module_name="sklearn.model_selection",
+                                                                class_name="HalvingGridSearchCV")
+                    search_cv = search_cv_ref(estimator=initialized_model.model, param_grid=param_grid,
+                                              **halving_params)
+                else:
+                    search_cv_ref = ModelFactory.class_for_name(module_name="sklearn.model_selection",
+                                                                class_name="HalvingRandomSearchCV")
+                    search_cv = search_cv_ref(estimator=initialized_model.model, param_distributions=param_grid,
+                                              n_candidates=strategy_config.get(SEARCH_STRATEGY_N_CANDIDATES_KEY,
+                                                                               "exhaust"),
+                                              **halving_params)
+            return ModelFactory.update_property_of_class(search_cv, self.grid_search_property_data)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def execute_budgeted_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
+                                          output_feature, fit_params: dict = None) -> GridSearchedBestModel:
+        """
+        Cross validates the grid points in random order until max_fits fits are done or
+        max_time seconds have passed, then refits the best one on the whole dataset.
+        At least one grid point is always evaluated.
+        fit_params: passed to every fit of the estimator
+        """
+        try:
+            strategy_config = self.search_strategy_config
+            max_fits = strategy_config.get(SEARCH_STRATEGY_MAX_FITS_KEY)
+            max_time = strategy_config.get(SEARCH_STRATEGY_MAX_TIME_KEY)
+            cv = check_cv(self.grid_search_property_data.get("cv", 5), output_feature)
+            n_splits = cv.get_n_splits(input_feature, output_feature)
+            candidates = ParameterSampler(initialized_model.param_grid_search,
+                                          n_iter=len(ParameterGrid(initialized_model.param_grid_search)),
+                                          random_state=strategy_config.get(SEARCH_STRATEGY_RANDOM_STATE_KEY))
+
+            start_time = time.perf_counter()
+            data_fingerprint = None if self.search_cache is None else \
+                SearchCache.get_data_fingerprint(input_feature, output_feature, fit_params or {})
+            n_fits = 0
+            evaluated_candidates = 0
+            candidate_costs = []
+            evaluated_parameters, scores, keys = [], [], []
+            for parameters in candidates:
+                if evaluated_candidates > 0 and (
+                        (max_fits is not None and n_fits + n_splits > max_fits) or
+                        (max_time is not None and time.perf_counter() - start_time >= max_time)):
+                    break
+                key, entry = None, None
+                if self.search_cache is not None:
+                    key = SearchCache.get_key(data_fingerprint, initialized_model.model, parameters,
+                                              self.grid_search_property_data)
+                    entry = self.search_cache.get_entry(key)
+                if entry is None:
+                    score, cost = self.cross_validate_candidate(initialized_model=initialized_model,
+                                                                parameters=parameters,
+                                                                input_feature=input_feature,
+                                                                output_feature=output_feature,
+                                                                cv=cv,
+                                                                fit_params=fit_params)
+                    cost = None if cost is None else cost._asdict()
+                    n_fits += n_splits
+                    if self.search_cache is not None:
+                        self.search_cache.set_score(key, score, cost=cost)
+                else:
+                    score, cost = entry["score"], entry["cost"]
+                candidate_costs.append(get_candidate_cost_row(parameters=parameters, score=score, cost=cost,
+                                                              cached=entry is not None))
+                evaluated_candidates += 1
+                logging.info(f"Budgeted search candidate: {parameters} score: [{score}]")
+                evaluated_parameters.append(parameters)
+                scores.append(score)
+                keys.append(key)
+
+            best_index = ModelFactory.get_best_candidate_index(initialized_model, scores)
+            best_parameters, best_score, best_key = evaluated_parameters[best_index], scores[best_index], keys[best_index]
+            candidate_costs[best_index]["is_best"] = True
+
+            best_model, refit_fits = self.fit_best_model(initialized_model=initialized_model,
+                                                         best_parameters=best_parameters,
+                                                         input_feature=input_feature,
+                                                         output_feature=output_feature,
+                                                         fit_params=fit_params,
+                                                         cache_key=best_key)
+            n_fits += refit_fits
+            if self.search_cache is not None:
+                self.search_cache.evict()
+            return GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
+                                         model=initialized_model.model,
+                                         best_model=best_model,
+                                         best_parameters=best_parameters,
+                                         best_score=best_score,
+                                         evaluated_candidates=evaluated_candidates,
+                                         n_fits=n_fits,
+                                         search_time=time.perf_counter() - start_time,
+                                         candidate_costs=candidate_costs if self.profile_candidates else None,
+                                         ranked_candidates=ModelFactory.get_ranked_candidates(
+                                             candidates=evaluated_parameters, scores=scores))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def cross_validate_candidate(self, initialized_model: InitializedModelDetail, parameters: dict, input_feature,
+                                 output_feature, cv, fit_params: dict = None):
+        """
+        Cross validates one candidate. When candidates are profiled its splits run on threads of this
+        process, so the CPU time and memory of the candidate are measured with it.
+        return: (mean score, CandidateCost or None when candidates are not profiled)
+        """
+        try:
+            estimator = clone(initialized_model.model).set_params(**parameters)
+            if not self.profile_candidates:
+                return self.get_cv_score(estimator, input_feature, output_feature, cv, fit_params), None
+            with parallel_config(backend="threading"), CostProfiler() as profiler:
+                score = self.get_cv_score(estimator, input_feature, output_feature, cv, fit_params)
+            return score, profiler.cost
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_cv_score(self, estimator, input_feature, output_feature, cv, fit_params: dict = None) -> float:
+        """
+        return: mean cross validation score, nan when every fit of the estimator failed
+        """
+        try:
+            return cross_val_score(estimator, input_feature, output_feature, cv=cv,
+                                   scoring=self.grid_search_property_data.get("scoring"),
+                                   n_jobs=self.grid_search_property_data.get("n_jobs"),
+                                   params=fit_params).mean()
+        except ValueError as e:
+            # cross_val_score raises when all fits fail, the search classes score such a candidate nan
+            logging.info(f"Every fit of candidate {estimator} failed: {e}")
+            return np.nan
+
+    @staticmethod
+    def get_best_candidate_index(initialized_model: InitializedModelDetail, scores: list) -> int:
+        """
+        return: index of the highest score, failed candidates score nan and never win
+        Raises when no candidate could be fitted.
+        """
+        scores = np.array(scores, dtype=np.float64)
+        if np.isnan(scores).all():
+            raise Exception(f"No candidate of [{type(initialized_model.model).__name__}] could be fitted, "
+                            f"every candidate scored nan")
+        return int(np.argmax(np.nan_to_num(scores, nan=-np.inf)))
+
+    @staticmethod
+    def get_ranked_candidates(candidates: list, scores: list) -> list:
+        """
+        return: (parameters, score) of every candidate that could be fitted from the highest score down,
+                equal scores in candidate order like get_best_candidate_index
+        """
+        ranked_indexes = sorted((index for index, score in enumerate(scores)
+                                 if score is not None and not np.isnan(score)), key=lambda index: -scores[index])
+        return [(candidates[index], float(scores[index])) for index in ranked_indexes]
+
+    @staticmethod
+    def get_cv_results_ranked_candidates(cv_results: dict) -> list:
+        """
+        return: ranked candidates of a search class, halving searches rank the candidates of later
+                iterations first since those are scored on more resources
+        """
+        if "iter" not in cv_results:
+            return ModelFactory.get_ranked_candidates(candidates=cv_results["params"],
+                                                      scores=cv_results["mean_test_score"])
+        ranked_candidates = []
+        for iteration in sorted(set(cv_results["iter"]), reverse=True):
+            indexes = [index for index, candidate_iteration in enumerate(cv_results["iter"])
+                       if candidate_iteration == iteration]
+            for parameters, score in ModelFactory.get_ranked_candidates(
+                    candidates=[cv_results["params"][index] for index in indexes],
+                    scores=[cv_results["mean_test_score"][index] for index in indexes]):
+                if all(parameters != ranked_parameters for ranked_parameters, _ in ranked_candidates):
+                    ranked_candidates.append((parameters, score))
+        return ranked_candidates
+
+    def fit_best_model(self, initialized_model: InitializedModelDetail, best_parameters: dict, input_feature,
+                       output_feature, fit_params: dict = None, cache_key: str = None):
+        """
+        Fits the estimator with best_parameters on the whole dataset, or loads it from the search cache.
+        return: (fitted estimator, number of fits done)
+        """
+        try:
+            if cache_key is not None:
+                best_model = self.search_cache.get_model(cache_key)
+                if best_model is not None:
+                    logging.info(f"Best {type(best_model).__name__} loaded from the search cache")
+                    return best_model, 0
+            best_model = clone(initialized_model.model).set_params(**best_parameters)
+            best_model.fit(input_feature, output_feature, **(fit_params or {}))
+            if cache_key is not None:
+                self.search_cache.set_model(cache_key, best_model)
+            return best_model, 1
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_search_candidates(self, initialized_model: InitializedModelDetail) -> list:
+        """
+        return: parameters of every candidate of the grid search, or the ones RandomizedSearchCV would sample
+        """
+        param_grid = initialized_model.param_grid_search
+        if self.search_strategy == SEARCH_STRATEGY_GRID:
+            return list(ParameterGrid(param_grid))
+        return list(ParameterSampler(param_grid,
+                                     n_iter=int(self.search_strategy_config.get(SEARCH_STRATEGY_N_ITER_KEY, 10)),
+                                     random_state=self.search_strategy_config.get(SEARCH_STRATEGY_RANDOM_STATE_KEY)))
+
+    def is_quantized_search(self, initialized_model: InitializedModelDetail) -> bool:
+        """
+        return: True when the candidates are XGBoost hist models that can all train on one binned
+                matrix per cross validation split and are scored with the default r2 score
+        """
+        estimator = initialized_model.model
+        if not hasattr(estimator, "get_xgb_params") or self.grid_search_property_data.get("scoring") is not None:
+            return False
+        estimator_params = estimator.get_params()
+        return estimator_params.get("tree_method") == QUANTIZED_TREE_METHOD and \
+            not callable(estimator_params.get("objective")) and estimator_params.get("callbacks") is None and \
+            not any(param_name in QUANTIZATION_PARAMS for param_name in initialized_model.param_grid_search)
+
+    def get_quantized_cv_scores(self, initialized_model: InitializedModelDetail, candidates: list, input_feature,
+                                output_feature, fit_params: dict = None):
+        """
+        Cross validates XGBoost hist candidates. The training rows of every split are binned once into a
+        QuantileDMatrix, the test rows and eval_set of fit_params with the same bins, and every candidate
+        trains and is scored on those matrices instead of binning its own copy of the split.
+        Candidates run on grid_search n_jobs threads, xgboost releases the GIL while it trains, or one
+        after another when they are profiled. The shared binning is not part of a candidate cost.
+        return: (mean r2 score of every candidate over the splits, CandidateCost of every candidate or None)
+        """
+        try:
+            from xgboost import QuantileDMatrix, train
+
+            estimator = initialized_model.model
+            eval_set = (fit_params or {}).get("eval_set") or []
+            cv = check_cv(self.grid_search_property_data.get("cv", 5), output_feature)
+            split_scores = []
+            split_costs = []
+            for train_index, test_index in cv.split(input_feature, output_feature):
+                train_matrix = QuantileDMatrix(input_feature[train_index], output_feature[train_index],
+                                               missing=estimator.missing, max_bin=estimator.max_bin,
+                                               nthread=estimator.n_jobs)
+                test_matrix = QuantileDMatrix(input_feature[test_index], ref=train_matrix,
+                                              missing=estimator.missing, nthread=estimator.n_jobs)
+                evals = [(QuantileDMatrix(eval_input_feature, eval_output_feature, ref=train_matrix,
+                                          missing=estimator.missing, nthread=estimator.n_jobs), f"validation_{index}")
+                         for index, (eval_input_feature, eval_output_feature) in enumerate(eval_set)]
+                test_output_feature = output_feature[test_index]
+
+                def score(parameters):
+                    candidate = clone(estimator).set_params(**parameters)
+                    early_stopping_rounds = candidate.early_stopping_rounds if len(evals) > 0 else None
+                    booster = train(candidate.get_xgb_params(), train_matrix, candidate.get_num_boosting_rounds(),
+                                    evals=evals, early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+                    # predict of an early stopped XGBRegressor uses the trees up to the best iteration
+                    iteration_range = (0, booster.best_iteration + 1) if early_stopping_rounds else (0, 0)
+                    return r2_score(test_output_feature, booster.predict(test_matrix, iteration_range=iteration_range))
+
+                if self.profile_candidates:
+                    scores, costs = [], []
+                    for parameters in candidates:
+                        with CostProfiler() as profiler:
+                            scores.append(score(parameters))
+                        costs.append(profiler.cost)
+                    split_scores.append(scores)
+                    split_costs.append(costs)
+                else:
+                    split_scores.append(Parallel(n_jobs=self.grid_search_property_data.get("n_jobs"),
+                                                 prefer="threads")(
+                        delayed(score)(parameters) for parameters in candidates))
+            candidate_costs = [combine_costs(costs) for costs in zip(*split_costs)] if self.profile_candidates else None
+            return np.mean(split_scores, axis=0), candidate_costs
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def execute_candidate_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
+                                           output_feature, fit_params: dict = None) -> GridSearchedBestModel:
+        """
+        Grid or random search over an explicit candidate list. With a search cache the score of every
+        candidate evaluated in an earlier run is taken from it and only the others are cross validated.
+        XGBoost hist candidates are cross validated on shared binned matrices, profiled candidates one
+        at a time and the others in one search of the configured grid_search class.
+        fit_params: passed to every fit of the estimator
+        """
+        try:
+            candidates = self.get_search_candidates(initialized_model=initialized_model)
+            start_time = time.perf_counter()
+            keys = [None] * len(candidates)
+            entries = [None] * len(candidates)
+            if self.search_cache is not None:
+                data_fingerprint = SearchCache.get_data_fingerprint(input_feature, output_feature, fit_params or {})
+                keys = [SearchCache.get_key(data_fingerprint, initialized_model.model, parameters,
+                                            self.grid_search_property_data) for parameters in candidates]
+                entries = [self.search_cache.get_entry(key) for key in keys]
+                logging.info(f"[{sum(entry is not None for entry in entries)}] of [{len(candidates)}] candidate "
+                             f"scores of {type(initialized_model.model).__name__} found in the search cache")
+            scores = [None if entry is None else entry["score"] for entry in entries]
+            costs = [None if entry is None else entry["cost"] for entry in entries]
+            missing_candidates = [index for index, score in enumerate(scores) if score is None]
+
+            n_fits = 0
+            if len(missing_candidates) > 0:
+                cv = check_cv(self.grid_search_property_data.get("cv", 5), output_feature)
+                if self.is_quantized_search(initialized_model=initialized_model):
+                    logging.info(f"Cross validating {type(initialized_model.model).__name__} candidates "
+                                 f"on binned matrices shared by all candidates")
+                    missing_scores, missing_costs = self.get_quantized_cv_scores(
+                        initialized_model=initialized_model,
+                        candidates=[candidates[index] for index in missing_candidates],
+                        input_feature=input_feature,
+                        output_feature=output_feature,
+                        fit_params=fit_params)
+                    n_splits = cv.get_n_splits(input_feature, output_feature)
+                elif self.profile_candidates:
+                    missing_scores, missing_costs = [], []
+                    for index in missing_candidates:
+                        score, cost = self.cross_validate_candidate(initialized_model=initialized_model,
+                                                                    parameters=candidates[index],
+                                                                    input_feature=input_feature,
+                                                                    output_feature=output_feature,
+                                                                    cv=cv,
+                                                                    fit_params=fit_params)
+                        missing_scores.append(score)
+                        missing_costs.append(cost)
+                    n_splits = cv.get_n_splits(input_feature, output_feature)
+                else:
+                    grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
+                                                                     class_name=self.grid_search_class_name)
+                    grid_search_cv = grid_search_cv_ref(
+                        estimator=initialized_model.model,
+                        param_grid=[{name: [value] for name, value in candidates[index].items()}
+                                    for index in missing_candidates])
+                    grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv,
+                                                                           self.grid_search_property_data)
+                    # the best candidate may be a cached one, it is refitted below
+                    grid_search_cv.refit = False
+                    grid_search_cv.fit(input_feature, output_feature, **(fit_params or {}))
+                    missing_scores = grid_search_cv.cv_results_["mean_test_score"]
+                    missing_costs = None
+                    n_splits = grid_search_cv.n_splits_
+                for position, index in enumerate(missing_candidates):
+                    scores[index] = float(missing_scores[position])
+                    costs[index] = None if missing_costs is None else missing_costs[position]._asdict()
+                    if self.search_cache is not None:
+                        self.search_cache.set_score(keys[index], scores[index], cost=costs[index])
+                n_fits = len(missing_candidates) * n_splits
+
+            best_index = ModelFactory.get_best_candidate_index(initialized_model, scores)
+            best_model, refit_fits = self.fit_best_model(initialized_model=initialized_model,
+                                                         best_parameters=candidates[best_index],
+                                                         input_feature=input_feature,
+                                                         output_feature=output_feature,
+                                                         fit_params=fit_params,
+                                                         cache_key=keys[best_index])
+            if self.search_cache is not None:
+                self.search_cache.evict()
+            candidate_costs = None
+            if self.profile_candidates:
+                candidate_costs = [get_candidate_cost_row(parameters=parameters, score=score, cost=cost,
+                                                          cached=entries[index] is not None,
+                                                          is_best=index == best_index)
+                                   for index, (parameters, score, cost) in enumerate(zip(candidates, scores, costs))]
+            return GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
+                                         model=initialized_model.model,
+                                         best_model=best_model,
+                                         best_parameters=candidates[best_index],
+                                         best_score=scores[best_index],
+                                         evaluated_candidates=len(candidates),
+                                         n_fits=n_fits + refit_fits,
+                                         search_time=time.perf_counter() - start_time,
+                                         candidate_costs=candidate_costs,
+                                         ranked_candidates=ModelFactory.get_ranked_candidates(candidates=candidates,
+                                                                                              scores=scores))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_early_stopping_search_setup(initialized_model: InitializedModelDetail, input_feature, output_feature):
+        """
+        Sets the estimator up to stop adding trees once the validation score stops improving.
+        XGBoost style estimators are scored on a validation split held out of the search data,
+        scikit-learn gradient boosting splits its own validation fraction inside every fit.
+        return: (estimator, search input_feature, search output_feature, fit_params)
+        """
+        try:
+            early_stopping = initialized_model.early_stopping
+            estimator = clone(initialized_model.model)
+            estimator_params = estimator.get_params()
+            estimator_update = {N_ESTIMATORS_PARAM: int(early_stopping[EARLY_STOPPING_MAX_N_ESTIMATORS_KEY])}
+            rounds = int(early_stopping.get(EARLY_STOPPING_ROUNDS_KEY, 20))
+            validation_fraction = float(early_stopping.get(EARLY_STOPPING_VALIDATION_FRACTION_KEY, 0.1))
+            random_state = early_stopping.get(EARLY_STOPPING_RANDOM_STATE_KEY, 42)
+            if "early_stopping_rounds" in estimator_params:
+                estimator_update["early_stopping_rounds"] = rounds
+                estimator.set_params(**estimator_update)
+                input_feature, validation_input_feature, output_feature, validation_output_feature = \
+                    train_test_split(input_feature, output_feature, test_size=validation_fraction,
+                                     random_state=random_state)
+                fit_params = {"eval_set": [(validation_input_feature, validation_output_feature)],
+                              "verbose": False}
+                return estimator, input_feature, output_feature, fit_params
+            if "n_iter_no_change" in estimator_params:
+                estimator_update.update({"n_iter_no_change": rounds, "validation_fraction": validation_fraction})
+                estimator.set_params(**estimator_update)
+                return estimator, input_feature, output_feature, {}
+            raise Exception(f"Early stopping is not supported for {type(estimator).__name__}, "
+                            f"it needs a boosting estimator")
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_best_n_estimators(early_stopped_model) -> int:
+        """
+        return: number of trees the early stopped model kept
+        """
+        if hasattr(early_stopped_model, "n_estimators_"):
+            return int(early_stopped_model.n_estimators_)
+        return int(early_stopped_model.best_iteration) + 1
+
+    def execute_early_stopping_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
+                                                output_feature) -> GridSearchedBestModel:
+        """
+        Searches the grid without n_estimators, every fit grows up to max_n_estimators trees and stops early.
+        The best iteration count goes into best_parameters and the best model is refitted with
+        that many trees on the whole dataset, so it needs no validation set afterwards.
+        """
+        try:
+            if self.search_strategy in [SEARCH_STRATEGY_HALVING, SEARCH_STRATEGY_HALVING_RANDOM] and \
+                    self.search_strategy_config.get(SEARCH_STRATEGY_RESOURCE_KEY) == N_ESTIMATORS_PARAM:
+                raise Exception("n_estimators can not be both the halving resource and early stopped")
+            estimator, search_input_feature, search_output_feature, fit_params = \
+                ModelFactory.get_early_stopping_search_setup(initialized_model=initialized_model,
+                                                             input_feature=input_feature,
+                                                             output_feature=output_feature)
+            grid_searched_best_model = self.execute_search_operation(
+                initialized_model=initialized_model._replace(model=estimator),
+                input_feature=search_input_feature,
+                output_feature=search_output_feature,
+                fit_params=fit_params)
+
+            start_time = time.perf_counter()
+            best_parameters = dict(grid_searched_best_model.best_parameters)
+            best_parameters[N_ESTIMATORS_PARAM] = ModelFactory.get_best_n_estimators(grid_searched_best_model.best_model)
+            logging.info(f"Early stopping kept [{best_parameters[N_ESTIMATORS_PARAM]}] trees of "
+                         f"[{estimator.get_params()[N_ESTIMATORS_PARAM]}]")
+            best_model = clone(initialized_model.model).set_params(**best_parameters)
+            best_model.fit(input_feature, output_feature)
+            return grid_searched_best_model._replace(model=initialized_model.model,
+                                                     best_model=best_model,
+                                                     best_parameters=best_parameters,
+                                                     n_fits=grid_searched_best_model.n_fits + 1,
+                                                     search_time=grid_searched_best_model.search_time +
+                                                     time.perf_counter() - start_time)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_cv_results_costs(cv_results: dict, n_splits: int, best_index: int) -> list:
+        """
+        Candidate cost rows of a search class that fitted the candidates itself, halving searches have one
+        row per candidate and iteration with n_resources in its parameters. Only the fit and score wall
+        time of the splits is known, in the processes that ran them.
+        """
+        try:
+            candidate_costs = []
+            for index, parameters in enumerate(cv_results["params"]):
+                if "n_resources" in cv_results:
+                    parameters = dict(parameters, n_resources=int(cv_results["n_resources"][index]))
+                wall_seconds = (cv_results["mean_fit_time"][index] + cv_results["mean_score_time"][index]) * n_splits
+                candidate_costs.append(get_candidate_cost_row(parameters=parameters,
+                                                              score=cv_results["mean_test_score"][index],
+                                                              cost={"wall_seconds": float(wall_seconds)},
+                                                              is_best=index == best_index))
+            return candidate_costs
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def execute_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
+                                 output_feature, fit_params: dict = None) -> GridSearchedBestModel:
+        """
+        Runs the configured search strategy.
+        fit_params: passed to every fit of the estimator
+        """
+        try:
+            if self.search_strategy == SEARCH_STRATEGY_BUDGET:
+                return self.execute_budgeted_search_operation(initialized_model=initialized_model,
+                                                              input_feature=input_feature,
+                                                              output_feature=output_feature,
+                                                              fit_params=fit_params)
+            if self.search_strategy in [SEARCH_STRATEGY_GRID, SEARCH_STRATEGY_RANDOM] and \
+                    (self.search_cache is not None or self.profile_candidates or
+                     self.is_quantized_search(initialized_model=initialized_model)):
+                return self.execute_candidate_search_operation(initialized_model=initialized_model,
+                                                               input_feature=input_feature,
+                                                               output_feature=output_feature,
+                                                               fit_params=fit_params)
+            grid_search_cv = self.get_search_cv(initialized_model=initialized_model)
+            start_time = time.perf_counter()
+            grid_search_cv.fit(input_feature, output_feature, **(fit_params or {}))
+            # halving searches list every candidate of every iteration in cv_results_
+            evaluated_candidates = len(grid_search_cv.cv_results_["params"])
+            candidate_costs = None
+            if self.profile_candidates:
+                candidate_costs = ModelFactory.get_cv_results_costs(cv_results=grid_search_cv.cv_results_,
+                                                                    n_splits=grid_search_cv.n_splits_,
+                                                                    best_index=grid_search_cv.best_index_)
+            return GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
+                                         model=initialized_model.model,
+                                         best_model=grid_search_cv.best_estimator_,
+                                         best_parameters=grid_search_cv.best_params_,
+                                         best_score=grid_search_cv.best_score_,
+                                         evaluated_candidates=evaluated_candidates,
+                                         n_fits=evaluated_candidates * grid_search_cv.n_splits_ + 1,
+                                         search_time=time.perf_counter() - start_time,
+                                         candidate_costs=candidate_costs,
+                                         ranked_candidates=ModelFactory.get_cv_results_ranked_candidates(
+                                             cv_results=grid_search_cv.cv_results_)
+                                         )
+        except Exception as e:
+            raise CarException(e, sys) from e
+
     def execute_grid_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
                                       output_feature) -> GridSearchedBestModel:
         """
-        excute_grid_search_operation(): function will perform paramter search operation and
-        it will return you the best optimistic  model with best paramter:
+        excute_grid_search_operation(): function will perform paramter search operation with the
+        configured search strategy and it will return you the best optimistic  model with best paramter:
         estimator: Model object
         param_grid: dictionary of paramter to perform search operation
         input_feature: your all input features
@@ -223,30 +1001,23 @@ class ModelFactory:
         return: Function will return GridSearchOperation object
         """
         try:
-            # instantiating GridSearchCV class
-            
-           
-            grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
-                                                             class_name=self.grid_search_class_name
-                                                             )
-
-            grid_search_cv = grid_search_cv_ref(estimator=initialized_model.model,
-                                                param_grid=initialized_model.param_grid_search)
-            grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv,
-                                                                   self.grid_search_property_data)
-
-            
             message = f'{">>"* 30} f"Training {type(initialized_model.model).__name__} Started." {"<<"*30}'
             logging.info(message)
-            grid_search_cv.fit(input_feature, output_feature)
+            with self.get_thread_limits():
+                if initialized_model.early_stopping:
+                    grid_searched_best_model = self.execute_early_stopping_search_operation(
+                        initialized_model=initialized_model,
+                        input_feature=input_feature,
+                        output_feature=output_feature)
+                else:
+                    grid_searched_best_model = self.execute_search_operation(initialized_model=initialized_model,
+                                                                             input_feature=input_feature,
+                                                                             output_feature=output_feature)
             message = f'{">>"* 30} f"Training {type(initialized_model.model).__name__}" completed {"<<"*30}'
-            grid_searched_best_model = GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
-                                                             model=initialized_model.model,
-                                                             best_model=grid_search_cv.best_estimator_,
-                                                             best_parameters=grid_search_cv.best_params_,
-                                                             best_score=grid_search_cv.best_score_
-                                                             )
-            
+            logging.info(message)
+            logging.info(f"[{self.search_strategy}] search evaluated "
+                         f"[{grid_searched_best_model.evaluated_candidates}] candidates with "
+                         f"[{grid_searched_best_model.n_fits}] fits in [{grid_searched_best_model.search_time:.2f}] seconds")
             return grid_searched_best_model
         except Exception as e:
             raise CarException(e, sys) from e
@@ -274,10 +1045,20 @@ class ModelFactory:
                 param_grid_search = model_initialization_config[SEARCH_PARAM_GRID_KEY]
                 model_name = f"{model_initialization_config[MODULE_KEY]}.{model_initialization_config[CLASS_KEY]}"
 
+                early_stopping = model_initialization_config.get(EARLY_STOPPING_KEY)
+                if early_stopping and N_ESTIMATORS_PARAM in param_grid_search:
+                    # early stopping picks the number of trees, searching it as well only repeats fits
+                    logging.info(f"Dropping {N_ESTIMATORS_PARAM} from the search grid of {model_name}, "
+                                 f"early stopping picks it")
+                    param_grid_search = {param_name: param_values
+                                         for param_name, param_values in param_grid_search.items()
+                                         if param_name != N_ESTIMATORS_PARAM}
+
                 model_initialization_config = InitializedModelDetail(model_serial_number=model_serial_number,
                                                                      model=model,
                                                                      param_grid_search=param_grid_search,
-                                                                     model_name=model_name
+                                                                     model_name=model_name,
+                                                                     early_stopping=early_stopping
                                                                      )
 
                 initialized_model_list.append(model_initialization_config)
@@ -313,18 +1094,163 @@ class ModelFactory:
                                                               output_feature) -> List[GridSearchedBestModel]:
 
         try:
-            self.grid_searched_best_model_list = []
-            for initialized_model_list in initialized_model_list:
-                grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
-                    initialized_model=initialized_model_list,
+            configured_model_list = initialized_model_list
+            search_workers = min(self.search_workers, len(initialized_model_list))
+            if self.thread_budget is not None:
+                initialized_model_list = self.apply_thread_budget(initialized_model_list=initialized_model_list)
+                search_workers = self.thread_budget_split.search_workers
+            if search_workers > 1:
+                self.grid_searched_best_model_list = self.initiate_parallel_parameter_search_for_initialized_models(
+                    initialized_model_list=initialized_model_list,
                     input_feature=input_feature,
-                    output_feature=output_feature
-                )
-                self.grid_searched_best_model_list.append(grid_searched_best_model)
+                    output_feature=output_feature,
+                    search_workers=search_workers)
+            else:
+                self.grid_searched_best_model_list = []
+                for initialized_model in initialized_model_list:
+                    grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
+                        initialized_model=initialized_model,
+                        input_feature=input_feature,
+                        output_feature=output_feature
+                    )
+                    self.grid_searched_best_model_list.append(grid_searched_best_model)
+            if self.thread_budget is not None:
+                self.grid_searched_best_model_list = ModelFactory.restore_estimator_threads(
+                    grid_searched_best_model_list=self.grid_searched_best_model_list,
+                    initialized_model_list=configured_model_list)
+            if self.profile_candidates:
+                # measured one model at a time after the searches, with the n_jobs the model is served with
+                self.grid_searched_best_model_list = [
+                    grid_searched_best_model._replace(inference_latency=get_inference_latency(
+                        model=grid_searched_best_model.best_model, input_feature=input_feature))
+                    for grid_searched_best_model in self.grid_searched_best_model_list]
             return self.grid_searched_best_model_list
         except Exception as e:
             raise CarException(e, sys) from e
 
+    @staticmethod
+    def restore_estimator_threads(grid_searched_best_model_list: List[GridSearchedBestModel],
+                                  initialized_model_list: List[InitializedModelDetail]) -> List[GridSearchedBestModel]:
+        """
+        The thread budget only applies to the search, the best models get the n_jobs configured in model.yaml back.
+        """
+        try:
+            restored_model_list = []
+            for grid_searched_best_model, initialized_model in zip(grid_searched_best_model_list,
+                                                                   initialized_model_list):
+                configured_params = initialized_model.model.get_params()
+                if "n_jobs" in configured_params:
+                    grid_searched_best_model.best_model.set_params(n_jobs=configured_params["n_jobs"])
+                restored_model_list.append(grid_searched_best_model._replace(model=initialized_model.model))
+            return restored_model_list
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def initiate_parallel_parameter_search_for_initialized_models(self,
+                                                                  initialized_model_list: List[InitializedModelDetail],
+                                                                  input_feature,
+                                                                  output_feature,
+                                                                  search_workers: int) -> List[GridSearchedBestModel]:
+        """
+        Runs the search of every initialized model in its own worker process.
+        input_feature and output_feature are written once to .npy files that the workers memory map.
+        Results are returned in initialized_model_list order, the same list the serial search returns.
+        """
+        try:
+            logging.info(f"Searching {len(initialized_model_list)} models on {search_workers} worker processes")
+            with tempfile.TemporaryDirectory(prefix="model_search_") as search_dir:
+                input_feature_file_path = os.path.join(search_dir, "input_feature.npy")
+                output_feature_file_path = os.path.join(search_dir, "output_feature.npy")
+                np.save(input_feature_file_path, np.ascontiguousarray(input_feature))
+                np.save(output_feature_file_path, np.ascontiguousarray(output_feature))
+                # workers get the model config with the cross validation jobs of the thread budget,
+                # not this factory with its search results
+                model_config = dict(self.config)
+                model_config[GRID_SEARCH_KEY] = dict(self.config[GRID_SEARCH_KEY],
+                                                     **{PARAM_KEY: dict(self.grid_search_property_data)})
+                # loky workers are fresh interpreters, nothing is forked from a process that may hold
+                # OpenMP threads, and the app module is not imported again in them
+                return Parallel(n_jobs=search_workers, backend="loky")(
+                    delayed(_execute_grid_search_on_memmap)(model_config, self.search_cache,
+                                                            self.thread_budget_split, initialized_model,
+                                                            input_feature_file_path, output_feature_file_path)
+                    for initialized_model in initialized_model_list)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_candidate_costs(self) -> list:
+        """
+        return: candidate cost rows of every searched model, the best candidate of a model carries
+                the inference latency of its best model; empty when candidates are not profiled
+        """
+        try:
+            candidate_costs = []
+            for grid_searched_best_model in self.grid_searched_best_model_list or []:
+                inference_latency = grid_searched_best_model.inference_latency or {}
+                for candidate_cost in grid_searched_best_model.candidate_costs or []:
+                    latency = inference_latency if candidate_cost["is_best"] else {}
+                    candidate_costs.append({"model_serial_number": grid_searched_best_model.model_serial_number,
+                                            "model": type(grid_searched_best_model.model).__name__,
+                                            **candidate_cost,
+                                            "single_row_latency_ms": latency.get("single_row_latency_ms"),
+                                            "batch_latency_per_row_ms": latency.get("batch_latency_per_row_ms")})
+            return candidate_costs
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_thread_budget_split(self, n_models: int) -> ThreadBudgetSplit:
+        """
+        Divides thread_budget from the outside in: search workers first, then the cross validation
+        jobs of every worker as configured in grid_search params (n_jobs -1 takes all of them),
+        and the threads left over go to each estimator fit and its BLAS/OpenMP pools.
+        """
+        try:
+            thread_budget = max(int(self.thread_budget), 1)
+            search_workers = max(min(self.search_workers, n_models, thread_budget), 1)
+            worker_threads = thread_budget // search_workers
+            search_jobs = self.grid_search_property_data.get("n_jobs") or 1
+            if search_jobs < 0:
+                search_jobs = worker_threads
+            search_jobs = max(min(search_jobs, worker_threads), 1)
+            estimator_threads = max(worker_threads // search_jobs, 1)
+            return ThreadBudgetSplit(thread_budget=thread_budget, search_workers=search_workers,
+                                     search_jobs=search_jobs, estimator_threads=estimator_threads)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def apply_thread_budget(self, initialized_model_list: List[InitializedModelDetail]) -> List[InitializedModelDetail]:
+        """
+        Sets the thread budget split on the search params and on the n_jobs of every estimator.
+        return: initialized models with their thread count set
+        """
+        try:
+            self.thread_budget_split = self.get_thread_budget_split(n_models=len(initialized_model_list))
+            split = self.thread_budget_split
+            logging.info(f"CPU thread budget [{split.thread_budget}]: [{split.search_workers}] search workers x "
+                         f"[{split.search_jobs}] cross validation jobs x [{split.estimator_threads}] estimator threads")
+            self.grid_search_property_data["n_jobs"] = split.search_jobs
+            budgeted_model_list = []
+            for initialized_model in initialized_model_list:
+                model = initialized_model.model
+                if "n_jobs" in model.get_params():
+                    model = clone(model).set_params(n_jobs=split.estimator_threads)
+                budgeted_model_list.append(initialized_model._replace(model=model))
+            return budgeted_model_list
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_thread_limits(self) -> ExitStack:
+        """
+        return: context capping BLAS/OpenMP pools of this process and of cross validation worker
+                processes to the estimator threads of the thread budget, a no-op without a budget
+        """
+        thread_limits = ExitStack()
+        if self.thread_budget_split is not None:
+            estimator_threads = self.thread_budget_split.estimator_threads
+            thread_limits.enter_context(threadpool_limits(limits=estimator_threads))
+            thread_limits.enter_context(parallel_config(backend="loky", inner_max_num_threads=estimator_threads))
+        return thread_limits
+
     @staticmethod
     def get_model_detail(model_details: List[InitializedModelDetail],
                          model_serial_number: str) -> InitializedModelDetail:
@@ -338,6 +1264,74 @@ class ModelFactory:
         except Exception as e:
             raise CarException(e, sys) from e
 
+    def fit_candidate(self, initialized_model: InitializedModelDetail, parameters: dict, input_feature,
+                      output_feature):
+        """
+        Fits a searched candidate on the whole dataset the way its search refits the best one,
+        early stopped candidates first pick their number of trees.
+        return: (fitted estimator, parameters of the fitted estimator)
+        """
+        try:
+            if initialized_model.early_stopping:
+                estimator, search_input_feature, search_output_feature, fit_params = \
+                    ModelFactory.get_early_stopping_search_setup(initialized_model=initialized_model,
+                                                                 input_feature=input_feature,
+                                                                 output_feature=output_feature)
+                estimator.set_params(**parameters).fit(search_input_feature, search_output_feature, **fit_params)
+                parameters = dict(parameters)
+                parameters[N_ESTIMATORS_PARAM] = ModelFactory.get_best_n_estimators(estimator)
+            estimator = clone(initialized_model.model).set_params(**parameters)
+            estimator.fit(input_feature, output_feature)
+            return estimator, parameters
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def select_serving_candidates(self, serving_constraint: ServingConstraint, get_serving_cost, input_feature,
+                                  output_feature) -> List[GridSearchedBestModel]:
+        """
+        Measures the serving cost of every searched best model, one model at a time since models predicting
+        in parallel would slow each other down. A best model outside serving_constraint is replaced by the
+        highest scoring candidate of its search that meets it, so a cheaper configuration of the same model
+        still competes. A model without such a candidate keeps its best model and cost, the evaluation
+        rejects it.
+        get_serving_cost: function of a fitted estimator returning the ServingCost of the model serving it
+        """
+        try:
+            selected_model_list = []
+            for grid_searched_best_model in self.grid_searched_best_model_list:
+                serving_cost = get_serving_cost(grid_searched_best_model.best_model)
+                grid_searched_best_model = grid_searched_best_model._replace(serving_cost=serving_cost)
+                violations = get_serving_constraint_violations(serving_cost, serving_constraint)
+                if len(violations) > 0:
+                    logging.info(f"Best model of {grid_searched_best_model.model_serial_number} is outside "
+                                 f"the serving constraint: {violations}")
+                    initialized_model = ModelFactory.get_model_detail(
+                        model_details=self.initialized_model_list,
+                        model_serial_number=grid_searched_best_model.model_serial_number)
+                    for parameters, score in grid_searched_best_model.ranked_candidates or []:
+                        if all(grid_searched_best_model.best_parameters.get(name) == value
+                               for name, value in parameters.items()):
+                            continue
+                        candidate_model, candidate_parameters = self.fit_candidate(
+                            initialized_model=initialized_model, parameters=parameters,
+                            input_feature=input_feature, output_feature=output_feature)
+                        candidate_serving_cost = get_serving_cost(candidate_model)
+                        violations = get_serving_constraint_violations(candidate_serving_cost, serving_constraint)
+                        logging.info(f"Candidate {parameters} score: [{score}] serving cost: "
+                                     f"[{candidate_serving_cost}] violations: {violations}")
+                        if len(violations) == 0:
+                            grid_searched_best_model = grid_searched_best_model._replace(
+                                best_model=candidate_model, best_parameters=candidate_parameters, best_score=score,
+                                serving_cost=candidate_serving_cost)
+                            logging.info(f"Best candidate of {grid_searched_best_model.model_serial_number} "
+                                         f"within the serving constraint: {candidate_parameters}")
+                            break
+                selected_model_list.append(grid_searched_best_model)
+            self.grid_searched_best_model_list = selected_model_list
+            return self.grid_searched_best_model_list
+        except Exception as e:
+            raise CarException(e, sys) from e
+
     @staticmethod
     def get_best_model_from_grid_searched_best_model_list(grid_searched_best_model_list: List[GridSearchedBestModel],
                                                           base_accuracy=0.6
@@ -357,7 +1351,14 @@ class ModelFactory:
         except Exception as e:
             raise CarException(e, sys) from e
 
-    def get_best_model(self, X, y,base_accuracy=0.6) -> BestModel:
+    def get_best_model(self, X, y,base_accuracy=0.6, serving_constraint: ServingConstraint = None,
+                       get_serving_cost=None) -> BestModel:
+        """
+        serving_constraint: serving limits, the searched best models are the best candidates within them
+                            when there is one, evaluate_regression_model rejects the ones outside
+        get_serving_cost: function of a fitted estimator returning the ServingCost of the model serving it,
+                          required with serving_constraint
+        """
         try:
             logging.info("Started Initializing model from config file")
             initialized_model_list = self.get_initialized_model_list()
@@ -367,6 +1368,11 @@ class ModelFactory:
                 input_feature=X,
                 output_feature=y
             )
+            if serving_constraint is not None:
+                grid_searched_best_model_list = self.select_serving_candidates(serving_constraint=serving_constraint,
+                                                                               get_serving_cost=get_serving_cost,
+                                                                               input_feature=X,
+                                                                               output_feature=y)
             return ModelFactory.get_best_model_from_grid_searched_best_model_list(grid_searched_best_model_list,
                                                                                   base_accuracy=base_accuracy)
         except Exception as e:
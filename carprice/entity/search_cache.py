@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sys
+
+import dill
+import numpy as np
+
+from carprice.exception import CarException
+from carprice.logger import logging
+
+SCORE_FILE_EXTENSION = ".json"
+MODEL_FILE_EXTENSION = ".pkl"
+# grid_search params that do not change the cross validation scores
+NON_SCORING_SEARCH_PARAMS = ["verbose", "n_jobs", "pre_dispatch", "refit", "return_train_score"]
+# estimator params that only set how many threads a fit uses
+NON_SCORING_ESTIMATOR_PARAMS = ["n_jobs", "nthread", "verbose", "verbosity"]
+
+
+def _update_hash(hasher, value):
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        hasher.update(f"ndarray:{array.dtype.str}:{array.shape}".encode())
+        hasher.update(memoryview(array).cast("B"))
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict:{len(value)}".encode())
+        for key in sorted(value):
+            hasher.update(str(key).encode())
+            _update_hash(hasher, value[key])
+    else:
+        hasher.update(repr(value).encode())
+
+
+class SearchCache:
+    """
+    On disk cache of cross validation scores of search candidates, kept across training runs.
+    An entry is keyed on a content hash of the training data, the estimator class, every estimator
+    parameter and the cross validation settings, so a run on unchanged data and model.yaml fits nothing
+    and an extended grid only fits the new grid points.
+    The fitted best estimator of a search can be cached under the same key.
+    Every entry is a file, reading one touches its mtime and the least recently used files are
+    removed once there are more than max_entries or they take more than max_size_mb.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, max_size_mb: float = None, cache_best_model: bool = True):
+        try:
+            self.cache_dir = cache_dir
+            self.max_entries = int(max_entries)
+            self.max_size_bytes = None if max_size_mb is None else int(float(max_size_mb) * 1024 * 1024)
+            self.cache_best_model = cache_best_model
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_data_fingerprint(*values) -> str:
+        """
+        return: content hash of arrays, or lists and dicts holding arrays such as fit params
+        """
+        try:
+            hasher = hashlib.sha256()
+            for value in values:
+                _update_hash(hasher, value)
+            return hasher.hexdigest()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    @staticmethod
+    def get_key(data_fingerprint: str, estimator, parameters: dict, search_settings: dict) -> str:
+        """
+        estimator: unfitted estimator the candidate parameters are set on
+        parameters: candidate parameters
+        search_settings: grid_search params, the ones not changing scores are left out
+        """
+        try:
+            estimator_params = dict(estimator.get_params(deep=False))
+            estimator_params.update(parameters)
+            key_data = {"data": data_fingerprint,
+                        "estimator": f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+                        "params": {name: repr(value) for name, value in estimator_params.items()
+                                   if name not in NON_SCORING_ESTIMATOR_PARAMS},
+                        "search": {name: repr(value) for name, value in search_settings.items()
+                                   if name not in NON_SCORING_SEARCH_PARAMS}}
+            return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _get_file_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{extension}")
+
+    def _write(self, file_path: str, write_function):
+        # written to a temporary file first, parallel search workers never read a partial entry
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "wb") as cache_file:
+            write_function(cache_file)
+        os.replace(tmp_file_path, file_path)
+
+    def _touch(self, file_path: str) -> bool:
+        try:
+            os.utime(file_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_entry(self, key: str):
+        """
+        return: {"score": mean cross validation score, "cost": training cost or None}, None on a miss
+        """
+        file_path = self._get_file_path(key, SCORE_FILE_EXTENSION)
+        if not self._touch(file_path):
+            return None
+        try:
+            with open(file_path) as cache_file:
+                entry = json.load(cache_file)
+            return {"score": float(entry["score"]), "cost": entry.get("cost")}
+        except Exception:
+            logging.exception(f"Ignoring unreadable search cache entry: [{file_path}]")
+            return None
+
+    def get_score(self, key: str):
+        """
+        return: mean cross validation score, None on a miss
+        """
+        entry = self.get_entry(key)
+        return None if entry is None else entry["score"]
+
+    def set_score(self, key: str, score: float, cost: dict = None):
+        """
+        cost: optional training cost of the candidate, returned with the score by get_entry
+        """
+        try:
+            entry = {"score": float(score), "cost": cost}
+            self._write(self._get_file_path(key, SCORE_FILE_EXTENSION),
+                        lambda cache_file: cache_file.write(json.dumps(entry).encode()))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_model(self, key: str):
+        """
+        return: fitted estimator, None on a miss
+        """
+        if not self.cache_best_model:
+            return None
+        file_path = self._get_file_path(key, MODEL_FILE_EXTENSION)
+        if not self._touch(file_path):
+            return None
+        try:
+            with open(file_path, "rb") as cache_file:
+                return dill.load(cache_file)
+        except Exception:
+            logging.exception(f"Ignoring unreadable search cache entry: [{file_path}]")
+            return None
+
+    def set_model(self, key: str, model):
+        if not self.cache_best_model:
+            return
+        try:
+            self._write(self._get_file_path(key, MODEL_FILE_EXTENSION),
+                        lambda cache_file: dill.dump(model, cache_file))
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache is within max_entries and max_size_mb.
+        return: number of removed entries
+        """
+        try:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith((SCORE_FILE_EXTENSION, MODEL_FILE_EXTENSION)):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            entries.sort()
+            total_size = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, file_path in entries:
+                if len(entries) - removed <= self.max_entries and \
+                        (self.max_size_bytes is None or total_size <= self.max_size_bytes):
+                    break
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+                removed += 1
+                total_size -= size
+            if removed > 0:
+                logging.info(f"Evicted [{removed}] least recently used search cache entries")
+            return removed
+        except Exception as e:
+            raise CarException(e, sys) from e
@@ -0,0 +1,171 @@
+import glob
+import os
+import sys
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+from carprice.exception import CarException
+
+STAGE_FORM_PARSING = "form_parsing"
+STAGE_FRAME_CONSTRUCTION = "frame_construction"
+STAGE_MODEL_LOOKUP = "model_lookup"
+STAGE_CACHE_LOOKUP = "cache_lookup"
+STAGE_PREPROCESSING = "preprocessing"
+STAGE_MODEL_PREDICT = "model_predict"
+STAGE_COALESCED_PREDICT = "coalesced_predict"
+STAGE_MODEL_LOAD = "model_load"
+SERVING_STAGES = [STAGE_FORM_PARSING, STAGE_FRAME_CONSTRUCTION, STAGE_MODEL_LOOKUP, STAGE_CACHE_LOOKUP,
+                  STAGE_PREPROCESSING, STAGE_MODEL_PREDICT, STAGE_COALESCED_PREDICT, STAGE_MODEL_LOAD]
+
+ENDPOINT_PREDICT = "predict"
+ENDPOINT_API_PREDICT = "api_predict"
+SERVING_ENDPOINTS = [ENDPOINT_PREDICT, ENDPOINT_API_PREDICT]
+
+MODEL_RELOAD_SUCCESS = "success"
+MODEL_RELOAD_FAILURE = "failure"
+MODEL_RELOAD_RESULTS = [MODEL_RELOAD_SUCCESS, MODEL_RELOAD_FAILURE]
+
+# upper bounds in seconds, the last bucket is +Inf
+LATENCY_BUCKETS = [0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+METRICS_FILE_PREFIX = "serving_metrics_"
+
+
+class ServingMetrics:
+    """
+    Fixed bucket latency histograms per serving stage plus request and error counters.
+    Every process writes to its own memory mapped file in metrics_dir, so recording is an
+    in-place increment, and export sums the files of all gunicorn workers.
+
+    Layout of the float64 array of a process:
+    [stage histograms (stages x buckets+1) | stage latency sums | requests | errors | model reloads | model version]
+    """
+
+    def __init__(self, metrics_dir: str):
+        try:
+            self.metrics_dir = metrics_dir
+            self.n_buckets = len(LATENCY_BUCKETS) + 1
+            self.stage_index = {stage: index for index, stage in enumerate(SERVING_STAGES)}
+            self.endpoint_index = {endpoint: index for index, endpoint in enumerate(SERVING_ENDPOINTS)}
+            self.sum_offset = len(SERVING_STAGES) * self.n_buckets
+            self.request_offset = self.sum_offset + len(SERVING_STAGES)
+            self.error_offset = self.request_offset + len(SERVING_ENDPOINTS)
+            self.reload_index = {result: index for index, result in enumerate(MODEL_RELOAD_RESULTS)}
+            self.reload_offset = self.error_offset + len(SERVING_ENDPOINTS)
+            self.model_version_offset = self.reload_offset + len(MODEL_RELOAD_RESULTS)
+            self.size = self.model_version_offset + 1
+            self._lock = threading.Lock()
+            self._pid = None
+            self._values = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def reset(self):
+        """
+        Removes the files of previous runs. Call it once per server start, before workers fork.
+        """
+        try:
+            for file_path in glob.glob(os.path.join(self.metrics_dir, f"{METRICS_FILE_PREFIX}*.npy")):
+                os.remove(file_path)
+            self._pid = None
+            self._values = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _get_values(self) -> np.ndarray:
+        # the file is created lazily so each forked worker gets its own
+        pid = os.getpid()
+        if self._pid != pid:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            file_path = os.path.join(self.metrics_dir, f"{METRICS_FILE_PREFIX}{pid}.npy")
+            values = np.lib.format.open_memmap(file_path, mode="w+", dtype=np.float64, shape=(self.size,))
+            # a plain ndarray view of the mapping avoids the memmap subclass overhead on every increment
+            self._values = values.view(np.ndarray)
+            self._pid = pid
+        return self._values
+
+    def observe(self, stage: str, duration: float):
+        bucket = bisect_left(LATENCY_BUCKETS, duration)
+        stage_index = self.stage_index[stage]
+        with self._lock:
+            values = self._get_values()
+            values[stage_index * self.n_buckets + bucket] += 1
+            values[self.sum_offset + stage_index] += duration
+
+    def count_request(self, endpoint: str):
+        with self._lock:
+            self._get_values()[self.request_offset + self.endpoint_index[endpoint]] += 1
+
+    def count_error(self, endpoint: str):
+        with self._lock:
+            self._get_values()[self.error_offset + self.endpoint_index[endpoint]] += 1
+
+    def count_model_reload(self, result: str):
+        with self._lock:
+            self._get_values()[self.reload_offset + self.reload_index[result]] += 1
+
+    def set_model_version(self, model_version: int):
+        with self._lock:
+            values = self._get_values()
+            if values[self.model_version_offset] != model_version:
+                values[self.model_version_offset] = model_version
+
+    def collect(self) -> tuple:
+        """
+        return: (sum of the arrays of all processes, max model version, number of processes)
+        """
+        try:
+            total = np.zeros(self.size, dtype=np.float64)
+            model_version = 0
+            file_paths = glob.glob(os.path.join(self.metrics_dir, f"{METRICS_FILE_PREFIX}*.npy"))
+            for file_path in file_paths:
+                values = np.load(file_path, mmap_mode="r")
+                if values.shape != total.shape:
+                    continue
+                total += values
+                model_version = max(model_version, values[self.model_version_offset])
+            return total, model_version, len(file_paths)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def to_prometheus_text(self) -> str:
+        try:
+            total, model_version, n_processes = self.collect()
+            lines = ["# HELP carprice_stage_latency_seconds Latency of each stage of the prediction path.",
+                     "# TYPE carprice_stage_latency_seconds histogram"]
+            for stage, stage_index in self.stage_index.items():
+                counts = np.cumsum(total[stage_index * self.n_buckets:(stage_index + 1) * self.n_buckets])
+                for upper_bound, count in zip(LATENCY_BUCKETS + ["+Inf"], counts):
+                    lines.append(f'carprice_stage_latency_seconds_bucket{{stage="{stage}",le="{upper_bound}"}} '
+                                 f'{int(count)}')
+                lines.append(f'carprice_stage_latency_seconds_sum{{stage="{stage}"}} '
+                             f'{total[self.sum_offset + stage_index]}')
+                lines.append(f'carprice_stage_latency_seconds_count{{stage="{stage}"}} {int(counts[-1])}')
+
+            lines += ["# HELP carprice_requests_total Prediction requests per endpoint.",
+                      "# TYPE carprice_requests_total counter"]
+            for endpoint, endpoint_index in self.endpoint_index.items():
+                lines.append(f'carprice_requests_total{{endpoint="{endpoint}"}} '
+                             f'{int(total[self.request_offset + endpoint_index])}')
+            lines += ["# HELP carprice_request_errors_total Failed prediction requests per endpoint.",
+                      "# TYPE carprice_request_errors_total counter"]
+            for endpoint, endpoint_index in self.endpoint_index.items():
+                lines.append(f'carprice_request_errors_total{{endpoint="{endpoint}"}} '
+                             f'{int(total[self.error_offset + endpoint_index])}')
+            lines += ["# HELP carprice_model_reloads_total Model loads by the serving processes per result.",
+                      "# TYPE carprice_model_reloads_total counter"]
+            for result, reload_index in self.reload_index.items():
+                lines.append(f'carprice_model_reloads_total{{result="{result}"}} '
+                             f'{int(total[self.reload_offset + reload_index])}')
+            lines += ["# HELP carprice_model_version Latest model version served by any worker.",
+                      "# TYPE carprice_model_version gauge",
+                      f"carprice_model_version {int(model_version)}",
+                      "# HELP carprice_metrics_processes Number of processes that reported metrics.",
+                      "# TYPE carprice_metrics_processes gauge",
+                      f"carprice_metrics_processes {n_processes}"]
+            return "\n".join(lines) + "\n"
+        except Exception as e:
+            raise CarException(e, sys) from e
@@ -0,0 +1,193 @@
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from carprice.exception import CarException
+from carprice.logger import logging
+
+SHADOW_ROLE_SERVING = "serving"
+SHADOW_ROLE_CANDIDATE = "candidate"
+SHADOW_ROLE_RETIRED = "retired"
+
+
+class RollingModelStats:
+    """
+    Last window latencies and differences to the serving model of one model version.
+    """
+
+    def __init__(self, model_version: int, role: str, window: int):
+        self.model_version = model_version
+        self.role = role
+        self.latencies = deque(maxlen=window)
+        self.abs_diffs = deque(maxlen=window)
+        self.rel_diffs = deque(maxlen=window)
+        self.samples = 0
+        self.errors = 0
+
+    def get_stats(self) -> dict:
+        latencies = np.array(self.latencies, dtype=np.float64) * 1000
+        abs_diffs = np.array(self.abs_diffs, dtype=np.float64)
+        rel_diffs = np.array(self.rel_diffs, dtype=np.float64)
+        return {"model_version": self.model_version,
+                "role": self.role,
+                "samples": self.samples,
+                "errors": self.errors,
+                "p50_latency_ms": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                "p99_latency_ms": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+                "mean_abs_diff": round(float(abs_diffs.mean()), 2) if len(abs_diffs) else None,
+                "mean_rel_diff": round(float(rel_diffs.mean()), 6) if len(rel_diffs) else None}
+
+
+class ShadowScorer:
+    """
+    Scores live single car requests with a candidate model on a background thread.
+    The request path only calls submit, a put_nowait on a bounded queue, so it never waits:
+    when the worker falls behind the request is dropped and counted.
+    The worker times the candidate, compares its price with the one the serving model
+    returned and keeps rolling stats per model version.
+    """
+
+    def __init__(self, queue_size: int, window: int):
+        """
+        queue_size: maximum number of requests waiting to be shadow scored
+        window: number of latest requests the rolling stats are computed over
+        """
+        try:
+            self.window = window
+            self.candidate_model = None
+            self.submitted = 0
+            self.dropped = 0
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._stats = {}
+            self._stats_lock = threading.Lock()
+            self._worker = None
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def start(self):
+        try:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="carprice-shadow-scorer", daemon=True)
+                self._worker.start()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def _get_model_stats(self, model_version: int, role: str) -> RollingModelStats:
+        model_stats = self._stats.get(model_version)
+        if model_stats is None:
+            model_stats = RollingModelStats(model_version=model_version, role=role, window=self.window)
+            self._stats[model_version] = model_stats
+        model_stats.role = role
+        return model_stats
+
+    def set_candidate(self, loaded_model):
+        """
+        loaded_model: LoadedCarPriceModel to shadow score, None stops shadow scoring
+        """
+        try:
+            with self._stats_lock:
+                if loaded_model is not None:
+                    self._stats.pop(loaded_model.model_version, None)
+                    self._get_model_stats(loaded_model.model_version, SHADOW_ROLE_CANDIDATE)
+            self.candidate_model = loaded_model
+            if loaded_model is not None:
+                logging.info(f"Shadow scoring candidate model version: [{loaded_model.model_version}]")
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def promote_candidate(self):
+        """
+        Stops shadow scoring and marks the candidate as the serving model in the stats.
+        """
+        try:
+            candidate_model = self.candidate_model
+            self.candidate_model = None
+            if candidate_model is None:
+                return
+            with self._stats_lock:
+                for model_stats in self._stats.values():
+                    if model_stats.role == SHADOW_ROLE_SERVING:
+                        model_stats.role = SHADOW_ROLE_RETIRED
+                self._get_model_stats(candidate_model.model_version, SHADOW_ROLE_SERVING)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_candidate_samples(self) -> int:
+        candidate_model = self.candidate_model
+        if candidate_model is None:
+            return 0
+        model_stats = self._stats.get(candidate_model.model_version)
+        return 0 if model_stats is None else model_stats.samples
+
+    def submit(self, record: dict, serving_model_version: int, serving_prediction: float,
+               serving_latency: float = None) -> bool:
+        """
+        Queues one request for shadow scoring, never blocks.
+        serving_latency: seconds the serving model took, None when the price came from the cache
+        return: False if there is no candidate or the request was dropped
+        """
+        if self.candidate_model is None:
+            return False
+        try:
+            self._queue.put_nowait((record, serving_model_version, serving_prediction, serving_latency))
+            self.submitted += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _score(self, record: dict, serving_model_version: int, serving_prediction: float, serving_latency: float):
+        candidate_model = self.candidate_model
+        if candidate_model is None or candidate_model.model_version == serving_model_version:
+            return
+        start_time = time.perf_counter()
+        try:
+            candidate_prediction = float(candidate_model.model.predict(record)[0])
+            error = False
+        except Exception:
+            logging.exception(f"Shadow prediction failed for model version: [{candidate_model.model_version}]")
+            error = True
+        latency = time.perf_counter() - start_time
+
+        with self._stats_lock:
+            serving_stats = self._get_model_stats(serving_model_version, SHADOW_ROLE_SERVING)
+            serving_stats.samples += 1
+            if serving_latency is not None:
+                serving_stats.latencies.append(serving_latency)
+            candidate_stats = self._get_model_stats(candidate_model.model_version, SHADOW_ROLE_CANDIDATE)
+            candidate_stats.samples += 1
+            if error:
+                candidate_stats.errors += 1
+                return
+            candidate_stats.latencies.append(latency)
+            abs_diff = abs(candidate_prediction - serving_prediction)
+            candidate_stats.abs_diffs.append(abs_diff)
+            if serving_prediction != 0:
+                candidate_stats.rel_diffs.append(abs_diff / abs(serving_prediction))
+
+    def _run(self):
+        while True:
+            record, serving_model_version, serving_prediction, serving_latency = self._queue.get()
+            try:
+                self._score(record, serving_model_version, serving_prediction, serving_latency)
+            except Exception:
+                logging.exception("Shadow scoring failed")
+
+    def get_stats(self) -> dict:
+        try:
+            with self._stats_lock:
+                models = [model_stats.get_stats() for model_stats in
+                          sorted(self._stats.values(), key=lambda model_stats: model_stats.model_version,
+                                 reverse=True)]
+            candidate_model = self.candidate_model
+            return {"candidate_model_version": None if candidate_model is None else candidate_model.model_version,
+                    "submitted": self.submitted,
+                    "dropped": self.dropped,
+                    "queue_depth": self._queue.qsize(),
+                    "models": models}
+        except Exception as e:
+            raise CarException(e, sys) from e
@@ -0,0 +1,219 @@
+import argparse
+import os
+import resource
+import shutil
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from carprice.constant import *
+from carprice.entity.carprice_batch import CarPriceBatch
+from carprice.entity.carprice_predictor import CarPriceModelRegistry
+from carprice.exception import CarException
+from carprice.logger import logging
+from carprice.entity.model_artifact import load_carprice_model
+from carprice.util.util import read_yaml_file
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_MODEL_DIR = os.path.join(ROOT_DIR, "saved_models")
+DEFAULT_SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "schema.yaml")
+PREDICTION_COLUMN_NAME = "selling_price_pred"
+
+BatchPredictionReport = namedtuple("BatchPredictionReport", ["model_path", "output_file_path", "row_count",
+                                                             "execution_time", "rows_per_second",
+                                                             "peak_rss_mb", "peak_children_rss_mb"])
+
+_worker_model = None
+
+
+def _init_worker(model_path: str):
+    global _worker_model
+    _worker_model = load_carprice_model(model_path=model_path)
+
+
+def _predict_chunk(chunk_df: pd.DataFrame) -> np.ndarray:
+    return np.asarray(_worker_model.predict(CarPriceBatch.from_data_frame(chunk_df)), dtype=np.float64)
+
+
+class BatchPrediction:
+    """
+    Scores a csv file of arbitrary size with the latest model in model_dir.
+    The file is read in chunks of chunk_size rows, chunks are scored on a pool of
+    worker processes (each worker loads the model once) and predictions are
+    streamed to output_file_path (.csv or .npy) in input order.
+    """
+
+    def __init__(self, input_file_path: str, output_file_path: str,
+                 model_dir: str = DEFAULT_MODEL_DIR,
+                 schema_file_path: str = DEFAULT_SCHEMA_FILE_PATH,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 workers: int = None):
+        try:
+            logging.info(f"{'>>' * 30}Batch prediction log started.{'<<' * 30} ")
+            self.input_file_path = input_file_path
+            self.output_file_path = output_file_path
+            self.model_dir = model_dir
+            self.chunk_size = chunk_size
+            self.workers = workers if workers is not None else os.cpu_count()
+
+            schema = read_yaml_file(file_path=schema_file_path)
+            target_column_name = schema[TARGET_COLUMN_KEY]
+            self.input_schema = {column: dtype for column, dtype in schema[DATASET_SCHEMA_COLUMNS_KEY].items()
+                                 if column != target_column_name}
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def get_latest_model_path(self) -> str:
+        try:
+            model_registry = CarPriceModelRegistry(model_dir=self.model_dir)
+            model_version = model_registry.get_latest_model_version()
+            return model_registry.get_model_path(model_version=model_version)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def validate_chunk(self, chunk_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Checks the chunk against the schema and returns only the model input columns
+        cast to their schema dtype.
+        """
+        try:
+            missing_columns = [column for column in self.input_schema if column not in chunk_df.columns]
+            if len(missing_columns) > 0:
+                raise Exception(f"Columns: {missing_columns} are not present in [{self.input_file_path}]")
+            chunk_df = chunk_df[list(self.input_schema.keys())]
+            return chunk_df.astype(self.input_schema)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def iter_chunks(self):
+        try:
+            for chunk_df in pd.read_csv(self.input_file_path, chunksize=self.chunk_size):
+                yield self.validate_chunk(chunk_df)
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def iter_predictions(self, model_path: str):
+        """
+        Yields one prediction array per chunk, in input order.
+        At most 2 * workers chunks are in flight so memory stays bounded.
+        """
+        try:
+            if self.workers <= 1:
+                _init_worker(model_path=model_path)
+                for chunk_df in self.iter_chunks():
+                    yield _predict_chunk(chunk_df)
+                return
+
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(model_path,)) as executor:
+                pending = deque()
+                for chunk_df in self.iter_chunks():
+                    pending.append(executor.submit(_predict_chunk, chunk_df))
+                    if len(pending) >= 2 * self.workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def write_csv(self, predictions) -> int:
+        try:
+            row_count = 0
+            with open(self.output_file_path, "w") as output_file:
+                output_file.write(f"{PREDICTION_COLUMN_NAME}\n")
+                for prediction in predictions:
+                    np.savetxt(output_file, prediction, fmt="%.2f")
+                    row_count += len(prediction)
+            return row_count
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def write_npy(self, predictions) -> int:
+        """
+        The row count is only known at the end, so predictions are streamed as raw
+        float64 to a temporary file and prefixed with the npy header once complete.
+        """
+        try:
+            row_count = 0
+            raw_file_path = f"{self.output_file_path}.raw"
+            with open(raw_file_path, "wb") as raw_file:
+                for prediction in predictions:
+                    raw_file.write(prediction.tobytes())
+                    row_count += len(prediction)
+
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+                      "fortran_order": False,
+                      "shape": (row_count,)}
+            with open(self.output_file_path, "wb") as output_file, open(raw_file_path, "rb") as raw_file:
+                np.lib.format.write_array_header_1_0(output_file, header)
+                shutil.copyfileobj(raw_file, output_file)
+            os.remove(raw_file_path)
+            return row_count
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def initiate_batch_prediction(self) -> BatchPredictionReport:
+        try:
+            start_time = time.perf_counter()
+            model_path = self.get_latest_model_path()
+            logging.info(f"Scoring [{self.input_file_path}] with model [{model_path}] "
+                         f"in chunks of [{self.chunk_size}] rows on [{self.workers}] workers")
+
+            output_dir = os.path.dirname(self.output_file_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            predictions = self.iter_predictions(model_path=model_path)
+            if self.output_file_path.endswith(".npy"):
+                row_count = self.write_npy(predictions)
+            else:
+                row_count = self.write_csv(predictions)
+
+            execution_time = time.perf_counter() - start_time
+            # ru_maxrss is reported in kilobytes on linux
+            batch_prediction_report = BatchPredictionReport(
+                model_path=model_path,
+                output_file_path=self.output_file_path,
+                row_count=row_count,
+                execution_time=execution_time,
+                rows_per_second=row_count / execution_time if execution_time > 0 else 0.0,
+                peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                peak_children_rss_mb=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+            )
+            logging.info(f"Batch prediction report: {batch_prediction_report}")
+            return batch_prediction_report
+        except Exception as e:
+            raise CarException(e, sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Batch prediction log completed.{'<<' * 30} ")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Score a car inventory csv with the latest saved model.")
+    parser.add_argument("input_file_path", help="csv file with the schema input columns")
+    parser.add_argument("output_file_path", help="output file, .csv or .npy")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--schema-file-path", default=DEFAULT_SCHEMA_FILE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(args)
+
+    batch_prediction = BatchPrediction(input_file_path=args.input_file_path,
+                                       output_file_path=args.output_file_path,
+                                       model_dir=args.model_dir,
+                                       schema_file_path=args.schema_file_path,
+                                       chunk_size=args.chunk_size,
+                                       workers=args.workers)
+    report = batch_prediction.initiate_batch_prediction()
+    print(f"Scored {report.row_count} rows in {report.execution_time:.2f}s "
+          f"({report.rows_per_second:.0f} rows/s) -> {report.output_file_path}")
+    print(f"Peak RSS: {report.peak_rss_mb:.1f} MB (main), {report.peak_children_rss_mb:.1f} MB (workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ import os, sys
 from collections import namedtuple
 from datetime import datetime
 import pandas as pd
-from carprice.constant import EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME
+from carprice.constant import EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME, EXPERIMENT_CANDIDATE_COSTS_FILE_NAME
 
 Experiment = namedtuple("Experiment", ["experiment_id", "initialization_timestamp", "artifact_time_stamp",
                                        "running_status", "start_time", "stop_time", "execution_time", "message",
@@ -30,11 +30,14 @@ Experiment = namedtuple("Experiment", ["experiment_id", "initialization_timestam
 class Pipeline(Thread):
     experiment: Experiment = Experiment(*([None] * 11))
     experiment_file_path = None
+    candidate_costs_file_path = None
 
     def __init__(self, config: Configuartion ) -> None:
         try:
             os.makedirs(config.training_pipeline_config.artifact_dir, exist_ok=True)
             Pipeline.experiment_file_path=os.path.join(config.training_pipeline_config.artifact_dir,EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME)
+            Pipeline.candidate_costs_file_path=os.path.join(config.training_pipeline_config.artifact_dir,
+                                                            EXPERIMENT_DIR_NAME, EXPERIMENT_CANDIDATE_COSTS_FILE_NAME)
             super().__init__(daemon=False, name="pipeline")
             self.config = config
         except Exception as e:
@@ -71,10 +74,14 @@ class Pipeline(Thread):
         except Exception as e:
             raise CarException(e, sys)
 
-    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
+    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact,
+                            data_ingestion_artifact: DataIngestionArtifact = None,
+                            data_validation_artifact: DataValidationArtifact = None) -> ModelTrainerArtifact:
         try:
             model_trainer = ModelTrainer(model_trainer_config=self.config.get_model_trainer_config(),
-                                         data_transformation_artifact=data_transformation_artifact
+                                         data_transformation_artifact=data_transformation_artifact,
+                                         data_ingestion_artifact=data_ingestion_artifact,
+                                         data_validation_artifact=data_validation_artifact
                                          )
             return model_trainer.initiate_model_trainer()
         except Exception as e:
@@ -135,7 +142,10 @@ class Pipeline(Thread):
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact
             )
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
+            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact,
+                                                              data_ingestion_artifact=data_ingestion_artifact,
+                                                              data_validation_artifact=data_validation_artifact)
+            self.save_candidate_costs(model_trainer_artifact=model_trainer_artifact)
 
             model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
                                                                     data_validation_artifact=data_validation_artifact,
@@ -196,13 +206,47 @@ class Pipeline(Thread):
         except Exception as e:
             raise CarException(e, sys)
 
+    def save_candidate_costs(self, model_trainer_artifact: ModelTrainerArtifact):
+        """
+        Appends the search candidate costs of the model trainer to the candidate costs file of the experiments.
+        """
+        try:
+            if model_trainer_artifact.candidate_costs_file_path is None:
+                return
+            candidate_costs = pd.read_csv(model_trainer_artifact.candidate_costs_file_path)
+            candidate_costs.insert(0, "experiment_id", Pipeline.experiment.experiment_id)
+            candidate_costs.insert(1, "artifact_time_stamp", self.config.time_stamp)
+            os.makedirs(os.path.dirname(Pipeline.candidate_costs_file_path), exist_ok=True)
+            if os.path.exists(Pipeline.candidate_costs_file_path):
+                candidate_costs.to_csv(Pipeline.candidate_costs_file_path, index=False, header=False, mode="a")
+            else:
+                candidate_costs.to_csv(Pipeline.candidate_costs_file_path, mode="w", index=False, header=True)
+        except Exception as e:
+            raise CarException(e, sys)
+
+    @classmethod
+    def get_costliest_candidates(cls, limit: int = 10) -> pd.DataFrame:
+        """
+        return: the limit search candidates of the latest profiled experiment that took the longest to train
+        """
+        try:
+            if Pipeline.candidate_costs_file_path is not None and os.path.exists(Pipeline.candidate_costs_file_path):
+                df = pd.read_csv(Pipeline.candidate_costs_file_path)
+                df = df[df["experiment_id"] == df["experiment_id"].iloc[-1]]
+                return df.sort_values("wall_seconds", ascending=False).head(int(limit)).drop(columns=["experiment_id"])
+            else:
+                return pd.DataFrame()
+        except Exception as e:
+            raise CarException(e, sys)
+
     @classmethod
     def get_experiments_status(cls, limit: int = 5) -> pd.DataFrame:
         try:
-            if os.path.exists(Pipeline.experiment_file_path):
+            # the path is only known once a Pipeline was created in this process
+            if Pipeline.experiment_file_path is not None and os.path.exists(Pipeline.experiment_file_path):
                 df = pd.read_csv(Pipeline.experiment_file_path)
                 limit = -1 * int(limit)
-                return df[limit:].drop(columns=["experiment_file_path", "initialization_timestamp"], axis=1)
+                return df[limit:].drop(columns=["experiment_file_path", "initialization_timestamp"])
             else:
                 return pd.DataFrame()
         except Exception as e:
@@ -5,7 +5,6 @@ import numpy as np
 import dill
 import pandas as pd
 from carprice.constant import *
-from urllib import request 
 
 
 def write_yaml_file(file_path:str,data:dict=None):
@@ -35,17 +34,18 @@ def read_yaml_file(file_path:str)->dict:
         raise CarException(e,sys) from e
 
 
-def save_numpy_array_data(file_path: str, array: np.array):
+def save_numpy_array_data(file_path: str, array: np.array, dtype=None):
     """
     Save numpy array data to file
     file_path: str location of file to save
     array: np.array data to save
+    dtype: optional dtype the array is saved as, no copy is made when it already has it
     """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         with open(file_path, 'wb') as file_obj:
-            np.save(file_obj, array)
+            np.save(file_obj, array if dtype is None else np.asarray(array, dtype=dtype))
     except Exception as e:
         raise CarException(e, sys) from e
 
@@ -110,15 +110,3 @@ def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
 
     except Exception as e:
         raise CarException(e,sys) from e
-
-
-def get_carlist():
-    try:
-        data_url ="https://raw.githubusercontent.com/aravind9722/datasets-for-ML-projects/main/cardekho_dataset.csv"
-        df =pd.read_csv(data_url)
-        car_list = list(df.car_name.unique())
-        return car_list
-    except Exception as e:
-        raise CarException(e,sys) from e
-
-    
\ No newline at end of file
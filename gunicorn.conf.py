@@ -0,0 +1,19 @@
+"""
+Gunicorn server hooks of the web app, gunicorn loads this file from the working directory.
+
+    gunicorn --preload --workers=4 app:app
+"""
+from carprice.config.configuration import Configuartion
+from carprice.entity.serving_metrics import ServingMetrics
+
+
+def on_starting(server):
+    # runs once in the master before the first worker, with or without --preload and not on worker restarts,
+    # so the metrics files of live workers are never removed
+    ServingMetrics(metrics_dir=Configuartion().get_model_serving_config().metrics_dir).reset()
+
+
+def post_worker_init(worker):
+    # the app is loaded in the worker at this point, a thread started in the master would not survive the fork
+    import app
+    app.start_model_watcher()
@@ -33,6 +33,9 @@ name=PROJECT_NAME,
 version=VERSION,
 author=AUTHOR,
 description=DESRCIPTION,
-packages=find_packages(), 
-install_requires=get_requirements_list()
+packages=find_packages(exclude=["tests", "tests.*"]), 
+install_requires=get_requirements_list(),
+entry_points={
+    "console_scripts": ["carprice-batch-predict=carprice.pipeline.batch_prediction:main"]
+}
 )
\ No newline at end of file
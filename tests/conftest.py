@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+
+from carprice.component.data_transformation import DataTransformation
+from carprice.entity.artifact_entity import DataValidationArtifact
+from carprice.entity.model_factory import ModelFactory
+from carprice.util.util import read_yaml_file
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_FILE_PATH = os.path.join(ROOT_DIR, "notebook", "data", "cardekho_dataset.csv")
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, "config", "schema.yaml")
+MODEL_CONFIG_FILE_PATH = os.path.join(ROOT_DIR, "config", "model.yaml")
+
+
+@pytest.fixture(scope="session")
+def schema():
+    return read_yaml_file(SCHEMA_FILE_PATH)
+
+
+@pytest.fixture(scope="session")
+def cardekho_dataframe(schema):
+    """
+    cardekho dataset with the schema columns, the target included
+    """
+    return pd.read_csv(DATASET_FILE_PATH)[list(schema["columns"].keys())]
+
+
+@pytest.fixture(scope="session")
+def input_dataframe(schema, cardekho_dataframe):
+    return cardekho_dataframe.drop(columns=[schema["target_column"]])
+
+
+@pytest.fixture(scope="session")
+def preprocessing_object():
+    """
+    unfitted preprocessing object of the training pipeline
+    """
+    data_validation_artifact = DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH, report_file_path=None,
+                                                      report_page_file_path=None, is_validated=True, message="")
+    return DataTransformation(data_transformation_config=None, data_ingestion_artifact=None,
+                              data_validation_artifact=data_validation_artifact).get_data_transformer_object()
+
+
+@pytest.fixture(scope="session")
+def transformed_dataset(schema, cardekho_dataframe, input_dataframe, preprocessing_object):
+    """
+    return: (float32 feature matrix, target) of the cardekho dataset, the features the models train on
+    """
+    input_feature = clone(preprocessing_object).fit_transform(input_dataframe)
+    return np.asarray(input_feature, dtype=np.float32), cardekho_dataframe[schema["target_column"]].to_numpy()
+
+
+@pytest.fixture(scope="session")
+def configured_models():
+    """
+    return: {class name: estimator with the params of config/model.yaml}
+    """
+    initialized_model_list = ModelFactory(model_config_path=MODEL_CONFIG_FILE_PATH).get_initialized_model_list()
+    return {type(initialized_model.model).__name__: initialized_model.model
+            for initialized_model in initialized_model_list}
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+
+from carprice.entity.carprice_batch import CarPriceBatch
+from carprice.entity.compiled_featurizer import CompiledFeaturizer
+from carprice.exception import CarException
+
+
+@pytest.fixture(scope="module")
+def fitted_preprocessing_object(preprocessing_object, input_dataframe):
+    preprocessing_object = clone(preprocessing_object)
+    expected_feature = preprocessing_object.fit_transform(input_dataframe)
+    return preprocessing_object, np.asarray(expected_feature, dtype=np.float64)
+
+
+@pytest.mark.parametrize("feature_dtype", ["float64", "float32"])
+def test_compiled_featurizer_is_byte_identical_on_cardekho_dataset(fitted_preprocessing_object, input_dataframe,
+                                                                    feature_dtype):
+    preprocessing_object, expected_feature = fitted_preprocessing_object
+    expected_feature = expected_feature.astype(feature_dtype)
+    compiled_featurizer = CompiledFeaturizer.compile(preprocessor=preprocessing_object, feature_dtype=feature_dtype)
+
+    outputs = {"transform_records": compiled_featurizer.transform_records(input_dataframe.to_dict("records")),
+               "transform_frame": compiled_featurizer.transform_frame(input_dataframe),
+               "transform_batch": compiled_featurizer.transform_batch(CarPriceBatch.from_data_frame(input_dataframe))}
+    for name, feature in outputs.items():
+        assert feature.dtype == expected_feature.dtype, name
+        assert feature.tobytes() == expected_feature.tobytes(), name
+
+    record = input_dataframe.iloc[0].to_dict()
+    assert compiled_featurizer.transform_record(record).tobytes() == expected_feature[:1].tobytes()
+    compiled_featurizer.check_parity(preprocessor=preprocessing_object, dataframe=input_dataframe)
+
+
+def test_check_parity_rejects_a_featurizer_that_is_not_exact(fitted_preprocessing_object, input_dataframe):
+    preprocessing_object, _ = fitted_preprocessing_object
+    compiled_featurizer = CompiledFeaturizer.compile(preprocessor=preprocessing_object)
+    steps = []
+    for kind, columns, start, stop, params in compiled_featurizer.steps:
+        if kind == "scaler":
+            mean, scale = params
+            params = (mean, np.nextafter(scale, np.inf))
+        steps.append((kind, columns, start, stop, params))
+    shifted_featurizer = CompiledFeaturizer(steps=steps, n_features=compiled_featurizer.n_features,
+                                            feature_dtype=compiled_featurizer.feature_dtype)
+    with pytest.raises(CarException):
+        shifted_featurizer.check_parity(preprocessor=preprocessing_object, dataframe=input_dataframe)
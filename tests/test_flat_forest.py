@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+
+from carprice.component.model_trainer import FLAT_FOREST_PARITY_RTOL
+from carprice.entity.flat_forest import FlatForest
+
+CONFIGURED_MODEL_NAMES = ["XGBRegressor", "RandomForestRegressor"]
+
+
+@pytest.mark.parametrize("model_name", CONFIGURED_MODEL_NAMES)
+@pytest.mark.parametrize("max_depth", [5, 12])
+def test_flat_forest_predicts_like_the_native_model(configured_models, transformed_dataset, model_name, max_depth):
+    input_feature, output_feature = transformed_dataset
+    model = clone(configured_models[model_name]).set_params(max_depth=max_depth, n_estimators=50, random_state=42)
+    model.fit(input_feature, output_feature)
+    flat_forest = FlatForest.from_model(model)
+
+    native_prediction = model.predict(input_feature)
+    np.testing.assert_allclose(flat_forest.predict(input_feature), native_prediction, rtol=FLAT_FOREST_PARITY_RTOL)
+    # single rows and a batch spanning several row blocks walk the same trees
+    np.testing.assert_allclose(flat_forest.predict(input_feature[:1]), native_prediction[:1],
+                               rtol=FLAT_FOREST_PARITY_RTOL)
+    np.testing.assert_allclose(flat_forest.predict(input_feature, row_block_size=1000), native_prediction,
+                               rtol=FLAT_FOREST_PARITY_RTOL)
+
+
+def test_flat_forest_follows_xgboost_missing_value_direction(configured_models, transformed_dataset):
+    input_feature, output_feature = transformed_dataset
+    model = clone(configured_models["XGBRegressor"]).set_params(n_estimators=50, random_state=42)
+    model.fit(input_feature, output_feature)
+    missing_feature = input_feature[:500].copy()
+    missing_feature[::3, -1] = np.nan
+    np.testing.assert_allclose(FlatForest.from_model(model).predict(missing_feature), model.predict(missing_feature),
+                               rtol=FLAT_FOREST_PARITY_RTOL)
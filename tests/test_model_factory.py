@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import yaml
+
+from carprice.entity.model_factory import ModelFactory
+
+
+def get_model_config(search_workers: int, search_strategy: str) -> dict:
+    return {"grid_search": {"module": "sklearn.model_selection", "class": "GridSearchCV", "params": {"cv": 3}},
+            "search_workers": search_workers,
+            "search_strategy": {"name": search_strategy, "random_state": 42, "n_iter": 3, "max_fits": 12},
+            "model_selection": {
+                "module_0": {"module": "xgboost", "class": "XGBRegressor",
+                             "params": {"n_estimators": 30, "tree_method": "hist", "random_state": 42, "n_jobs": 1},
+                             "search_param_grid": {"max_depth": [3, 5], "learning_rate": [0.1, 0.3]}},
+                "module_1": {"module": "sklearn.ensemble", "class": "RandomForestRegressor",
+                             "params": {"n_estimators": 20, "random_state": 42, "n_jobs": 1},
+                             "search_param_grid": {"max_depth": [4, 8], "min_samples_split": [2, 10]}}}}
+
+
+def search(tmp_path, search_workers: int, search_strategy: str, input_feature, output_feature) -> list:
+    model_config_path = tmp_path / f"model_{search_workers}.yaml"
+    model_config_path.write_text(yaml.safe_dump(get_model_config(search_workers, search_strategy)))
+    model_factory = ModelFactory(model_config_path=str(model_config_path))
+    return model_factory.initiate_best_parameter_search_for_initialized_models(
+        initialized_model_list=model_factory.get_initialized_model_list(),
+        input_feature=input_feature,
+        output_feature=output_feature)
+
+
+@pytest.mark.parametrize("search_strategy", ["grid", "random", "budget"])
+def test_parallel_search_matches_serial_search(tmp_path, transformed_dataset, search_strategy):
+    input_feature, output_feature = transformed_dataset
+    input_feature, output_feature = input_feature[:2000], output_feature[:2000]
+    serial_model_list = search(tmp_path, 1, search_strategy, input_feature, output_feature)
+    parallel_model_list = search(tmp_path, 2, search_strategy, input_feature, output_feature)
+
+    assert len(parallel_model_list) == len(serial_model_list) == 2
+    for serial_model, parallel_model in zip(serial_model_list, parallel_model_list):
+        assert parallel_model.model_serial_number == serial_model.model_serial_number
+        assert type(parallel_model.best_model) is type(serial_model.best_model)
+        assert parallel_model.best_parameters == serial_model.best_parameters
+        assert parallel_model.best_score == serial_model.best_score
+        assert parallel_model.evaluated_candidates == serial_model.evaluated_candidates
+        assert parallel_model.n_fits == serial_model.n_fits
+        assert parallel_model.ranked_candidates == serial_model.ranked_candidates
+        np.testing.assert_array_equal(parallel_model.best_model.predict(input_feature),
+                                      serial_model.best_model.predict(input_feature))